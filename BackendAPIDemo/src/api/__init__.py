@@ -25,20 +25,49 @@ async def lifespan(app: FastAPI):
     # STARTUP
     print("🚀 Application starting up...")
     
-    # Matchmaking queue cleanup task'ını başlat
-    from ..services.matchmaking_queue import cleanup_task
+    # Matchmaking queue cleanup + event-driven matcher task'ları
+    from ..services.matchmaking_queue import cleanup_task, matcher_task
     cleanup_task_instance = asyncio.create_task(cleanup_task())
-    print("✅ Matchmaking cleanup task started")
+    matcher_task_instance = asyncio.create_task(matcher_task())
+    print("✅ Matchmaking cleanup + matcher tasks started")
+    
+    # Oyun oturumları için TTL temizliği
+    from ..services.game_service import session_cleanup_task
+    session_cleanup_instance = asyncio.create_task(session_cleanup_task())
+    
+    # Oyun soru havuzu: yayınlanan reels için background üretim
+    from ..services.question_pool import question_pool_task
+    question_pool_instance = asyncio.create_task(question_pool_task())
+    
+    # JSON dosyaları için write-behind flusher
+    from ..services.write_behind import write_behind
+    from ..models.user_viewed_news import user_viewed_news_storage
+    user_viewed_news_storage.use_write_behind(write_behind)
+    write_behind.start()
     
     yield  # Uygulama çalışıyor
     
     # SHUTDOWN
     print("👋 Application shutting down...")
-    cleanup_task_instance.cancel()
-    try:
-        await cleanup_task_instance
-    except asyncio.CancelledError:
-        pass
+    for task in (cleanup_task_instance, matcher_task_instance, session_cleanup_instance, question_pool_instance):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    
+    # Çalışan NLP refit'i bitir, process pool'u kapat
+    from ..services.incremental_nlp import incremental_nlp
+    await incremental_nlp.shutdown()
+
+    # News provider HTTP bağlantı havuzunu kapat
+    from ..providers import get_provider
+    news_provider = get_provider("news_aa")
+    if news_provider and "close" in news_provider:
+        await news_provider["close"]()
+
+    # Bekleyen tüm yazmaları zorla (veri kaybı olmasın)
+    await write_behind.stop()
 
 def create_app() -> FastAPI:
     """
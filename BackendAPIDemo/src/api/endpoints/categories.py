@@ -83,22 +83,23 @@ async def get_category_stats(
         - Kullanıcının bu kategorideki izleme oranı
     """
     try:
-        from ...services.reels_analytics import reels_analytics_service
+        from ...services.reels_analytics import reels_analytics
+        from ...services.reel_catalog_index import category_key
         
-        # Kategorideki tüm reels
-        all_reels = await reels_analytics_service.get_reels_by_category(category_id)
+        # Kategori index sayaçları (reels taranmaz)
+        total_reels = reels_analytics.get_category_counts().get(category_key(category_id), 0)
         
         # Son 24 saatteki reels
         from datetime import datetime, timedelta
         yesterday = datetime.now() - timedelta(days=1)
-        recent_reels = [r for r in all_reels if r.published_at > yesterday]
+        recent_reels_24h = reels_analytics.get_category_count_since(category_id, yesterday)
         
         return {
             'success': True,
             'category_id': category_id,
-            'total_reels': len(all_reels),
-            'recent_reels_24h': len(recent_reels),
-            'has_content': len(all_reels) > 0
+            'total_reels': total_reels,
+            'recent_reels_24h': recent_reels_24h,
+            'has_content': total_reels > 0
         }
         
     except Exception as e:
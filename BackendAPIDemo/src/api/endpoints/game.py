@@ -582,10 +582,12 @@ async def check_game_eligibility(
         current_count = len(user_views)
         eligible = current_count >= min_reels
         needed = max(0, min_reels - current_count)
+        active_game = game_service.get_active_game_for_user(user_id)
         
         return {
             "success": True,
             "eligible": eligible,
+            "active_game_id": active_game.game_id if active_game else None,
             "current_count": current_count,
             "required": min_reels,
             "needed": needed,
@@ -624,7 +626,8 @@ async def debug_active_games():
         return {
             "success": True,
             "active_games_count": len(games),
-            "games": games
+            "games": games,
+            "stats": game_service.get_stats()
         }
         
     except Exception as e:
@@ -645,6 +648,24 @@ async def join_matchmaking_queue(
     Eşleşme varsa hemen döner, yoksa queue'ya ekler
     """
     try:
+        # 0. Background matcher bu kullanıcı için oyun oluşturuyorsa ikinci rakip arama
+        if user_id in matchmaking_queue.pending_matches:
+            return MatchmakingResponse(
+                success=True,
+                matched=False,
+                opponent_id=matchmaking_queue.pending_matches[user_id],
+                message="Rakip bulundu, oyun hazırlanıyor..."
+            )
+        
+        # Kuyruktaysa eşleştirme matcher'da (aynı anda iki yerden eşleşmesin)
+        if matchmaking_queue.matcher_running and matchmaking_queue.is_in_queue(user_id):
+            return MatchmakingResponse(
+                success=True,
+                matched=False,
+                estimated_wait_time_seconds=60,
+                message="Zaten aramada"
+            )
+        
         # 1. Uygunluk kontrolü
         user_views = user_viewed_news_storage.get_user_views(
             user_id=user_id,
@@ -658,24 +679,20 @@ async def join_matchmaking_queue(
                 message=f"Son {request.days} günde en az {request.min_common_reels} haber izlemelisiniz."
             )
         
-        # 2. Matchable kullanıcıları bul
-        matchable_users = user_viewed_news_storage.find_matchable_users(
-            current_user_id=user_id,
-            days=request.days,
+        # 2. Sadece kuyrukta bekleyenlerle ortak reel karşılaştır
+        recent_reels = {view.reel_id for view in user_views}
+        match = matchmaking_queue.find_best_match(
+            user_id,
+            recent_reels=recent_reels,
             min_common_reels=request.min_common_reels
         )
         
-        # 3. Queue'da bekleyen var mı kontrol et
-        opponent_id = matchmaking_queue.find_match(user_id, matchable_users)
-        
-        if opponent_id:
-            # ✅ Eşleşme bulundu! Oyun oluştur
-            matchmaking_queue.remove_from_queue(opponent_id)
-            matchmaking_queue.remove_from_queue(user_id)  # Kendini de çıkar
-            
-            game_session = await game_service.create_game_session(
-                player1_id=user_id,
-                player2_id=opponent_id,
+        if match:
+            opponent_id, _ = match
+            # ✅ Eşleşme bulundu! Oyun oluştur (bekleyen rakibe WebSocket ile push edilir)
+            game_session = await matchmaking_queue.complete_match(
+                user_id,
+                opponent_id,
                 days=request.days,
                 question_count=8
             )
@@ -695,7 +712,8 @@ async def join_matchmaking_queue(
                 user_id=user_id,
                 days=request.days,
                 min_common_reels=request.min_common_reels,
-                common_reels_count=len(user_views)
+                common_reels_count=len(user_views),
+                recent_reels=recent_reels
             )
             
             return MatchmakingResponse(
@@ -717,29 +735,49 @@ async def get_matchmaking_status(
     """
     Matchmaking durumunu kontrol et (polling için)
     
-    Mobile her 3 saniyede bir bu endpoint'i çağırır
+    Mobile her 3 saniyede bir bu endpoint'i çağırır.
+    Push için /matchmaking/ws tercih edilmeli; poll sadece durumu okur,
+    eşleştirmeyi background matcher yapar. Expired temizliği cleanup_task'ta.
     """
     try:
-        # Temizlik yap (expired entries)
-        matchmaking_queue.cleanup_expired()
+        # Background matcher eşleştirdiyse sonuç hazır
+        result = matchmaking_queue.get_match_result(user_id)
+        if result:
+            return MatchmakingStatusResponse(
+                success=True,
+                in_queue=False,
+                matched=True,
+                game_id=result.game_id,
+                opponent_id=result.opponent_id,
+                message="Rakip bulundu!"
+            )
         
-        # 🔥 FIX 1: Önce aktif oyunları kontrol et!
-        # Kullanıcının şu an aktif bir oyunu var mı?
-        for game_id, session in game_service.active_games.items():
-            if user_id in [session.player1_id, session.player2_id]:
-                # ✅ Aktif oyunda! Eşleşmiş demektir
-                opponent_id = session.player2_id if user_id == session.player1_id else session.player1_id
-                
-                print(f"🎯 User {user_id[:8]} found in active game: {game_id}")
-                
-                return MatchmakingStatusResponse(
-                    success=True,
-                    in_queue=False,
-                    matched=True,
-                    game_id=game_id,
-                    opponent_id=opponent_id,
-                    message="Rakip bulundu!"
-                )
+        # Eşleşti, oyun hazırlanıyor
+        if user_id in matchmaking_queue.pending_matches:
+            return MatchmakingStatusResponse(
+                success=True,
+                in_queue=True,
+                matched=False,
+                opponent_id=matchmaking_queue.pending_matches[user_id],
+                message="Rakip bulundu, oyun hazırlanıyor..."
+            )
+        
+        # 🔥 FIX 1: Önce aktif oyunu kontrol et! (user → game index, O(1))
+        session = game_service.get_active_game_for_user(user_id)
+        if session:
+            # ✅ Aktif oyunda! Eşleşmiş demektir
+            opponent_id = session.player2_id if user_id == session.player1_id else session.player1_id
+            
+            print(f"🎯 User {user_id[:8]} found in active game: {session.game_id}")
+            
+            return MatchmakingStatusResponse(
+                success=True,
+                in_queue=False,
+                matched=True,
+                game_id=session.game_id,
+                opponent_id=opponent_id,
+                message="Rakip bulundu!"
+            )
         
         # Kullanıcı kuyrukta mı?
         queue_info = matchmaking_queue.get_queue_info(user_id)
@@ -753,26 +791,16 @@ async def get_matchmaking_status(
                 message="Kuyrukta değilsiniz."
             )
         
-        # 🔥 FIX 2: Kuyrukta iken eşleşme ara
-        user_views = user_viewed_news_storage.get_user_views(user_id, days=6)
-        matchable_users = user_viewed_news_storage.find_matchable_users(
-            current_user_id=user_id,
-            days=6,
-            min_common_reels=8
-        )
-        
-        opponent_id = matchmaking_queue.find_match(user_id, matchable_users)
+        # 🔥 FIX 2: Matcher çalışmıyorsa kuyrukta iken eşleşme ara (sadece kuyruktakilerle)
+        match = None if matchmaking_queue.matcher_running else matchmaking_queue.find_best_match(user_id)
         
-        if opponent_id:
+        if match:
+            opponent_id, _ = match
             # 🎯 EŞLEŞME BULUNDU!
             try:
-                # Kuyruktan çıkar
-                matchmaking_queue.remove_from_queue(opponent_id)
-                matchmaking_queue.remove_from_queue(user_id)
-                
-                game_session = await game_service.create_game_session(
-                    player1_id=user_id,
-                    player2_id=opponent_id,
+                game_session = await matchmaking_queue.complete_match(
+                    user_id,
+                    opponent_id,
                     days=6,
                     question_count=8
                 )
@@ -814,6 +842,112 @@ async def get_matchmaking_status(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ============ MATCHMAKING WEBSOCKET (PUSH) ============
+
+@router.websocket("/matchmaking/ws")
+async def matchmaking_websocket_endpoint(
+    websocket: WebSocket,
+    user_id: str = None,  # Query parameter olarak gelecek
+    days: int = 6,
+    min_common_reels: int = 8
+):
+    """
+    Matchmaking WebSocket Endpoint (polling yerine)
+    
+    Bağlantı: ws://localhost:8000/api/game/matchmaking/ws?user_id={user_id}
+    
+    Bağlanınca kuyruğa girilir; background matcher eşleştirince push edilir.
+    Bağlantı kapanırsa (eşleşmeden) kuyruktan çıkılır.
+    Aktif oyunu olan kullanıcı kuyruğa girmez (matched), oyunu hazırlanan
+    kullanıcı bekler (pending → matched push'u).
+    
+    Events:
+    - queued: Kuyruğa alındı
+    - pending: Rakip bulundu, oyun hazırlanıyor
+    - not_eligible: Yeterli haber izlenmemiş
+    - matched: Rakip bulundu (game_id, opponent_id)
+    - match_failed: Oyun oluşturulamadı
+    - queue_timeout: Süre doldu, rakip yok
+    """
+    if not user_id:
+        await websocket.close(code=1008, reason="user_id required")
+        return
+    
+    await game_ws_manager.connect_matchmaking(user_id, websocket)
+    
+    try:
+        # Zaten eşleşmiş (aktif oyun): ikinci rakip arama, oyuna yönlendir
+        session = game_service.get_active_game_for_user(user_id)
+        if session:
+            result = matchmaking_queue.get_match_result(user_id)
+            await game_ws_manager.send_matchmaking_event(user_id, {
+                "type": "matched",
+                "game_id": session.game_id,
+                "opponent_id": session.player2_id if user_id == session.player1_id else session.player1_id,
+                "common_reels_count": (
+                    result.common_reels_count
+                    if result and result.game_id == session.game_id
+                    else len(session.questions)
+                ),
+                "message": "Rakip bulundu!"
+            })
+            await websocket.close()
+            return
+        
+        if user_id in matchmaking_queue.pending_matches:
+            # Oyun hazırlanıyor: matcher bitirince "matched" bu bağlantıya push edilir
+            await game_ws_manager.send_matchmaking_event(user_id, {
+                "type": "pending",
+                "opponent_id": matchmaking_queue.pending_matches[user_id],
+                "message": "Rakip bulundu, oyun hazırlanıyor..."
+            })
+        else:
+            # Uygunluk kontrolü
+            user_views = user_viewed_news_storage.get_user_views(user_id=user_id, days=days)
+            if len(user_views) < min_common_reels:
+                await game_ws_manager.send_matchmaking_event(user_id, {
+                    "type": "not_eligible",
+                    "message": f"Son {days} günde en az {min_common_reels} haber izlemelisiniz."
+                })
+                await websocket.close()
+                return
+            
+            matchmaking_queue.add_to_queue(
+                user_id=user_id,
+                days=days,
+                min_common_reels=min_common_reels,
+                common_reels_count=len(user_views),
+                recent_reels={view.reel_id for view in user_views}
+            )
+            
+            await game_ws_manager.send_matchmaking_event(user_id, {
+                "type": "queued",
+                "queue_size": matchmaking_queue.get_queue_size(),
+                "timeout_seconds": matchmaking_queue.timeout_seconds,
+                "message": "Rakip aranıyor..."
+            })
+        
+        # Bağlantıyı dinle (keep-alive için)
+        while True:
+            data = await websocket.receive_text()
+            if data == "ping":
+                await websocket.send_text("pong")
+    
+    except WebSocketDisconnect:
+        print(f"🔌 Matchmaking channel disconnected: {user_id[:8]}")
+    
+    except Exception as e:
+        print(f"❌ Matchmaking WebSocket error: {e}")
+    
+    finally:
+        # Aynı kullanıcı yeni bağlantı açtıysa kuyruk kaydı onundur
+        replaced = game_ws_manager.matchmaking_connections.get(user_id) is not websocket
+        game_ws_manager.disconnect_matchmaking(user_id, websocket)
+        if not replaced:
+            # Eşleşmeden ayrıldıysa kuyruktan çık
+            matchmaking_queue.remove_from_queue(user_id)
+
+
 # ============ YENİ ENDPOINT: QUEUE'DAN ÇIKIŞ ============
 @router.post("/matchmaking/cancel")
 async def cancel_matchmaking(
@@ -1092,7 +1226,7 @@ async def test_create_bot_match(user_id: str = Depends(get_current_user_id)):
         session.started_at = datetime.now()
         
         # Memory'e kaydet
-        game_service.active_games[game_id] = session
+        game_service.register_session(session)
         
         print(f"✅ Bot game created: {game_id}")
         print(f"🎮 Active games: {len(game_service.active_games)}")
@@ -39,7 +39,7 @@ async def get_current_user_id(authorization: Optional[str] = Header(None)) -> st
 async def get_personalized_feed(
     user_id: str = Depends(get_current_user_id),
     limit: int = Query(20, ge=1, le=50, description="Kaç reel döndürülecek"),
-    cursor: Optional[str] = Query(None, description="Pagination için cursor (reel_id)")
+    cursor: Optional[str] = Query(None, description="Pagination cursor (önceki yanıttaki next_cursor)")
 ):
     """
     Instagram-style personalized feed (JWT Auth)
@@ -308,6 +308,41 @@ async def get_system_statistics():
         except Exception as e:
             stats["files"] = {"error": str(e)}
         
+        # NLP engine stats (refit süresi, kuyruk derinliği, vektör store)
+        try:
+            from ...services.incremental_nlp import incremental_nlp
+            stats["nlp"] = incremental_nlp.get_stats()
+        except Exception as e:
+            stats["nlp"] = {"error": str(e)}
+
+        # Kullanıcı profil store'ları (LRU cache hit oranı, KV yazımları)
+        try:
+            from ...services.user_preference import preference_engine
+            from ...services.streak_service import streak_service
+            stats["profile_stores"] = {
+                "user_preferences": preference_engine.get_store_stats(),
+                "streaks": streak_service.store.get_stats()
+            }
+        except Exception as e:
+            stats["profile_stores"] = {"error": str(e)}
+
+        # Scraping: parse cache hit/miss + HTTP client
+        try:
+            from ...services.article_cache import article_cache
+            stats["article_cache"] = article_cache.get_stats()
+            news_provider = get_provider("news_aa")
+            if news_provider and "get_http_stats" in news_provider:
+                stats["news_http"] = news_provider["get_http_stats"]()
+        except Exception as e:
+            stats["article_cache"] = {"error": str(e)}
+
+        # Oyun soru havuzu (hit oranı, model çağrıları)
+        try:
+            from ...services.question_pool import question_pool
+            stats["question_pool"] = question_pool.get_stats()
+        except Exception as e:
+            stats["question_pool"] = {"error": str(e)}
+
         # Provider stats
         stats["providers"] = {
             "total_types": len(PROVIDERS),
@@ -30,6 +30,15 @@ class Settings(BaseSettings):
     news_max_articles: int = 50
     news_scraping_enabled: bool = True
     news_cache_ttl: int = 300  # seconds
+    # Async HTTP client (keep-alive havuzu)
+    news_http_timeout: float = 20.0          # seconds
+    news_http_max_connections: int = 20      # Toplam bağlantı havuzu
+    news_http_max_per_host: int = 6          # Aynı host'a eşzamanlı istek
+    news_scrape_concurrency: int = 10        # get_latest_news içinde paralel scrape
+    news_scrape_timeout: float = 15.0        # URL başına (bekleme + indirme + parse)
+    news_parse_cache_enabled: bool = True    # Parse edilmiş makale disk cache'i
+    news_parse_cache_ttl: int = 21600        # seconds (6 saat)
+    news_parse_cache_max_entries: int = 5000
     
     # ============ TTS SYSTEM ============
     # Yeni TTS provider eklemek için: tts_provider = "yeni_provider"
@@ -47,6 +56,15 @@ class Settings(BaseSettings):
     storage_provider: str = "local"  # local, s3, azure, gcp vb
     storage_base_path: str = "outputs"
     
+    # Reels analytics write-ahead log (append-only delta + periyodik snapshot)
+    reels_wal_enabled: bool = True
+    reels_wal_compact_threshold: int = 1000  # Bu kadar kayıttan sonra snapshot al
+    reels_wal_fsync: bool = False  # Her kayıttan sonra fsync (daha güvenli, daha yavaş)
+    
+    # Write-behind flusher (JSON dosyaları arka planda toplu yazılır)
+    write_behind_enabled: bool = True
+    write_behind_interval_seconds: float = 2.0  # Kirli servisleri bu aralıkla yaz
+    
     # S3 settings (isteğe bağlı)
     aws_access_key_id: Optional[str] = None
     aws_secret_access_key: Optional[str] = None
@@ -89,6 +107,13 @@ class Settings(BaseSettings):
     game_min_common_reels: int = 8
     game_question_count: int = 8
     game_xp_per_correct: int = 20
+    game_finished_session_ttl: int = 600     # Bitmiş oyun sonuç ekranı için memory'de kalır (s)
+    game_abandoned_session_ttl: int = 1800   # Bu kadar hareketsiz kalan oyun silinir (s)
+    game_view_index_retention_days: int = 30 # Eşleştirme index'i (endpoint'lerde days <= 30)
+    game_question_llm: str = "openai"        # openai | stub (yerel, ağsız - test için)
+    game_question_model: str = "gpt-4o-mini"
+    game_question_llm_timeout: float = 25.0  # Cache miss'te oyuncular beklerken (s)
+    game_question_batch_size: int = 8        # Background üretimde çağrı başına haber
     
     # ============ AI CHAT SYSTEM ============
     # AI chat sistemi eklemek için
@@ -117,10 +142,46 @@ class Settings(BaseSettings):
     websocket_max_connections: int = 1000
     websocket_ping_interval: int = 15
     
-    # ============ DATABASE SETTINGS (İleride eklenebilir) ============
+    # ============ DATABASE SETTINGS ============
+    # Reels analytics için SQLite backend: "sqlite:///outputs/reels.db"
+    # None ise JSON snapshot + WAL kullanılır
     database_url: Optional[str] = None
     database_echo: bool = False
     
+    # ============ NLP / RECOMMENDATION ============
+    # TF-IDF refit event loop dışında çalışır: True = process pool, False = thread
+    nlp_refit_in_process: bool = True
+    
+    # "tfidf": vocabulary + periyodik refit, "hashing": HashingVectorizer + online IDF (refit yok)
+    nlp_engine_mode: str = "tfidf"
+    nlp_hashing_n_features: int = 2 ** 18
+    
+    # Kullanıcı profil cache'i (hot feed geçmişi taramaz)
+    nlp_profile_decay: float = 0.97        # Her yeni izlemede eski profil bu oranla söner
+    nlp_profile_cache_size: int = 10000    # LRU: en fazla bu kadar kullanıcı
+    
+    # IVF aday index'i: katalog büyükse sadece en yakın kümeler skorlanır
+    nlp_ann_enabled: bool = True
+    nlp_ann_min_rows: int = 1000           # Bu kadar reel vektörü olmadan index kurulmaz
+    nlp_ann_candidates: int = 300          # Exact skorlanacak minimum aday sayısı
+    
+    # Feed snapshot: oturum başında bir kez sıralanır, sayfalar cursor(offset) ile dilimlenir
+    feed_snapshot_ttl_seconds: int = 900
+    feed_snapshot_max_sessions: int = 10000
+    
+    # Kullanıcı tercihleri: kullanıcı başı sınırlı vocabulary (top-N + LRU decay)
+    preference_max_keywords: int = 256
+    preference_max_authors: int = 64
+    preference_max_categories: int = 64
+    preference_lru_decay: float = 0.98     # Eviction: skor × decay^(kaç etkileşimdir kullanılmadı)
+    preference_vocab_max_terms: int = 200000          # Ortak vocabulary tavanı (aşılınca cache'teki profillerden yeniden kurulur)
+    preference_feature_table_max_rows: int = 50000    # Reel özellik tablosu tavanı (aşılınca boşaltılır, adaylar lazy eklenir)
+    
+    # Kullanıcı profil store'u (tercihler + streak): sharded SQLite KV + LRU cache
+    profile_store_shards: int = 16
+    profile_cache_size: int = 50000        # Bellekte tutulan en fazla kullanıcı (store başına)
+    profile_warmup_users: int = 2000       # Startup'ta önceden yüklenen son aktif kullanıcılar
+    
     # ============ CACHE SETTINGS ============
     cache_enabled: bool = True
     cache_type: str = "memory"  # memory, redis
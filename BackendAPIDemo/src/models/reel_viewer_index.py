@@ -0,0 +1,146 @@
+# ================================
+# src/models/reel_viewer_index.py - Reel → Viewers Inverted Index
+# ================================
+
+"""
+Oyun eşleştirmesi için reel → izleyenler ters index'i (gün bucket'lı)
+
+find_matchable_users her kullanıcı için iki tarafın 6 günlük izleme
+set'lerini baştan kuruyordu: O(kullanıcı × geçmiş). Bu index ile:
+
+    ortak sayısı = Σ (kullanıcının son N gündeki her reel'i) → o reel'in izleyenleri
+
+Maliyet, mevcut kullanıcının son izlemeleri (ve o reels'in izleyenleri) ile
+orantılıdır; toplam kullanıcı sayısından bağımsızdır.
+
+Bucket: gün → reel_id → {user_id: son izleme anı}. Sınır günü (cutoff'un
+günü) için izleme anı ile filtrelenir, böylece "son N gün" penceresi eski
+davranışla aynıdır (viewed_at >= now - N gün). Sorgular sadece since'ten
+bugüne kadarki N+1 günün bucket'larına bakar; eski günler prune() ile düşer
+(game_service.session_cleanup_task).
+"""
+
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+class ReelViewerIndex:
+    """
+    Usage:
+        index.add(user_id, reel_id, viewed_at)
+        index.user_reels(user_id, since)                       # set
+        index.users_with_overlap(user_id, since, min_common=8) # en çok ortak olan önce
+    """
+
+    def __init__(self):
+        # gün → reel_id → user_id → son izleme
+        self._by_day: Dict[date, Dict[str, Dict[str, datetime]]] = {}
+        # user_id → gün → reel_id set
+        self._user_days: Dict[str, Dict[date, Set[str]]] = {}
+        self._last_day: Optional[date] = None
+
+        # Metrics
+        self.overlap_queries = 0
+        self.viewers_scanned = 0
+
+    # ============ UPDATE ============
+
+    def add(self, user_id: str, reel_id: str, viewed_at: datetime):
+        day = viewed_at.date()
+        viewers = self._by_day.setdefault(day, {}).setdefault(reel_id, {})
+        previous = viewers.get(user_id)
+        if previous is None or viewed_at > previous:
+            viewers[user_id] = viewed_at
+        self._user_days.setdefault(user_id, {}).setdefault(day, set()).add(reel_id)
+        if self._last_day is None or day > self._last_day:
+            self._last_day = day
+
+    def rebuild(self, views: Iterable[Tuple[str, str, datetime]]):
+        """(user_id, reel_id, viewed_at) listesinden kur - startup"""
+        self._by_day = {}
+        self._user_days = {}
+        self._last_day = None
+        for user_id, reel_id, viewed_at in views:
+            self.add(user_id, reel_id, viewed_at)
+
+    def prune(self, cutoff: datetime) -> int:
+        """cutoff gününden önceki bucket'ları sil, silinen gün sayısını döndür"""
+        old_days = [day for day in self._by_day if day < cutoff.date()]
+        for day in old_days:
+            for reel_id, viewers in self._by_day.pop(day).items():
+                for user_id in viewers:
+                    days = self._user_days.get(user_id)
+                    if days is None:
+                        continue
+                    days.pop(day, None)
+                    if not days:
+                        del self._user_days[user_id]
+        return len(old_days)
+
+    # ============ QUERIES ============
+
+    def user_reels(self, user_id: str, since: datetime) -> Set[str]:
+        """Kullanıcının since'ten beri izlediği reel ID'leri"""
+        boundary = since.date()
+        reels: Set[str] = set()
+        for day, day_reels in self._user_days.get(user_id, {}).items():
+            if day > boundary:
+                reels |= day_reels
+            elif day == boundary:
+                bucket = self._by_day[day]
+                reels.update(
+                    reel_id for reel_id in day_reels
+                    if bucket[reel_id][user_id] >= since
+                )
+        return reels
+
+    def reel_viewers(self, reel_id: str, since: datetime) -> Set[str]:
+        """since'ten beri reel'i izleyen kullanıcılar"""
+        boundary = since.date()
+        viewers: Set[str] = set()
+        for day in self._days_since(boundary):
+            bucket = self._by_day.get(day)
+            day_viewers = bucket.get(reel_id) if bucket else None
+            if not day_viewers:
+                continue
+            if day > boundary:
+                viewers.update(day_viewers)
+            else:
+                viewers.update(u for u, viewed_at in day_viewers.items() if viewed_at >= since)
+        return viewers
+
+    def overlap_counts(self, user_id: str, since: datetime) -> Counter:
+        """Diğer kullanıcılar → user_id ile ortak izlenen reel sayısı"""
+        self.overlap_queries += 1
+        counts: Counter = Counter()
+        for reel_id in self.user_reels(user_id, since):
+            viewers = self.reel_viewers(reel_id, since)
+            viewers.discard(user_id)
+            self.viewers_scanned += len(viewers)
+            counts.update(viewers)
+        return counts
+
+    def users_with_overlap(self, user_id: str, since: datetime, min_common: int) -> List[str]:
+        """En az min_common ortak reel'i olan kullanıcılar, en çok ortak olan önce"""
+        return [
+            other for other, common in self.overlap_counts(user_id, since).most_common()
+            if common >= min_common
+        ]
+
+    def _days_since(self, boundary: date) -> Iterable[date]:
+        """boundary'den son izleme gününe (en az bugün) kadarki günler"""
+        last = max(date.today(), self._last_day or boundary)
+        for offset in range((last - boundary).days + 1):
+            yield boundary + timedelta(days=offset)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "day_buckets": len(self._by_day),
+            "indexed_users": len(self._user_days),
+            "indexed_pairs": sum(
+                len(viewers) for bucket in self._by_day.values() for viewers in bucket.values()
+            ),
+            "overlap_queries": self.overlap_queries,
+            "viewers_scanned": self.viewers_scanned
+        }
@@ -109,6 +109,7 @@ class NewsData(BaseModel):
 
 class ReelView(BaseModel):
     """Tek bir reel izleme kaydı"""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), description="View ID (WAL / snapshot ile saklanır)")
     reel_id: str = Field(..., description="İzlenen reel ID'si")
     user_id: str = Field(..., description="İzleyen kullanıcı ID'si")
     
@@ -2,15 +2,18 @@
 User Viewed News - Persistent Storage
 Kullanıcıların izlediği haberleri JSON dosyada saklar
 Oyun eşleştirmesi için son 6 günlük ortak haberleri bulur
+(reel → izleyenler ters index'i: models/reel_viewer_index)
 """
 
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Set
+from typing import Any, List, Dict, Optional, Set
 from pathlib import Path
 import json
 from collections import defaultdict
 from pydantic import BaseModel, Field
 
+from .reel_viewer_index import ReelViewerIndex
+
 # ============ MODELS ============
 
 class UserViewedNews(BaseModel):
@@ -110,7 +113,13 @@ class UserViewedNewsStorage:
     Oyun eşleştirmesi için ortak haber bulma fonksiyonları
     """
     
-    def __init__(self, storage_path: str = "data/user_viewed_news.json"):
+    PERSIST_KEY = "user_viewed_news"
+    
+    def __init__(
+        self,
+        storage_path: str = "data/user_viewed_news.json",
+        viewer_index: Optional[ReelViewerIndex] = None
+    ):
         self.storage_path = Path(storage_path)
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
         
@@ -118,8 +127,28 @@ class UserViewedNewsStorage:
         self.user_views: Dict[str, List[UserViewedNews]] = defaultdict(list)
         self.user_stats: Dict[str, UserViewStats] = {}
         
+        # Eşleştirme için reel → izleyenler index'i
+        self.viewer_index = viewer_index or ReelViewerIndex()
+        
+        # use_write_behind() ile bağlanır (yoksa her değişiklik senkron yazılır)
+        self._persistence: Optional[Any] = None
+        
         # Load from file
         self._load_from_file()
+        self.viewer_index.rebuild(
+            (user_id, view.reel_id, view.viewed_at)
+            for user_id, views in self.user_views.items()
+            for view in views
+        )
+    
+    def use_write_behind(self, flusher):
+        """
+        Kalıcılığı write-behind flusher'a devret (_save_to_file sadece kirli işaretler)
+        
+        Servis katmanı (api lifespan) bağlar: model katmanı servislere bağımlı değil.
+        """
+        flusher.register(self.PERSIST_KEY, self._collect_snapshot)
+        self._persistence = flusher
     
     def _load_from_file(self):
         """JSON dosyadan yükle"""
@@ -150,28 +179,34 @@ class UserViewedNewsStorage:
             self.user_stats = {}
     
     def _save_to_file(self):
-        """JSON dosyaya kaydet"""
+        """JSON dosyaya kaydet (write-behind bağlıysa flusher toplu ve atomik yazar)"""
+        if self._persistence is not None:
+            self._persistence.mark_dirty(self.PERSIST_KEY)
+            return
+        
+        from ..services.write_behind import dump_json  # lazy: models → services döngüsü
+        
         try:
-            data = {
-                'views': {
-                    user_id: [view.dict() for view in views]
-                    for user_id, views in self.user_views.items()
-                },
-                'stats': {
-                    user_id: stats.dict()
-                    for user_id, stats in self.user_stats.items()
-                },
-                'last_updated': datetime.now().isoformat()
-            }
-            
-            with open(self.storage_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2, default=str)
-            
-            print(f"💾 Saved user_viewed_news.json ({len(self.user_views)} users)")
-            
+            for path, data in self._collect_snapshot():
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(dump_json(data))
         except Exception as e:
             print(f"❌ Error saving user_viewed_news.json: {e}")
     
+    def _collect_snapshot(self):
+        """Write-behind için yazılacak dosya"""
+        # Sığ kopya; model_dump + JSON flusher thread'inde
+        data = {
+            'views': {
+                user_id: list(views)
+                for user_id, views in self.user_views.items()
+            },
+            'stats': dict(self.user_stats),
+            'last_updated': datetime.now().isoformat()
+        }
+        print(f"💾 Saving user_viewed_news.json ({len(self.user_views)} users)")
+        return [(self.storage_path, data)]
+    
     # ============ CORE METHODS ============
     
     def add_view(
@@ -205,6 +240,7 @@ class UserViewedNewsStorage:
         
         # Memory'e ekle
         self.user_views[user_id].append(view)
+        self.viewer_index.add(user_id, reel_id, view.viewed_at)
         
         # Stats güncelle
         self._update_user_stats(user_id, view)
@@ -273,8 +309,7 @@ class UserViewedNewsStorage:
         days: int = 6
     ) -> Set[str]:
         """Kullanıcının son N günde izlediği reel ID'leri (set)"""
-        views = self.get_user_views(user_id, days=days)
-        return {view.reel_id for view in views}
+        return self.viewer_index.user_reels(user_id, datetime.now() - timedelta(days=days))
     
     def find_common_reels(
         self,
@@ -295,8 +330,9 @@ class UserViewedNewsStorage:
         Returns:
             Ortak reel ID listesi (en az min_count tane varsa)
         """
-        user1_reels = self.get_user_viewed_reel_ids(user1_id, days=days)
-        user2_reels = self.get_user_viewed_reel_ids(user2_id, days=days)
+        since = datetime.now() - timedelta(days=days)
+        user1_reels = self.viewer_index.user_reels(user1_id, since)
+        user2_reels = self.viewer_index.user_reels(user2_id, since)
         
         common_reels = user1_reels & user2_reels  # Set intersection
         
@@ -320,29 +356,13 @@ class UserViewedNewsStorage:
             min_common_reels: Minimum ortak reel sayısı
         
         Returns:
-            Eşleşebilir kullanıcı ID listesi
-        """
-        matchable_users = []
+            Eşleşebilir kullanıcı ID listesi (en çok ortak haberi olan önce)
         
-        current_user_reels = self.get_user_viewed_reel_ids(current_user_id, days=days)
-        
-        # Tüm kullanıcıları tara
-        for user_id in self.user_views.keys():
-            if user_id == current_user_id:
-                continue
-            
-            # Ortak reel sayısını kontrol et
-            common_reels = self.find_common_reels(
-                current_user_id,
-                user_id,
-                days=days,
-                min_count=min_common_reels
-            )
-            
-            if len(common_reels) >= min_common_reels:
-                matchable_users.append(user_id)
-        
-        return matchable_users
+        Tüm kullanıcıları taramak yerine ters index'te sadece mevcut
+        kullanıcının izlediği reels'in izleyenleri sayılır.
+        """
+        since = datetime.now() - timedelta(days=days)
+        return self.viewer_index.users_with_overlap(current_user_id, since, min_common_reels)
     
     
     def get_user_emoji_for_reel(
@@ -431,6 +451,8 @@ class UserViewedNewsStorage:
                 if user_id in self.user_stats:
                     del self.user_stats[user_id]
         
+        self.viewer_index.prune(cutoff_date)
+        
         self._save_to_file()
         print(f"🧹 Cleaned up views older than {days} days")
 
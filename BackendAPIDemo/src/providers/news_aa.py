@@ -4,29 +4,146 @@
 
 """
 AA News Provider - aa_scraper mantığı ile geliştirilmiş
+
+HTTP: paylaşılan httpx.AsyncClient (keep-alive havuzu, host başına eşzamanlı
+istek limiti). Makaleler paralel scrape edilir (semaphore + URL başına
+timeout; başarısız olan makale RSS özetiyle kalır). Parse sonuçları URL
+bazlı disk cache'inde tutulur (services/article_cache). RSS feed'leri conditional GET (ETag / If-Modified-Since) ile
+çekilir; 304 gelirse önceki parse edilmiş feed kullanılır. HTML / RSS parse
+işlemi event loop'u bloklamaması için thread'de yapılır.
 """
 
+import asyncio
 import feedparser
-import requests
+import httpx
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
 import re
 from datetime import datetime
 
+from ..config import settings
 from ..models.news import Article
+from ..services.article_cache import article_cache, content_hash
 from . import register_provider
 
-# Session
-session = requests.Session()
-session.headers.update({
+HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-})
+}
 
 # AA.com.tr domains
 AA_DOMAIN = 'https://www.aa.com.tr'
 AA_CDN = 'https://cdnuploads.aa.com.tr'
 
 
+# ============ HTTP CLIENT ============
+
+# Client event loop'a bağlı: farklı loop'ta (script'ler, asyncio.run) yeniden oluşturulur
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_host_limits: Dict[str, asyncio.Semaphore] = {}
+
+# url → (etag, last_modified, parsed feed)
+_feed_cache: Dict[str, Tuple[Optional[str], Optional[str], Any]] = {}
+
+http_stats = {
+    "requests": 0,
+    "not_modified": 0,
+    "errors": 0,
+    "bytes_downloaded": 0,
+    "scrape_timeouts": 0,
+    "scrape_failures": 0
+}
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Paylaşılan async client (lazy, loop başına)"""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop or _client.is_closed:
+        _client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=settings.news_http_timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=settings.news_http_max_connections,
+                max_keepalive_connections=settings.news_http_max_connections
+            )
+        )
+        _client_loop = loop
+        _host_limits.clear()
+    return _client
+
+
+async def close_http_client():
+    """Shutdown'da bağlantı havuzunu kapat"""
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+    _host_limits.clear()
+
+
+async def fetch(url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    """Host başına eşzamanlı istek limiti ile GET"""
+    client = _get_client()
+    host = urlsplit(url).netloc
+    limit = _host_limits.get(host)
+    if limit is None:
+        limit = _host_limits[host] = asyncio.Semaphore(settings.news_http_max_per_host)
+
+    async with limit:
+        http_stats["requests"] += 1
+        try:
+            response = await client.get(url, headers=headers)
+        except httpx.HTTPError:
+            http_stats["errors"] += 1
+            raise
+
+    http_stats["bytes_downloaded"] += len(response.content)
+    return response
+
+
+async def fetch_feed(url: str):
+    """
+    RSS feed'i conditional GET ile çek
+
+    Feed değişmediyse (304) sunucu body göndermez; önceki parse sonucu döner.
+    """
+    cached = _feed_cache.get(url)
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+    response = await fetch(url, headers=headers)
+    if response.status_code == 304 and cached:
+        http_stats["not_modified"] += 1
+        return cached[2]
+
+    response.raise_for_status()
+    feed = await asyncio.to_thread(feedparser.parse, response.content)
+    _feed_cache[url] = (
+        response.headers.get('ETag'),
+        response.headers.get('Last-Modified'),
+        feed
+    )
+    return feed
+
+
+def get_http_stats() -> Dict[str, Any]:
+    """HTTP client metrikleri"""
+    return {
+        **http_stats,
+        "cached_feeds": len(_feed_cache),
+        "client_open": _client is not None and not _client.is_closed
+    }
+
+
 def normalize_url(src: str) -> str:
     """URL normalize et"""
     if not src:
@@ -77,11 +194,17 @@ async def get_latest_news(count: int = 10, category: str = "guncel", **kwargs) -
     """AA'dan son haberleri çek"""
     try:
         rss_url = f"https://www.aa.com.tr/tr/rss/default?cat={category}"
-        response = session.get(rss_url, timeout=30)
-        feed = feedparser.parse(response.content)
+        feed = await fetch_feed(rss_url)
+        
+        entries = feed.entries[:count]
+        
+        # Scraping istenmişse tüm makaleler paralel çekilir
+        scraped_results = [{}] * len(entries)
+        if kwargs.get('enable_scraping', False):
+            scraped_results = await scrape_articles([entry.link for entry in entries])
         
         articles = []
-        for entry in feed.entries[:count]:
+        for entry, scraped in zip(entries, scraped_results):
             article = Article(
                 id=f"aa_{hash(entry.link)}",
                 title=entry.title,
@@ -93,18 +216,15 @@ async def get_latest_news(count: int = 10, category: str = "guncel", **kwargs) -
                 published_at=datetime.now()
             )
             
-            # Scraping istenmişse
-            if kwargs.get('enable_scraping', False):
-                scraped = await scrape_article(entry.link)
-                if scraped:
-                    # ✅ content artık List[str] olarak dönüyor
-                    article.content = scraped.get('paragraphs', scraped.get('content', article.content))
-                    article.author = scraped.get('author')
-                    article.images = scraped.get('images', [])
-                    article.tags = scraped.get('tags', [])
-                    article.keywords = scraped.get('keywords', [])
-                    article.hashtags = scraped.get('hashtags', [])
-                    article.meta_description = scraped.get('meta_description')
+            if scraped:
+                # ✅ content artık List[str] olarak dönüyor
+                article.content = scraped.get('paragraphs', scraped.get('content', article.content))
+                article.author = scraped.get('author')
+                article.images = scraped.get('images', [])
+                article.tags = scraped.get('tags', [])
+                article.keywords = scraped.get('keywords', [])
+                article.hashtags = scraped.get('hashtags', [])
+                article.meta_description = scraped.get('meta_description')
             
             articles.append(article)
         
@@ -120,81 +240,136 @@ async def scrape_article(url: str) -> Dict:
     """
     ✅ aa_scraper mantığı ile geliştirilmiş web scraping
     """
+    use_cache = settings.news_parse_cache_enabled
     try:
-        response = session.get(url, timeout=20)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        scraped_data = {}
-        
-        # Başlık
-        title_elem = soup.find('h1', class_='detay-baslik') or soup.find('h1')
-        scraped_data['title'] = title_elem.get_text(strip=True) if title_elem else None
-        
-        # Özet/Spot
-        summary_elem = soup.find('div', class_='detay-spot') or soup.find('p', class_='lead')
-        scraped_data['summary'] = summary_elem.get_text(strip=True) if summary_elem else None
-        
-        # ✅ İçerik - Paragraflar (aa_scraper mantığı)
-        content_div = soup.find('div', class_='detay-icerik') or soup.find('article')
-        if content_div:
-            paragraphs = []
-            for p in content_div.find_all('p'):
-                text = p.get_text(strip=True)
-                if len(text) > 20:  # Minimum uzunluk kontrolü
-                    paragraphs.append(text)
-            
-            scraped_data['paragraphs'] = paragraphs  # ✅ List[str]
-            scraped_data['content'] = ' '.join(paragraphs)  # Fallback str
-        else:
-            scraped_data['paragraphs'] = []
-            scraped_data['content'] = ""
+        # SQLite cache okuması disk I/O → thread (paralel scrape'ler loop'u bloklamasın)
+        if use_cache:
+            cached = await asyncio.to_thread(article_cache.get, url)
+            if cached is not None:
+                return cached
         
-        # ✅ Tags (aa_scraper mantığı)
-        tags = []
-        tag_container = soup.find('div', class_='detay-etiketler') or soup.find('div', class_='tags')
-        if tag_container:
-            tag_links = tag_container.find_all('a')
-            tags = [tag.get_text(strip=True) for tag in tag_links]
-        scraped_data['tags'] = tags
+        response = await fetch(url)
+        response.raise_for_status()
         
-        # ✅ Hashtags (aa_scraper mantığı)
-        hashtags = []
-        if scraped_data.get('content'):
-            hashtags = re.findall(r'#\w+', scraped_data['content'])
-        scraped_data['hashtags'] = list(set(hashtags))
+        if not use_cache:
+            return await asyncio.to_thread(parse_article_html, response.content, url)
         
-        # ✅ Meta description (aa_scraper mantığı)
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        scraped_data['meta_description'] = meta_desc.get('content') if meta_desc else None
-        
-        # ✅ Meta keywords (aa_scraper mantığı)
-        meta_keywords = soup.find('meta', attrs={'name': 'keywords'})
-        if meta_keywords:
-            keywords = meta_keywords.get('content', '').split(',')
-            scraped_data['keywords'] = [k.strip() for k in keywords if k.strip()]
-        else:
-            scraped_data['keywords'] = []
-        
-        # Yazar
-        author_elem = soup.find('div', class_='detay-yazar') or soup.find('span', class_='author') or soup.select_one('span[style*="float:left"]')
-        scraped_data['author'] = author_elem.get_text(strip=True) if author_elem else None
-        
-        # Location
-        location_elem = soup.find('span', class_='location') or soup.find('div', class_='detay-konum')
-        scraped_data['location'] = location_elem.get_text(strip=True) if location_elem else None
-        
-        # Görseller (geliştirilmiş filtreleme)
-        scraped_data['images'] = filter_aa_images(soup, url)
-        
-        return scraped_data
+        # Hash + revalidate + parse + cache yazımı tek thread adımında
+        return await asyncio.to_thread(parse_article_cached, response.content, url)
         
     except Exception as e:
         print(f"❌ Scraping error: {e}")
         return {}
 
 
+async def scrape_articles(urls: List[str]) -> List[Dict]:
+    """
+    Makaleleri paralel scrape et (sonuçlar urls sırasıyla)
+    
+    Eşzamanlılık news_scrape_concurrency ile, aynı host'a istekler
+    news_http_max_per_host ile sınırlı. Timeout / hata alan URL için {} döner,
+    diğerleri etkilenmez.
+    """
+    semaphore = asyncio.Semaphore(settings.news_scrape_concurrency)
+    
+    async def scrape_one(url: str) -> Dict:
+        async with semaphore:
+            try:
+                result = await asyncio.wait_for(scrape_article(url), settings.news_scrape_timeout)
+            except asyncio.TimeoutError:
+                http_stats["scrape_timeouts"] += 1
+                print(f"⏱️ Scrape timeout ({settings.news_scrape_timeout}s): {url}")
+                return {}
+        if not result:
+            http_stats["scrape_failures"] += 1
+        return result
+    
+    return await asyncio.gather(*(scrape_one(url) for url in urls))
+
+
+def parse_article_cached(html: bytes, url: str) -> Dict:
+    """TTL dolmuş ama sayfa değişmemişse parse atlanır (thread'de çalışır)"""
+    digest = content_hash(html)
+    scraped_data = article_cache.revalidate(url, digest)
+    if scraped_data is None:
+        scraped_data = parse_article_html(html, url)
+        article_cache.put(url, digest, scraped_data)
+    return scraped_data
+
+
+def parse_article_html(html: bytes, url: str) -> Dict:
+    """Haber sayfası HTML'inden içerik / meta bilgilerini çıkar"""
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    scraped_data = {}
+    
+    # Başlık
+    title_elem = soup.find('h1', class_='detay-baslik') or soup.find('h1')
+    scraped_data['title'] = title_elem.get_text(strip=True) if title_elem else None
+    
+    # Özet/Spot
+    summary_elem = soup.find('div', class_='detay-spot') or soup.find('p', class_='lead')
+    scraped_data['summary'] = summary_elem.get_text(strip=True) if summary_elem else None
+    
+    # ✅ İçerik - Paragraflar (aa_scraper mantığı)
+    content_div = soup.find('div', class_='detay-icerik') or soup.find('article')
+    if content_div:
+        paragraphs = []
+        for p in content_div.find_all('p'):
+            text = p.get_text(strip=True)
+            if len(text) > 20:  # Minimum uzunluk kontrolü
+                paragraphs.append(text)
+        
+        scraped_data['paragraphs'] = paragraphs  # ✅ List[str]
+        scraped_data['content'] = ' '.join(paragraphs)  # Fallback str
+    else:
+        scraped_data['paragraphs'] = []
+        scraped_data['content'] = ""
+    
+    # ✅ Tags (aa_scraper mantığı)
+    tags = []
+    tag_container = soup.find('div', class_='detay-etiketler') or soup.find('div', class_='tags')
+    if tag_container:
+        tag_links = tag_container.find_all('a')
+        tags = [tag.get_text(strip=True) for tag in tag_links]
+    scraped_data['tags'] = tags
+    
+    # ✅ Hashtags (aa_scraper mantığı)
+    hashtags = []
+    if scraped_data.get('content'):
+        hashtags = re.findall(r'#\w+', scraped_data['content'])
+    scraped_data['hashtags'] = list(set(hashtags))
+    
+    # ✅ Meta description (aa_scraper mantığı)
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    scraped_data['meta_description'] = meta_desc.get('content') if meta_desc else None
+    
+    # ✅ Meta keywords (aa_scraper mantığı)
+    meta_keywords = soup.find('meta', attrs={'name': 'keywords'})
+    if meta_keywords:
+        keywords = meta_keywords.get('content', '').split(',')
+        scraped_data['keywords'] = [k.strip() for k in keywords if k.strip()]
+    else:
+        scraped_data['keywords'] = []
+    
+    # Yazar
+    author_elem = soup.find('div', class_='detay-yazar') or soup.find('span', class_='author') or soup.select_one('span[style*="float:left"]')
+    scraped_data['author'] = author_elem.get_text(strip=True) if author_elem else None
+    
+    # Location
+    location_elem = soup.find('span', class_='location') or soup.find('div', class_='detay-konum')
+    scraped_data['location'] = location_elem.get_text(strip=True) if location_elem else None
+    
+    # Görseller (geliştirilmiş filtreleme)
+    scraped_data['images'] = filter_aa_images(soup, url)
+    
+    return scraped_data
+
+
 # Provider kaydet
 register_provider("news_aa", {
     "get_latest_news": get_latest_news,
-    "scrape_article": scrape_article
+    "scrape_article": scrape_article,
+    "get_http_stats": get_http_stats,
+    "close": close_http_client
 })
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+🧭 ANN Recall Benchmark
+IVF aday index'i ile exact cosine ranking'i karşılaştırır (recall@k + süre)
+
+Kullanım (BackendAPIDemo/ içinden):
+    python -m src.scripts.benchmark_ann_recall --reels 20000 --users 50
+    python -m src.scripts.benchmark_ann_recall --mode hashing
+
+Sentetik korpus kullanır, gerçek outputs/ verisine dokunmaz (geçici dizin).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Path ayarları
+SCRIPT_DIR = Path(__file__).parent  # src/scripts/
+BACKEND_DIR = SCRIPT_DIR.parent.parent  # BackendAPIDemo/
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="IVF ANN vs exact ranking recall benchmark")
+    parser.add_argument("--reels", type=int, default=20000, help="Katalog büyüklüğü")
+    parser.add_argument("--users", type=int, default=50, help="Sorgu sayısı (kullanıcı)")
+    parser.add_argument("--topics", type=int, default=40, help="Sentetik konu sayısı")
+    parser.add_argument("--candidates", type=int, default=300, help="ANN ile skorlanacak min aday")
+    parser.add_argument("--mode", choices=["tfidf", "hashing"], default="tfidf")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def build_corpus(n_reels: int, n_topics: int, rng: random.Random):
+    """Her konu kendi kelime havuzundan + ortak kelimelerden metin üretir"""
+    common = [f"ortak{i}" for i in range(300)]
+    topic_words = [[f"konu{t}kelime{i}" for i in range(60)] for t in range(n_topics)]
+
+    corpus = []
+    for i in range(n_reels):
+        topic = rng.randrange(n_topics)
+        words = rng.choices(topic_words[topic], k=12) + rng.choices(common, k=8)
+        # Bazı haberler iki konuyu karıştırır
+        if rng.random() < 0.2:
+            words += rng.choices(topic_words[rng.randrange(n_topics)], k=5)
+        rng.shuffle(words)
+        corpus.append((f"reel_{i:06d}", topic, " ".join(words)))
+    return corpus
+
+
+async def run(args):
+    # Ayarlar import'tan önce (settings env'den okunur)
+    storage = tempfile.mkdtemp(prefix="ann_bench_")
+    os.environ["STORAGE_BASE_PATH"] = storage
+    os.environ["NLP_ENGINE_MODE"] = args.mode
+    os.environ["NLP_REFIT_IN_PROCESS"] = "false"
+    os.environ["NLP_ANN_CANDIDATES"] = str(args.candidates)
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+    from src.services.incremental_nlp import IncrementalNLPEngine
+
+    rng = random.Random(args.seed)
+    corpus = build_corpus(args.reels, args.topics, rng)
+
+    print("=" * 60)
+    print(f"🧭 ANN RECALL BENCHMARK ({args.mode})")
+    print("=" * 60)
+    print(f"   Reels: {args.reels}, users: {args.users}, candidates: {args.candidates}")
+
+    engine = IncrementalNLPEngine()
+    started = time.perf_counter()
+    for reel_id, _, text in corpus:
+        await engine.add_news_to_corpus(reel_id, text)
+    await engine.wait_for_refit()
+    if engine._ann_task is not None:
+        await engine._ann_task
+    print(f"\n📥 Corpus indexed in {time.perf_counter() - started:.1f}s")
+    print(f"   ANN: {engine.ann_index.get_stats()}")
+
+    by_topic = {}
+    for reel_id, topic, text in corpus:
+        by_topic.setdefault(topic, []).append((reel_id, text))
+    candidates = [
+        {"reel_id": reel_id, "text": text, "reel_obj": reel_id}
+        for reel_id, _, text in corpus
+    ]
+
+    ks = (10, 50)
+    recall = {k: [] for k in ks}
+    exact_time = ann_time = 0.0
+
+    for _ in range(args.users):
+        # Kullanıcı 1-2 konuyla ilgilenir
+        history = []
+        for topic in rng.sample(range(args.topics), rng.choice([1, 2])):
+            for reel_id, text in rng.sample(by_topic[topic], 10):
+                history.append({"reel_id": reel_id, "text": text, "engagement": rng.uniform(0.5, 1.2)})
+        profile = await engine.build_user_profile(history)
+
+        t0 = time.perf_counter()
+        exact = await engine.rank_reels(profile, candidates, top_k=max(ks), exact=True)
+        t1 = time.perf_counter()
+        approx = await engine.rank_reels(profile, candidates, top_k=max(ks))
+        t2 = time.perf_counter()
+        exact_time += t1 - t0
+        ann_time += t2 - t1
+
+        for k in ks:
+            truth = {r for r, _ in exact[:k]}
+            found = {r for r, _ in approx[:k]}
+            recall[k].append(len(truth & found) / k)
+
+    stats = engine.get_stats()["ann"]
+    print("\n📊 Results")
+    for k in ks:
+        print(f"   recall@{k}: {sum(recall[k]) / len(recall[k]):.3f}")
+    print(f"   exact:  {exact_time / args.users * 1000:.1f} ms/query")
+    print(f"   ann:    {ann_time / args.users * 1000:.1f} ms/query")
+    print(f"   scored: {stats['candidates_scored']} / {stats['candidates_total']} candidates (incl. exact runs)")
+    print(f"\n🗑️ Temp storage: {storage}")
+
+
+def main():
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
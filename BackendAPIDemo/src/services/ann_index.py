@@ -0,0 +1,168 @@
+# ================================
+# src/services/ann_index.py - IVF Candidate Index
+# ================================
+
+"""
+Approximate nearest-neighbour aday seçimi (IVF - inverted file)
+
+Reel vektörleri spherical k-means ile nlist kümeye ayrılır. Sorguda kullanıcı
+profili önce centroid'lerle karşılaştırılır, en yakın kümelerden yeterli aday
+(örn. 300) toplanana kadar küme açılır. Sadece bu adaylar exact skorlanır.
+
+- Centroid'ler sparse tutulur (hashing modunda 2^18 boyut için de hafif)
+- Yeni reel: en yakın centroid'e atanır - O(nnz · nlist)
+- Index refit/rebuild sonrası ve korpus 2 katına çıkınca yeniden eğitilir
+"""
+
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+try:
+    from scipy import sparse
+    from sklearn.preprocessing import normalize
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+
+def choose_nlist(n_rows: int) -> int:
+    """Küme sayısı ≈ √n (8-256 arası)"""
+    return int(min(256, max(8, np.sqrt(n_rows))))
+
+
+def train_centroids(
+    matrix,
+    nlist: int,
+    iterations: int = 6,
+    sample_size: int = 20000,
+    seed: int = 42
+):
+    """
+    Spherical k-means (cosine) ile centroid'leri eğit
+
+    Args:
+        matrix: L2-normalize sparse satırlar (n x dim)
+        nlist: Küme sayısı
+
+    Returns:
+        L2-normalize sparse centroid matrix (nlist x dim)
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = matrix.shape[0]
+    nlist = min(nlist, n_rows)
+
+    if n_rows > sample_size:
+        sample = matrix[np.sort(rng.choice(n_rows, sample_size, replace=False))]
+    else:
+        sample = matrix
+    n_sample = sample.shape[0]
+
+    centroids = sample[rng.choice(n_sample, nlist, replace=False)]
+
+    for _ in range(iterations):
+        labels = assign_labels(sample, centroids)
+
+        # Her kümenin üyelerinin toplamı → normalize = yeni centroid
+        membership = sparse.csr_matrix(
+            (np.ones(n_sample, dtype=np.float32), (labels, np.arange(n_sample))),
+            shape=(nlist, n_sample)
+        )
+        centroids = normalize(membership @ sample, norm='l2')
+
+        # Boş kalan kümeler rastgele bir satırla yeniden başlatılır
+        empty = np.flatnonzero(np.bincount(labels, minlength=nlist) == 0)
+        if len(empty):
+            centroids = centroids.tolil()
+            for cluster, row in zip(empty, rng.choice(n_sample, len(empty), replace=False)):
+                centroids[cluster] = sample[row]
+            centroids = centroids.tocsr()
+
+    return centroids.astype(np.float32).tocsr()
+
+
+def assign_labels(matrix, centroids) -> np.ndarray:
+    """Her satırı en yakın (cosine) centroid'e ata"""
+    if matrix.shape[0] == 0:
+        return np.zeros(0, dtype=np.int32)
+    similarities = (matrix @ centroids.T).toarray()
+    return similarities.argmax(axis=1).astype(np.int32)
+
+
+class IVFIndex:
+    """
+    Store satır index'i → küme ataması
+
+    Usage:
+        index.install(centroids, assign_labels(matrix, centroids))
+        mask = index.select(rows, user_profile, min_candidates=300)
+    """
+
+    def __init__(self):
+        self.centroids = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.trained_rows = 0
+
+    @property
+    def is_ready(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def nlist(self) -> int:
+        return self.centroids.shape[0] if self.centroids is not None else 0
+
+    def install(self, centroids, labels: np.ndarray):
+        """Eğitilmiş index'i devreye al (satır 0..len(labels)-1)"""
+        self.centroids = centroids
+        self.assignments = labels.astype(np.int32)
+        self.trained_rows = len(labels)
+
+    def append(self, rows_matrix):
+        """Store'a eklenen yeni satırları ata"""
+        if not self.is_ready:
+            return
+        labels = assign_labels(rows_matrix, self.centroids)
+        self.assignments = np.concatenate([self.assignments, labels])
+
+    def reset(self):
+        self.centroids = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.trained_rows = 0
+
+    def covers(self, rows: np.ndarray) -> bool:
+        """Tüm satırların ataması var mı"""
+        return self.is_ready and (len(rows) == 0 or int(rows.max()) < len(self.assignments))
+
+    def select(self, rows: np.ndarray, user_vector, min_candidates: int) -> Tuple[np.ndarray, int]:
+        """
+        Profile en yakın kümelerdeki adayları seç
+
+        Args:
+            rows: Aday satır index'leri
+            user_vector: Dense (dim,) veya sparse (dim x 1) profil
+            min_candidates: En az bu kadar aday toplanana kadar küme aç
+
+        Returns:
+            (boolean mask - rows ile aynı uzunlukta, açılan küme sayısı)
+        """
+        labels = self.assignments[rows]
+
+        centroid_scores = self.centroids @ user_vector
+        if sparse.issparse(centroid_scores):
+            centroid_scores = centroid_scores.toarray()
+        centroid_scores = np.asarray(centroid_scores).ravel()
+
+        order = np.argsort(-centroid_scores, kind='stable')
+        counts = np.bincount(labels, minlength=self.nlist)[order]
+        nprobe = int(np.searchsorted(np.cumsum(counts), min_candidates)) + 1
+        nprobe = min(nprobe, self.nlist)
+
+        return np.isin(labels, order[:nprobe]), nprobe
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.is_ready,
+            "nlist": self.nlist,
+            "trained_rows": self.trained_rows,
+            "assigned_rows": len(self.assignments)
+        }
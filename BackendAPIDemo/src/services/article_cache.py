@@ -0,0 +1,200 @@
+# ================================
+# src/services/article_cache.py - Parsed Article Cache (SQLite)
+# ================================
+
+"""
+Scrape edilmiş makalelerin parse sonuçları için disk cache'i
+
+Aynı makale RSS worker, processing ve /news/article üzerinden tekrar tekrar
+scrape ediliyordu. Her seferinde HTML indirilip BeautifulSoup ile parse
+ediliyordu.
+
+- Anahtar: normalize edilmiş URL (fragment ve utm_* parametreleri atılır)
+- TTL içindeyse ağa hiç çıkılmaz
+- TTL dolmuşsa sayfa indirilir; HTML hash'i aynıysa parse atlanır
+- LRU: kapasite aşılınca en uzun süredir erişilmeyenler silinir
+
+Metodlar senkron ve thread-safe (tek bağlantı + lock): async koddan
+asyncio.to_thread ile çağrılır.
+"""
+
+from typing import Any, Dict, Optional
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from ..config import settings
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url          TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    data         TEXT NOT NULL,
+    fetched_at   REAL NOT NULL,
+    accessed_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_accessed_at ON articles(accessed_at);
+"""
+
+
+def normalize_url(url: str) -> str:
+    """Cache anahtarı: küçük harf host, fragment / tracking parametreleri yok"""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_")
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower() or "https", parts.netloc.lower(), path, query, ""))
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha1(content).hexdigest()
+
+
+class ArticleParseCache:
+    """
+    URL → parse edilmiş makale payload'ı (paragraphs, images, tags, keywords...)
+
+    Usage:
+        data = article_cache.get(url)                   # TTL içindeyse
+        data = article_cache.revalidate(url, digest)    # HTML değişmediyse
+        article_cache.put(url, digest, data)
+    """
+
+    def __init__(self, db_path: Path, ttl_seconds: int, max_entries: int):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self._lock = threading.Lock()
+
+        self.entries = self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stores = 0
+        self.evictions = 0
+
+    # ============ READ ============
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """TTL içindeki parse sonucu (yoksa / eskiyse None)"""
+        key = normalize_url(url)
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT data, fetched_at FROM articles WHERE url = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._touch(key, now)
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def revalidate(self, url: str, digest: str) -> Optional[Dict[str, Any]]:
+        """
+        TTL'i dolmuş kayıt: indirilen HTML aynıysa parse sonucunu yeniden kullan
+
+        Eşleşirse TTL yenilenir.
+        """
+        key = normalize_url(url)
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT data FROM articles WHERE url = ? AND content_hash = ?", (key, digest)
+            ).fetchone()
+            if row is None:
+                return None
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE articles SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                    (now, now, key)
+                )
+            self.revalidated += 1
+
+        return json.loads(row[0])
+
+    # ============ WRITE ============
+
+    def put(self, url: str, digest: str, data: Dict[str, Any]):
+        key = normalize_url(url)
+        now = time.time()
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+        with self._lock:
+            with self.conn:
+                inserted = self.conn.execute(
+                    "SELECT 1 FROM articles WHERE url = ?", (key,)
+                ).fetchone() is None
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO articles (url, content_hash, data, fetched_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, digest, payload, now, now)
+                )
+            self.entries += inserted
+            self.stores += 1
+
+            # %10 tampon: her put'ta değil, kapasite belirgin aşılınca toplu sil
+            if self.entries > self.max_entries * 1.1:
+                self._evict(self.entries - self.max_entries)
+
+    def clear(self):
+        with self._lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM articles")
+            self.entries = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "revalidated": self.revalidated,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "db_path": str(self.db_path)
+        }
+
+    # ============ HELPERS ============
+
+    def _touch(self, key: str, now: float):
+        with self.conn:
+            self.conn.execute("UPDATE articles SET accessed_at = ? WHERE url = ?", (now, key))
+
+    def _evict(self, count: int):
+        """En uzun süredir erişilmeyen count kaydı sil (lock altında çağrılır)"""
+        with self.conn:
+            deleted = self.conn.execute(
+                "DELETE FROM articles WHERE url IN "
+                "(SELECT url FROM articles ORDER BY accessed_at ASC LIMIT ?)",
+                (count,)
+            ).rowcount
+        self.entries -= deleted
+        self.evictions += deleted
+
+
+# Global instance
+article_cache = ArticleParseCache(
+    Path(settings.storage_base_path) / "article_cache.db",
+    ttl_seconds=settings.news_parse_cache_ttl,
+    max_entries=settings.news_parse_cache_max_entries
+)
@@ -25,6 +25,7 @@ from ..models.user import (
     user_to_response, user_to_friend_info
 )
 from ..config import settings
+from .write_behind import write_behind
 
 # ============ PASSWORD HASHING ============
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -56,17 +57,24 @@ class UserStorage:
     def __init__(self, storage_path: str = "storage/users/users.json"):
         self.storage_path = Path(storage_path)
         self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+        self._users: Optional[List[Dict[str, Any]]] = None  # Memory cache (write-behind)
+        write_behind.register("users", self._collect_snapshot)
         if not self.storage_path.exists(): self._save_users([])
     
     def _load_users(self) -> List[Dict[str, Any]]:
+        if self._users is not None: return self._users
         try:
-            with open(self.storage_path, 'r', encoding='utf-8') as f: return json.load(f)
-        except Exception as e: return []
+            with open(self.storage_path, 'r', encoding='utf-8') as f: self._users = json.load(f)
+        except Exception as e: self._users = []
+        return self._users
     
     def _save_users(self, users: List[Dict[str, Any]]):
-        try:
-            with open(self.storage_path, 'w', encoding='utf-8') as f: json.dump(users, f, indent=2, default=str, ensure_ascii=False)
-        except Exception as e: print(f"❌ Error saving users: {e}")
+        """Memory'yi güncelle, dosyaya write-behind flusher yazar"""
+        self._users = users
+        write_behind.mark_dirty("users")
+    
+    def _collect_snapshot(self):
+        return [(self.storage_path, list(self._users or []))]
 
     def create_user(self, user: User) -> User:
         users = self._load_users()
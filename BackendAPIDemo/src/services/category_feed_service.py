@@ -5,7 +5,8 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 
 from ..models.reels_tracking import ReelFeedItem
-from .reels_analytics import reels_analytics_service
+from .reels_analytics import reels_analytics
+from .reel_catalog_index import category_key
 
 
 class CategoryFeedService:
@@ -54,8 +55,8 @@ class CategoryFeedService:
                 'available_categories': list(self.CATEGORIES.keys())
             }
         
-        # O kategorideki tüm reels'leri al
-        all_reels = await reels_analytics_service.get_reels_by_category(category)
+        # O kategorideki tüm reels'leri al (kategori index'i, yeniden eskiye)
+        all_reels = await reels_analytics.get_reels_by_category(category)
         
         if not all_reels:
             print(f"⚠️ No reels found for category: {category}")
@@ -70,8 +71,10 @@ class CategoryFeedService:
         # Son 7 gün içindeki haberleri önceliklendir
         recent_cutoff = datetime.now() - timedelta(days=7)
         
-        fresh_reels = [r for r in all_reels if r.published_at > recent_cutoff]
-        older_reels = [r for r in all_reels if r.published_at <= recent_cutoff]
+        # Liste yeniden eskiye sıralı: taze/eski sınırı index'ten (bisect)
+        fresh_count = reels_analytics.get_category_count_since(category, recent_cutoff)
+        fresh_reels = all_reels[:fresh_count]
+        older_reels = all_reels[fresh_count:]
         
         # Karıştır ve birleştir (taze olanlar önce)
         import random
@@ -117,7 +120,7 @@ class CategoryFeedService:
                 'summary': reel.news_data.summary,
                 'category': reel.news_data.category,
                 'url': reel.news_data.url,
-                'published_at': reel.news_data.published_at.isoformat(),
+                'published_at': reel.news_data.published_date,
                 'images': reel.news_data.images or [],
                 'tags': reel.news_data.tags or []
             },
@@ -133,17 +136,19 @@ class CategoryFeedService:
         
         categories_with_stats = []
         
+        # Kategori sayaçları index'ten - O(kategori), reels taranmaz
+        counts = reels_analytics.get_category_counts()
+        
         for cat_id, cat_info in self.CATEGORIES.items():
-            # Her kategorideki reel sayısını hesapla
-            reels = await reels_analytics_service.get_reels_by_category(cat_id)
+            total_reels = counts.get(category_key(cat_id), 0)
             
             categories_with_stats.append({
                 'id': cat_id,
                 'name': cat_info['name'],
                 'icon': cat_info['icon'],
                 'color': cat_info['color'],
-                'total_reels': len(reels),
-                'has_content': len(reels) > 0
+                'total_reels': total_reels,
+                'has_content': total_reels > 0
             })
         
         # Reel sayısına göre sırala (çoktan aza)
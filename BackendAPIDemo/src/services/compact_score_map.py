@@ -0,0 +1,184 @@
+# ================================
+# src/services/compact_score_map.py - Interned IDs + Bounded Score Maps
+# ================================
+
+"""
+Kullanıcı tercihleri için kompakt veri yapıları
+
+Vocabulary: string (keyword / kategori / yazar) → int32 ID, process genelinde
+tek kopya. Kullanıcılar string yerine ID tutar; aynı keyword binlerce
+kullanıcıda tekrar saklanmaz.
+
+CompactScoreMap: sıralı int32 ID + float32 skor + uint32 son-kullanım
+array'leri. Kapasite dolunca "skor × decay^(yaş)" en düşük olan düşürülür
+(top-N + LRU decay). Kullanıcı başı bellek: kapasite × 12 byte.
+
+Vocabulary sadece büyür; tavanı aşınca compact() ile yalnızca hâlâ
+referans verilen ID'ler tutulur ve map'ler remap() ile yeni ID'lere taşınır.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class Vocabulary:
+    """String ↔ ID interning (ID'ler 0'dan ardışık)"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.terms: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def intern(self, term: str) -> int:
+        """ID al, yoksa ekle"""
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = self.ids[term] = len(self.terms)
+            self.terms.append(term)
+        return term_id
+
+    def get(self, term: str) -> Optional[int]:
+        """ID al, yoksa None (vocabulary büyümez)"""
+        return self.ids.get(term)
+
+    def term(self, term_id: int) -> str:
+        return self.terms[term_id]
+
+    def compact(self, keep_ids: np.ndarray) -> np.ndarray:
+        """
+        Sadece keep_ids kalsın (yeni ID'ler 0'dan ardışık)
+
+        Returns:
+            Eski ID → yeni ID eşlemesi (atılanlar -1)
+        """
+        keep = np.unique(np.asarray(keep_ids, dtype=np.int64))
+        mapping = np.full(len(self.terms), -1, dtype=CompactScoreMap.ID_DTYPE)
+        mapping[keep] = np.arange(len(keep), dtype=CompactScoreMap.ID_DTYPE)
+        self.terms = [self.terms[i] for i in keep.tolist()]
+        self.ids = {term: i for i, term in enumerate(self.terms)}
+        return mapping
+
+
+class CompactScoreMap:
+    """
+    ID → float32 skor, sınırlı kapasiteli
+
+    Usage:
+        scores = CompactScoreMap(default=0.3, capacity=256)
+        scores.update_ema(term_id, weight=0.8, alpha=0.3, clock=pref.clock)
+        scores.get(term_id)
+    """
+
+    ID_DTYPE = np.int32
+    SCORE_DTYPE = np.float32
+    CLOCK_DTYPE = np.uint32
+
+    def __init__(self, default: float, capacity: int, lru_decay: float = 0.98):
+        self.default = default
+        self.capacity = capacity
+        self.lru_decay = lru_decay
+
+        self.ids = np.zeros(0, dtype=self.ID_DTYPE)           # Sıralı
+        self.scores = np.zeros(0, dtype=self.SCORE_DTYPE)
+        self.last_used = np.zeros(0, dtype=self.CLOCK_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, term_id: int) -> bool:
+        return self._find(term_id) is not None
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.scores.nbytes + self.last_used.nbytes
+
+    # ============ READ ============
+
+    def get(self, term_id: Optional[int]) -> float:
+        if term_id is None:
+            return self.default
+        position = self._find(term_id)
+        return float(self.scores[position]) if position is not None else self.default
+
+    def items(self) -> Iterator[Tuple[int, float]]:
+        return zip(self.ids.tolist(), self.scores.tolist())
+
+    def top(self, n: int) -> List[Tuple[int, float]]:
+        """En yüksek skorlu n ID"""
+        order = np.argsort(-self.scores, kind='stable')[:n]
+        return [(int(self.ids[i]), float(self.scores[i])) for i in order]
+
+    def get_many(self, term_ids: np.ndarray) -> np.ndarray:
+        """
+        Vektörel get (batch scoring): sıralı ids üzerinde searchsorted
+
+        Bulunmayan ID'ler (ve -1 = boş slot) default döner; vocabulary
+        boyutunda dense array ayrılmaz.
+        """
+        term_ids = np.asarray(term_ids)
+        result = np.full(term_ids.shape, self.default, dtype=self.SCORE_DTYPE)
+        if not len(self.ids):
+            return result
+        positions = np.searchsorted(self.ids, term_ids)
+        np.minimum(positions, len(self.ids) - 1, out=positions)
+        found = self.ids[positions] == term_ids
+        result[found] = self.scores[positions[found]]
+        return result
+
+    # ============ WRITE ============
+
+    def update_ema(self, term_id: int, weight: float, alpha: float, clock: int):
+        """new = alpha · weight + (1 - alpha) · current"""
+        position = self._find(term_id)
+        if position is None:
+            position = self._insert(term_id, clock)
+        current = float(self.scores[position])
+        self.scores[position] = alpha * weight + (1 - alpha) * current
+        self.last_used[position] = clock
+
+    def set(self, term_id: int, score: float, last_used: int = 0):
+        """Doğrudan değer yaz (load)"""
+        position = self._find(term_id)
+        if position is None:
+            position = self._insert(term_id, last_used)
+        self.scores[position] = score
+        self.last_used[position] = last_used
+
+    def remap(self, mapping: np.ndarray):
+        """Vocabulary.compact() sonrası ID'leri yeni ID'lere taşı (sıralama korunur)"""
+        new_ids = mapping[self.ids]
+        order = np.argsort(new_ids, kind='stable')
+        self.ids = new_ids[order]
+        self.scores = self.scores[order]
+        self.last_used = self.last_used[order]
+
+    # ============ HELPERS ============
+
+    def _find(self, term_id: int) -> Optional[int]:
+        position = int(np.searchsorted(self.ids, term_id))
+        if position < len(self.ids) and self.ids[position] == term_id:
+            return position
+        return None
+
+    def _insert(self, term_id: int, clock: int) -> int:
+        """Default skorla yeni slot aç (gerekirse en az değerliyi düşür)"""
+        if len(self.ids) >= self.capacity:
+            self._evict(clock)
+
+        position = int(np.searchsorted(self.ids, term_id))
+        self.ids = np.insert(self.ids, position, term_id)
+        self.scores = np.insert(self.scores, position, self.default)
+        self.last_used = np.insert(self.last_used, position, clock)
+        return position
+
+    def _evict(self, clock: int):
+        """Skor × decay^(şimdi - son kullanım) en düşük olanı at"""
+        age = np.maximum(int(clock) - self.last_used.astype(np.int64), 0)
+        retention = self.scores * np.power(self.lru_decay, age)
+        victim = int(np.argmin(retention))
+        self.ids = np.delete(self.ids, victim)
+        self.scores = np.delete(self.scores, victim)
+        self.last_used = np.delete(self.last_used, victim)
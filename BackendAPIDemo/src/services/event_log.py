@@ -0,0 +1,147 @@
+# ================================
+# src/services/event_log.py - Append-only Event Log (WAL)
+# ================================
+
+"""
+Append-only write-ahead log
+
+Her değişiklik tek satırlık bir JSON kaydı olarak dosyanın sonuna eklenir.
+Yazma maliyeti geçmişin boyutundan bağımsızdır (O(1)).
+
+Lifecycle:
+1. append(): Delta kaydı ekle (seq numarası ile)
+2. Periyodik snapshot: Servis tam state'i kaydeder, sonra truncate() çağrılır
+3. Startup: Snapshot yüklenir, replay(after_seq) ile kalan kayıtlar uygulanır
+
+Format (JSON Lines):
+    {"seq": 42, "op": "view", "ts": "...", "data": {...}}
+"""
+
+from typing import Dict, Any, Iterator, Optional
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+
+
+class AppendOnlyLog:
+    """
+    JSON Lines tabanlı append-only log
+
+    Args:
+        path: Log dosyası yolu
+        fsync: Her kayıttan sonra os.fsync çağrılsın mı (daha güvenli, daha yavaş)
+    """
+
+    def __init__(self, path: Path, fsync: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+
+        self.last_seq = 0          # Son yazılan/okunan seq
+        self.pending_records = 0   # Son truncate'ten beri eklenen kayıt sayısı
+
+        # Mevcut log'u tara (seq devamlılığı için)
+        for record in self._read_records():
+            self.last_seq = max(self.last_seq, record.get("seq", 0))
+            self.pending_records += 1
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def append(self, op: str, data: Dict[str, Any]) -> int:
+        """
+        Log'a yeni kayıt ekle
+
+        Args:
+            op: İşlem tipi (view, analytics, reel ...)
+            data: JSON serileştirilebilir payload
+
+        Returns:
+            Kaydın seq numarası
+        """
+        self.last_seq += 1
+        record = {
+            "seq": self.last_seq,
+            "op": op,
+            "ts": datetime.now().isoformat(),
+            "data": data
+        }
+
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+        self.pending_records += 1
+        return self.last_seq
+
+    def replay(self, after_seq: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Snapshot'tan sonraki kayıtları sırayla döndür
+
+        Args:
+            after_seq: Snapshot'a dahil olan son seq (bu ve öncesi atlanır)
+        """
+        for record in self._read_records():
+            if record.get("seq", 0) > after_seq:
+                yield record
+
+    def truncate(self, keep_after_seq: Optional[int] = None):
+        """
+        Snapshot alındıktan sonra log'u kırp (seq numarası korunur)
+
+        Args:
+            keep_after_seq: Bu seq'ten sonraki kayıtlar korunur
+                (snapshot yazılırken eklenen kayıtlar). None ise log tamamen silinir.
+        """
+        kept = []
+        if keep_after_seq is not None:
+            kept = list(self.replay(after_seq=keep_after_seq))
+
+        self._file.close()
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in kept:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        os.replace(tmp_path, self.path)
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self.pending_records = len(kept)
+
+    def ensure_seq_at_least(self, seq: int):
+        """Snapshot'taki seq log'dakinden büyükse seq sayacını ileri al"""
+        self.last_seq = max(self.last_seq, seq)
+
+    def close(self):
+        """Dosya handle'ını kapat"""
+        if not self._file.closed:
+            self._file.close()
+
+    def _read_records(self) -> Iterator[Dict[str, Any]]:
+        """Log dosyasını satır satır oku (yarım kalmış satırları atla)"""
+        if not self.path.exists():
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Crash sırasında yarım yazılmış son satır olabilir
+                    print(f"⚠️ Skipping corrupt log line {line_no} in {self.path.name}")
+
+
+def read_snapshot_seq(meta_file: Path) -> int:
+    """Snapshot meta dosyasından son seq'i oku"""
+    if not meta_file.exists():
+        return 0
+    try:
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            return int(json.load(f).get("wal_seq", 0))
+    except Exception as e:
+        print(f"⚠️ Could not read snapshot meta {meta_file}: {e}")
+        return 0
+
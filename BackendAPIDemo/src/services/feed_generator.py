@@ -15,16 +15,60 @@ Features:
 - Exploration/exploitation balance
 - Diversity injection
 - Real-time personalization
+- Session snapshot: feed bir kez sıralanır, sayfalar snapshot'tan dilimlenir
 """
 
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional, Set, Tuple, Any
 from datetime import datetime, timedelta
+from dataclasses import dataclass
+from collections import OrderedDict
 import random
+import base64
+import time
+import uuid
 
-from ..models.reels_tracking import ReelFeedItem, FeedResponse, FeedPagination, FeedMetadata
+from ..models.reels_tracking import ReelFeedItem, FeedResponse, FeedPagination, FeedMetadata, TrendPeriod
 from .reels_analytics import reels_analytics
 from .incremental_nlp import incremental_nlp
 from .user_preference import preference_engine
+from ..config import settings
+
+
+# Feed üretimi sırasında hesaplanan kullanıcıya özel alanlar: reel_id → {alan: değer}
+# (paylaşılan ReelFeedItem objeleri değiştirilmez, sayfa kopyalarına uygulanır)
+FeedMarks = Dict[str, Dict[str, Any]]
+
+
+@dataclass
+class FeedSnapshot:
+    """
+    Bir feed oturumunun sıralanmış reel ID listesi (cursor bu listeye offset'tir)
+
+    Reel objeleri tutulmaz: sayfa dilimlenirken reel_storage'dan çözülür ve
+    bu build'in feed flag'leri (is_trending, feed_reason, ...) kopyaya uygulanır.
+    """
+    snapshot_id: str
+    user_id: str
+    reel_ids: List[str]
+    marks: FeedMarks
+    metadata: FeedMetadata
+    expires_at: float  # time.monotonic()
+
+
+def encode_feed_cursor(snapshot_id: str, offset: int) -> str:
+    """Opaque cursor: base64url("snapshot_id:offset")"""
+    raw = f"{snapshot_id}:{offset}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_feed_cursor(cursor: str) -> Optional[Tuple[str, int]]:
+    """Cursor'ı çöz; eski format (reel_id) veya bozuk cursor için None"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        snapshot_id, offset = raw.rsplit(":", 1)
+        return snapshot_id, max(0, int(offset))
+    except Exception:
+        return None
 
 
 class FeedGenerator:
@@ -40,6 +84,11 @@ class FeedGenerator:
     """
     
     def __init__(self):
+        # Session snapshot cache: snapshot_id → FeedSnapshot (LRU + sliding TTL)
+        self._snapshots: "OrderedDict[str, FeedSnapshot]" = OrderedDict()
+        self.snapshot_ttl_seconds = settings.feed_snapshot_ttl_seconds
+        self.snapshot_max_sessions = settings.feed_snapshot_max_sessions
+        
         print("✅ Feed Generator initialized")
     
     
@@ -61,90 +110,59 @@ class FeedGenerator:
         Args:
             user_id: Kullanıcı ID
             limit: Kaç reel döndürsün
-            cursor: Pagination cursor
+            cursor: Önceki yanıtın next_cursor'ı (opaque: snapshot + offset)
         
         Returns:
             FeedResponse with reels + metadata
         """
         try:
-            # Kullanıcı profilini al
-            user_pref = preference_engine.get_or_create_preference(user_id)
-            personalization_level = user_pref.get_personalization_level()
-            
-            print(f"📱 Generating feed for {user_id} (level: {personalization_level})")
-            
-            # 🆕 ÖNCE TOPLAM REEL SAYISINI AL
-            total_available = await self._get_total_available(user_id)
-            print(f"📊 Total available reels: {total_available}")
+            # Cursor → (snapshot, offset); ilk sayfada veya süresi dolmuşsa yeni snapshot
+            snapshot = None
+            start_index = 0
+            decoded = decode_feed_cursor(cursor) if cursor else None
+            if decoded:
+                snapshot = self._get_snapshot(decoded[0], user_id)
+                if snapshot is not None:
+                    start_index = decoded[1]
+                else:
+                    print("⚠️ Feed snapshot not found or expired, regenerating from start")
             
-            # Personalization seviyesine göre feed oluştur
-            if personalization_level == "cold":
-                all_reels = await self._cold_start_feed(user_id, total_available)  # 🆕 Tüm reels'i al
-                trending_count = int(len(all_reels) * 0.7)
-                fresh_count = int(len(all_reels) * 0.3)
-                personalized_count = 0
-                exploration_count = 0
-                
-            elif personalization_level == "warm":
-                all_reels = await self._warm_feed(user_id, total_available)  # 🆕 Tüm reels'i al
-                trending_count = 0
-                fresh_count = 0
-                personalized_count = int(len(all_reels) * 0.8)
-                exploration_count = int(len(all_reels) * 0.2)
+            if snapshot is None:
+                snapshot = await self._build_snapshot(user_id)
                 
-            else:  # hot
-                all_reels = await self._hot_feed(user_id, total_available)  # 🆕 Tüm reels'i al
-                trending_count = 0
-                fresh_count = 0
-                personalized_count = int(len(all_reels) * 0.85)
-                exploration_count = int(len(all_reels) * 0.15)
-            
-            # 🆕 CURSOR-BASED PAGINATION
-            start_index = 0
-            if cursor:
-                try:
-                    # Cursor'daki reel'in indexini bul
+                # Eski format cursor (reel_id): yeni snapshot'ta bir kez ara
+                if cursor and not decoded:
                     start_index = next(
-                        i + 1 for i, reel in enumerate(all_reels) 
-                        if reel.id == cursor
+                        (i + 1 for i, reel_id in enumerate(snapshot.reel_ids) if reel_id == cursor),
+                        0
                     )
-                    print(f"🔍 Found cursor at index: {start_index}")
-                except StopIteration:
-                    print(f"⚠️ Cursor not found: {cursor}, starting from 0")
-                    start_index = 0
             
-            # Sayfa verisini al
-            page_reels = all_reels[start_index:start_index + limit]
+            total = len(snapshot.reel_ids)
             
-            # 🆕 DÜZELTİLMİŞ PAGINATION MANTĞI
-            has_next = start_index + limit < len(all_reels)
-            next_cursor = page_reels[-1].id if page_reels and has_next else None
+            # Sayfa verisini al (snapshot'tan dilim, yeniden skorlama yok)
+            page_reels = self._resolve_page(snapshot, start_index, start_index + limit)
+            
+            has_next = start_index + limit < total
+            next_cursor = (
+                encode_feed_cursor(snapshot.snapshot_id, start_index + limit)
+                if has_next else None
+            )
             
             pagination = FeedPagination(
-                current_page=1,
-                has_next=has_next,  # ✅ Doğru mantık
+                current_page=start_index // limit + 1,
+                has_next=has_next,
                 has_previous=start_index > 0,
-                next_cursor=next_cursor,  # ✅ Her zaman son reel'in ID'si
-                total_available=len(all_reels)
+                next_cursor=next_cursor,
+                total_available=total
             )
             
-            print(f"📄 Pagination: hasNext={has_next}, cursor={next_cursor}, total={len(all_reels)}")
-            
-            # Feed metadata
-            metadata = FeedMetadata(
-                trending_count=trending_count,
-                personalized_count=personalized_count,
-                fresh_count=fresh_count,
-                exploration_count=exploration_count,
-                algorithm_version="v1.0",
-                personalization_level=personalization_level
-            )
+            print(f"📄 Pagination: offset={start_index}, hasNext={has_next}, total={total}")
             
             return FeedResponse(
                 success=True,
                 reels=page_reels,  # ✅ Sadece limit kadar döndür
                 pagination=pagination,
-                feed_metadata=metadata,
+                feed_metadata=snapshot.metadata,
                 generated_at=datetime.now()
             )
             
@@ -170,7 +188,114 @@ class FeedGenerator:
     
     
     
-    async def _cold_start_feed(self, user_id: str, limit: int) -> List[ReelFeedItem]:
+    async def _build_snapshot(self, user_id: str) -> FeedSnapshot:
+        """
+        Tüm feed'i bir kez sırala ve cache'le
+        
+        Sadece reel ID'leri ve bu build'e ait flag'ler (marks) saklanır;
+        tier builder'lar paylaşılan reel objelerine yazmaz, böylece başka
+        kullanıcıların feed'leri birbirinin is_recommended / feed_reason
+        alanlarını değiştirmez.
+        """
+        # Kullanıcı profilini al
+        user_pref = await preference_engine.aget_or_create_preference(user_id)
+        personalization_level = user_pref.get_personalization_level()
+        
+        print(f"📱 Generating feed for {user_id} (level: {personalization_level})")
+        
+        # 🆕 ÖNCE TOPLAM REEL SAYISINI AL
+        total_available = await self._get_total_available(user_id)
+        print(f"📊 Total available reels: {total_available}")
+        
+        # Personalization seviyesine göre feed oluştur
+        marks: FeedMarks = {}
+        if personalization_level == "cold":
+            all_reels = await self._cold_start_feed(user_id, total_available, marks)  # 🆕 Tüm reels'i al
+            trending_count = int(len(all_reels) * 0.7)
+            fresh_count = int(len(all_reels) * 0.3)
+            personalized_count = 0
+            exploration_count = 0
+            
+        elif personalization_level == "warm":
+            all_reels = await self._warm_feed(user_id, total_available, marks)  # 🆕 Tüm reels'i al
+            trending_count = 0
+            fresh_count = 0
+            personalized_count = int(len(all_reels) * 0.8)
+            exploration_count = int(len(all_reels) * 0.2)
+            
+        else:  # hot
+            all_reels = await self._hot_feed(user_id, total_available, marks)  # 🆕 Tüm reels'i al
+            trending_count = 0
+            fresh_count = 0
+            personalized_count = int(len(all_reels) * 0.85)
+            exploration_count = int(len(all_reels) * 0.15)
+        
+        # Feed metadata
+        metadata = FeedMetadata(
+            trending_count=trending_count,
+            personalized_count=personalized_count,
+            fresh_count=fresh_count,
+            exploration_count=exploration_count,
+            algorithm_version="v1.0",
+            personalization_level=personalization_level
+        )
+        
+        # Tier'lar (trending + fresh) aynı reel'i iki kez seçebilir: sayfalarda tekrar olmasın
+        seen_ids: Set[str] = set()
+        reel_ids = []
+        for reel in all_reels:
+            if reel.id not in seen_ids:
+                seen_ids.add(reel.id)
+                reel_ids.append(reel.id)
+        
+        snapshot = FeedSnapshot(
+            snapshot_id=uuid.uuid4().hex[:16],
+            user_id=user_id,
+            reel_ids=reel_ids,
+            marks={reel_id: marks[reel_id] for reel_id in reel_ids if reel_id in marks},
+            metadata=metadata,
+            expires_at=time.monotonic() + self.snapshot_ttl_seconds
+        )
+        self._store_snapshot(snapshot)
+        return snapshot
+    
+    def _get_snapshot(self, snapshot_id: str, user_id: str) -> Optional[FeedSnapshot]:
+        """Geçerli snapshot (başka kullanıcının cursor'ı veya süresi dolmuşsa None)"""
+        snapshot = self._snapshots.get(snapshot_id)
+        if snapshot is None or snapshot.user_id != user_id:
+            return None
+        now = time.monotonic()
+        if snapshot.expires_at < now:
+            del self._snapshots[snapshot_id]
+            return None
+        
+        # Aktif oturum: TTL uzar, LRU sonuna taşınır
+        snapshot.expires_at = now + self.snapshot_ttl_seconds
+        self._snapshots.move_to_end(snapshot_id)
+        return snapshot
+    
+    def _resolve_page(self, snapshot: FeedSnapshot, start: int, end: int) -> List[ReelFeedItem]:
+        """Snapshot diliminin reel'lerini çöz (silinmiş reels atlanır)"""
+        page = []
+        for reel_id in snapshot.reel_ids[start:end]:
+            reel = reels_analytics.reel_storage.get(reel_id)
+            if reel is not None:
+                page.append(reel.model_copy(update=snapshot.marks.get(reel_id, {})))
+        return page
+    
+    def _store_snapshot(self, snapshot: FeedSnapshot):
+        """Snapshot'ı cache'le, süresi dolanları ve kapasite fazlasını at"""
+        now = time.monotonic()
+        self._snapshots[snapshot.snapshot_id] = snapshot
+        
+        # En eski snapshot'lar başta (erişim sırası = expiry sırası)
+        while self._snapshots:
+            oldest = next(iter(self._snapshots.values()))
+            if oldest.expires_at >= now and len(self._snapshots) <= self.snapshot_max_sessions:
+                break
+            self._snapshots.popitem(last=False)
+    
+    async def _cold_start_feed(self, user_id: str, limit: int, marks: FeedMarks) -> List[ReelFeedItem]:
         """
         Yeni kullanıcı feed (0-10 etkileşim)
         
@@ -200,17 +325,15 @@ class FeedGenerator:
         feed = trending + fresh
         random.shuffle(feed)
         
-        # Metadata işaretle
+        # Metadata işaretle (paylaşılan reel'e değil, bu build'in marks'ına)
         for reel in feed[:trending_count]:
-            reel.is_trending = True
-            reel.feed_reason = "trending"
+            marks.setdefault(reel.id, {}).update(is_trending=True, feed_reason="trending")
         for reel in feed[trending_count:]:
-            reel.is_fresh = True
-            reel.feed_reason = "fresh"
+            marks.setdefault(reel.id, {}).update(is_fresh=True, feed_reason="fresh")
         
         return feed[:limit]
     
-    async def _warm_feed(self, user_id: str, limit: int) -> List[ReelFeedItem]:
+    async def _warm_feed(self, user_id: str, limit: int, marks: FeedMarks) -> List[ReelFeedItem]:
         """
         Orta seviye feed (10-50 etkileşim)
         
@@ -227,16 +350,13 @@ class FeedGenerator:
         unseen_reels = await self._get_unseen_reels(user_id, max_age_days=3)
         
         if not unseen_reels:
-            return await self._cold_start_feed(user_id, limit)
+            return await self._cold_start_feed(user_id, limit, marks)
         
-        # Her reel için skor hesapla
-        scored_reels = []
-        for reel in unseen_reels:
-            score = await preference_engine.predict_reel_score(user_id, reel)
-            scored_reels.append((reel, score))
+        # Tüm adaylar tek batch'te skorlanır
+        scores = await preference_engine.score_batch(user_id, unseen_reels)
         
         # Sırala
-        scored_reels.sort(key=lambda x: x[1], reverse=True)
+        scored_reels = sorted(zip(unseen_reels, scores.tolist()), key=lambda x: x[1], reverse=True)
         
         # %80 personalized (yüksek skorlular)
         personalized_count = int(limit * 0.8)
@@ -257,14 +377,15 @@ class FeedGenerator:
         # Metadata
         for i, reel in enumerate(feed):
             if i < personalized_count:
-                reel.is_recommended = True
-                reel.recommendation_reason = "preference_match"
+                marks.setdefault(reel.id, {}).update(
+                    is_recommended=True, recommendation_reason="preference_match"
+                )
             else:
-                reel.feed_reason = "exploration"
+                marks.setdefault(reel.id, {})["feed_reason"] = "exploration"
         
         return feed[:limit]
     
-    async def _hot_feed(self, user_id: str, limit: int) -> List[ReelFeedItem]:
+    async def _hot_feed(self, user_id: str, limit: int, marks: FeedMarks) -> List[ReelFeedItem]:
         """
         Aktif kullanıcı feed (50+ etkileşim)
         
@@ -280,38 +401,41 @@ class FeedGenerator:
         # NLP fitted mi kontrol et
         if not incremental_nlp.is_fitted:
             print("⚠️ NLP not fitted, falling back to warm feed")
-            return await self._warm_feed(user_id, limit)
+            return await self._warm_feed(user_id, limit, marks)
         
-        # Kullanıcının izlediği son 50 haberi al
-        watch_history = await reels_analytics.get_user_watch_history(
-            user_id, 
-            limit=50,
-            min_engagement=0.5  # Sadece beğendiklerini
-        )
-        
-        if not watch_history:
-            return await self._warm_feed(user_id, limit)
-        
-        # User profile vector oluştur (NLP)
-        user_texts = [
-            {
-                "reel_id": view.reel_id,
-                "text": f"{view.reel_title} {view.reel_summary}",
-                "engagement": view.engagement_score
-            }
-            for view in watch_history
-        ]
+        # Cache'lenmiş profil (track_reel_view ile güncel tutulur)
+        user_vector = incremental_nlp.get_user_profile(user_id)
         
-        user_vector = await incremental_nlp.build_user_profile(user_texts)
+        if user_vector is None:
+            # Cache miss: son 50 izlemeden bir kez oluştur
+            watch_history = await reels_analytics.get_user_watch_history(
+                user_id, 
+                limit=50,
+                min_engagement=incremental_nlp.profile_min_engagement  # Sadece beğendiklerini
+            )
+            
+            if not watch_history:
+                return await self._warm_feed(user_id, limit, marks)
+            
+            user_texts = [
+                {
+                    "reel_id": view["reel_id"],
+                    "text": f"{view['reel_title']} {view['reel_summary']}",
+                    "engagement": view["engagement_score"]
+                }
+                for view in watch_history
+            ]
+            
+            user_vector = incremental_nlp.seed_user_profile(user_id, user_texts)
         
         if user_vector is None:
-            return await self._warm_feed(user_id, limit)
+            return await self._warm_feed(user_id, limit, marks)
         
         # İzlenmemiş aday reels
         unseen_reels = await self._get_unseen_reels(user_id, max_age_days=3)
         
         if not unseen_reels:
-            return await self._cold_start_feed(user_id, limit)
+            return await self._cold_start_feed(user_id, limit, marks)
         
         # NLP ile skorla
         candidate_texts = [
@@ -323,11 +447,15 @@ class FeedGenerator:
             for r in unseen_reels
         ]
         
-        # Cosine similarity ranking
-        ranked_reels = await incremental_nlp.rank_reels(user_vector, candidate_texts)
-        
         # %85 personalized (yüksek similarity)
         personalized_count = int(limit * 0.85)
+        
+        # Cosine similarity ranking (sadece top-k sıralanır, kalanı exploration havuzu)
+        ranked_reels = await incremental_nlp.rank_reels(
+            user_vector, candidate_texts, top_k=personalized_count
+        )
+        scores_by_id = {r.id: score for r, score in ranked_reels[:personalized_count]}
+        
         personalized = [r for r, score in ranked_reels[:personalized_count]]
         
         # %15 exploration
@@ -345,16 +473,14 @@ class FeedGenerator:
         # Metadata + recommendation score
         for i, reel in enumerate(feed):
             if i < personalized_count:
-                reel.is_recommended = True
-                # Similarity skorunu recommendation_score'a ata
-                matching_score = next(
-                    (score for r, score in ranked_reels if r.id == reel.id), 
-                    0.5
+                marks.setdefault(reel.id, {}).update(
+                    is_recommended=True,
+                    # Similarity skorunu recommendation_score'a ata
+                    recommendation_score=scores_by_id.get(reel.id, 0.5),
+                    recommendation_reason="nlp_similarity"
                 )
-                reel.recommendation_score = matching_score
-                reel.recommendation_reason = "nlp_similarity"
             else:
-                reel.feed_reason = "exploration"
+                marks.setdefault(reel.id, {})["feed_reason"] = "exploration"
         
         return feed[:limit]
     
@@ -373,18 +499,14 @@ class FeedGenerator:
         Returns:
             List of unseen reels
         """
-        # Tüm published reels
-        all_reels = await reels_analytics.get_all_published_reels()
+        # Yaş penceresindeki published reels
+        cutoff_date = datetime.now() - timedelta(days=max_age_days)
+        recent_reels = await reels_analytics.get_published_reels_since(cutoff_date)
         
-        # İzlenen reel ID'leri
+        # İzlenen reel ID'leri (track anında güncellenen index, history taranmaz)
         watched_ids = await reels_analytics._get_user_watched_reel_ids(user_id)
         
-        # Filtrele
-        cutoff_date = datetime.now() - timedelta(days=max_age_days)
-        unseen = [
-            r for r in all_reels
-            if r.id not in watched_ids and r.published_at >= cutoff_date
-        ]
+        unseen = [r for r in recent_reels if r.id not in watched_ids]
         
         return unseen
     
@@ -403,14 +525,25 @@ class FeedGenerator:
         Returns:
             Top trending reels
         """
-        # Engagement skoruna göre sırala
-        sorted_reels = sorted(
-            reels,
-            key=lambda r: r.trend_score if r.trend_score > 0 else r.total_views,
-            reverse=True
-        )
+        if count <= 0:
+            return []
+        
+        # Günlük trending heap'inden, sadece aday reels arasından top-k
+        by_id = {r.id: r for r in reels}
+        top = reels_analytics.trending.top_k(TrendPeriod.DAILY, count, eligible=by_id.__contains__)
+        trending = [by_id[reel_id] for reel_id, _ in top]
+        
+        # Yeterli trend sinyali yoksa kalanı eski sıralamayla doldur
+        if len(trending) < count:
+            picked = {r.id for r in trending}
+            rest = sorted(
+                (r for r in reels if r.id not in picked),
+                key=lambda r: r.trend_score if r.trend_score > 0 else r.total_views,
+                reverse=True
+            )
+            trending += rest[:count - len(trending)]
         
-        return sorted_reels[:count]
+        return trending
     
     async def _get_fresh_reels(
         self,
@@ -429,17 +562,19 @@ class FeedGenerator:
         Returns:
             Fresh reels
         """
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        
-        fresh = [
-            r for r in reels
-            if r.published_at >= cutoff_time
-        ]
-        
-        # Yeniden eskiye sırala
-        fresh.sort(key=lambda r: r.published_at, reverse=True)
-        
-        return fresh[:count]
+        if count <= 0:
+            return []
+        
+        # Katalog index son X saati zaten yeniden eskiye verir (bisect)
+        candidate_ids = {r.id for r in reels}
+        fresh = []
+        for reel in await reels_analytics.get_recent_published_reels(hours):
+            if reel.id in candidate_ids:
+                fresh.append(reel)
+                if len(fresh) >= count:
+                    break
+        
+        return fresh
     
     async def _get_latest_reels(self, limit: int) -> List[ReelFeedItem]:
         """
@@ -451,16 +586,7 @@ class FeedGenerator:
         Returns:
             Latest reels
         """
-        all_reels = await reels_analytics.get_all_published_reels()
-        
-        # Tarihe göre sırala
-        sorted_reels = sorted(
-            all_reels,
-            key=lambda r: r.published_at,
-            reverse=True
-        )
-        
-        return sorted_reels[:limit]
+        return await reels_analytics.get_latest_published_reels(limit)
     
     async def _get_total_available(self, user_id: str) -> int:
         """Toplam mevcut (izlenmemiş) reel sayısı"""
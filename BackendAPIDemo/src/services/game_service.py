@@ -1,18 +1,19 @@
 """
 Game Service - Haber Kapışması Oyunu
-AI ile senaryo üretimi, oyun state management, gerçek zamanlı oyun mantığı
-OPTIMIZED: Hızlı AI çağrıları ve timeout önleme
+Soru havuzundan senaryo, oyun state management, gerçek zamanlı oyun mantığı
+OPTIMIZED: Sorular önceden üretilir (question_pool), eşleşmede model beklenmez
 """
 
 import json
 import random
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 import asyncio
 
 from ..models.user_viewed_news import user_viewed_news_storage
 from ..services.reels_analytics import reels_analytics
+from ..services.question_pool import question_pool, EMOJI_COMMENTS
 from ..config import settings
 
 
@@ -72,6 +73,7 @@ class GameSession:
         self.created_at = datetime.now()
         self.started_at: Optional[datetime] = None
         self.finished_at: Optional[datetime] = None
+        self.last_activity_at = self.created_at  # Terk edilmiş oyun tespiti (TTL)
         
         # Oyun geçmişi
         self.round_history: List[Dict] = []
@@ -91,8 +93,11 @@ class GameService:
     """
     
     def __init__(self):
-        # Aktif oyunlar (memory'de)
+        # Aktif oyunlar (memory'de, TTL ile temizlenir)
         self.active_games: Dict[str, GameSession] = {}
+        # user_id → bitmemiş oyununun game_id'si (O(1) lookup)
+        self.user_games: Dict[str, str] = {}
+        self.evicted_sessions = 0
         
         # Oyun geçmişi storage path
         self.storage_dir = Path(settings.storage_base_path) / "games"
@@ -116,7 +121,7 @@ class GameService:
         Steps:
         1. Ortak haberleri bul
         2. Rastgele 8 haber seç
-        3. AI ile her haber için senaryo üret (PARALEL VE HIZLI!)
+        3. Her haber için soruyu havuzdan al (miss → tek model çağrısı)
         4. GameSession oluştur
         
         Args:
@@ -167,7 +172,7 @@ class GameService:
             selected_reel_ids
         )
         
-        # 5. AI ile tüm senaryoyu üret (HIZLI!)
+        # 5. Senaryoyu soru havuzundan topla (eşleşmede model beklenmez)
         questions = await self._generate_game_scenario(
             selected_reels,
             player1_emojis,
@@ -195,7 +200,7 @@ class GameService:
         session.started_at = datetime.now()
 
         # 8. Memory'e kaydet
-        self.active_games[game_id] = session
+        self.register_session(session)
         
         print(f"✅ Game created: {game_id} with {len(questions)} questions")
         print(f"🎮 Active games count: {len(self.active_games)}")
@@ -218,7 +223,7 @@ class GameService:
         return user_viewed_news_storage.get_user_emojis_for_reels(user_id, reel_ids)
     
     
-    # ============ AI SCENARIO GENERATION (OPTIMIZED!) ============
+    # ============ SCENARIO ASSEMBLY (QUESTION POOL) ============
     
     async def _generate_game_scenario(
         self,
@@ -227,12 +232,13 @@ class GameService:
         player2_emojis: Dict[str, str]
     ) -> List[GameQuestion]:
         """
-        AI ile oyun senaryosu üret (tüm sorular)
+        Oyun senaryosunu soru havuzundan topla
         
         🚀 OPTIMIZATION:
-        - Tek bir AI çağrısı ile TÜM soruları üret (paralel değil, batch!)
-        - Timeout: 25 saniye (mobile'ın 30 saniye timeout'undan önce)
-        - Hata durumunda fallback
+        - Sorular reel yayınlanınca background'da üretilir (question_pool)
+        - Burada sadece cache miss'ler için tek model çağrısı yapılır
+        - Emoji yorumları sabit tablodan (model gerekmez)
+        - Üretilemeyen haberler için template fallback
         
         Args:
             reels: Seçilen haberler
@@ -242,187 +248,30 @@ class GameService:
         Returns:
             List[GameQuestion]
         """
-        # OpenAI kullanmak için check
-        if not hasattr(settings, 'openai_api_key') or not settings.openai_api_key:
-            print("⚠️ OpenAI API key not found, using fallback scenario generator")
-            return self._generate_fallback_scenario(reels, player1_emojis, player2_emojis)
+        pooled = await question_pool.get_or_generate(reels)
         
-        try:
-            # OpenAI import (lazy)
-            from openai import AsyncOpenAI
-            
-            client = AsyncOpenAI(api_key=settings.openai_api_key)
-            
-            # TEK BİR PROMPT İLE TÜM SORULARI ÜRET!
-            prompt = self._build_batch_ai_prompt(reels, player1_emojis, player2_emojis)
-            
-            print(f"🤖 Sending batch AI request for {len(reels)} questions...")
-            
-            # AI çağrısı (timeout: 25 saniye)
-            response = await client.chat.completions.create(
-                    model="gpt-4o-mini",  # Hızlı ve ucuz
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "Sen Türkçe haber quiz oyunu için doğal ve samimi diyaloglar üreten bir asistansın. Cevaplar konuşma tarzında, kısa ve doğal olmalı."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    temperature=0.7,
-                    max_tokens=2000,
-                    response_format={"type": "json_object"}
-                )
-            
-            # Parse AI response
-            ai_output = json.loads(response.choices[0].message.content)
-            # 🔥 AI RESPONSE DETAYLI YAZDIRMA
-            print("=" * 80)
-            print("🤖 AI RESPONSE:")
-            print("=" * 80)
-
-            print(f"📄 Raw AI Output ({len(ai_output)} chars):")
-            print(ai_output)
-            print("=" * 80)
-
-            # Parse AI response
-            ai_output = json.loads(ai_output)
-
-            # 🔥 PARSE EDİLMİŞ ÇIKTI
-            print(f"✅ Parsed {len(ai_output.get('questions', []))} questions:")
-            for i, q in enumerate(ai_output.get('questions', [])):
-                print(f"\n📋 QUESTION {i}:")
-                print(f"   Q: {q.get('question', 'N/A')[:80]}...")
-                print(f"   ✓ Correct: {q.get('correct_option', 'N/A')[:50]}...")
-                print(f"   ✗ Wrong: {q.get('wrong_option', 'N/A')[:50]}...")
-                print(f"   💬 Response: {q.get('correct_response', 'N/A')}")
-                if q.get('emoji_comment'):
-                    print(f"   😊 Emoji: {q.get('emoji_comment')}")
-
-            print("=" * 80)
-            
-            # AI'dan gelen soruları GameQuestion'a çevir
-            questions = []
-            ai_questions = ai_output.get("questions", [])
-            
-            for i, (reel, ai_q) in enumerate(zip(reels, ai_questions)):
+        questions = []
+        for reel in reels:
+            candidate = pooled.get(reel.id)
+            if candidate is None:
+                question = self._generate_fallback_scenario([reel], player1_emojis, player2_emojis)[0]
+            else:
                 question = GameQuestion(
                     reel_id=reel.id,
                     news_title=reel.news_data.title,
                     news_url=reel.news_data.url,
-                    question_text=ai_q.get("question", f"{reel.news_data.title[:50]}... biliyor muydun?"),
-                    correct_option=ai_q.get("correct_option", "Evet biliyorum"),
-                    wrong_option=ai_q.get("wrong_option", "Hayır duymadım"),
-                    correct_response=ai_q.get("correct_response", "Evet evet!"),
-                    wrong_response=ai_q.get("wrong_response", "Yanlış hatırlıyorsun sanki"),
-                    pass_response=ai_q.get("pass_response", f"Haber: {reel.news_data.summary[:100]}..."),
-                    emoji_responses=ai_q.get("emoji_responses", {})
+                    question_text=candidate["question"],
+                    correct_option=candidate["correct_option"],
+                    wrong_option=candidate["wrong_option"],
+                    correct_response=candidate["correct_response"],
+                    wrong_response=candidate["wrong_response"],
+                    pass_response=candidate["pass_response"],
+                    emoji_responses=dict(EMOJI_COMMENTS)
                 )
-                questions.append(question)
-            
-            print(f"✅ AI scenario generated: {len(questions)} questions")
-            return questions
-            
-        except asyncio.TimeoutError:
-            print(f"⏱️ AI request timeout (25s exceeded), using fallback")
-            return self._generate_fallback_scenario(reels, player1_emojis, player2_emojis)
-            
-        except Exception as e:
-            print(f"❌ AI scenario generation failed: {e}")
-            print("⚠️ Falling back to template-based scenario")
-            return self._generate_fallback_scenario(reels, player1_emojis, player2_emojis)
-    
-    
-    def _build_batch_ai_prompt(
-        self,
-        reels: List,
-        player1_emojis: Dict[str, str],
-        player2_emojis: Dict[str, str]
-    ) -> str:
-        """
-        Tüm haberler için tek bir batch prompt oluştur
-        
-        🆕 Emoji bazlı dinamik cevaplar içerir
-        """
+            questions.append(question)
         
-        news_list = []
-        for i, reel in enumerate(reels):
-            player_turn = 1 if i % 2 == 0 else 2
-            p1_emoji = player1_emojis.get(reel.id)
-            p2_emoji = player2_emojis.get(reel.id)
-            
-            # Soran kişinin emojisi
-            asker_emoji = p1_emoji if player_turn == 1 else p2_emoji
-            # Cevaplayan kişinin emojisi
-            responder_emoji = p2_emoji if player_turn == 1 else p1_emoji
-            
-            news_list.append({
-                "index": i,
-                "title": reel.news_data.title,
-                "summary": reel.news_data.summary[:300],
-                "player_asking": player_turn,
-                "asker_emoji": asker_emoji,
-                "responder_emoji": responder_emoji  # 🔥 BU KULLANILACAK
-            })
-        
-        prompt = f"""Sen bir haber quiz oyunu için SABİT FORMATTA cevaplar üreten bir asistansın.
-
-        İKİ OYUNCU VAR:
-        - Player 1 (Soru sıraları: 0, 2, 4, 6)
-        - Player 2 (Soru sıraları: 1, 3, 5, 7)
-
-        HABERLER ({len(reels)} adet):
-        {json.dumps(news_list, ensure_ascii=False, indent=2)}
-
-        GÖREV:
-        Her haber için SABİT FORMATTA diyalog senaryosu oluştur.
-
-        🔥 ÖNEMLİ KURALLAR:
-
-        1. SORU FORMATI (DEĞİŞMEZ):
-        "[Haber başlığı] haberini duydun mu?"
-
-        2. CEVAP SEÇENEKLERİ:
-        - DOĞRU seçenek: "Evet evet, [haberin gerçek bir detayı 40-60 kelime]"
-        - YANLIŞ seçenek: "Hayır hayır, [mantıklı ama yanlış detay 40-60 kelime]"
-
-        3. DOĞRU CEVAP MESAJI (SABİT):
-        "Evet evet, doğru bildin!"
-
-        4. YANLIŞ CEVAP MESAJI (DOĞRUYU SÖYLE):
-        "Yok ya, yanlış hatırlıyorsun sanki. Doğrusu şöyleydi: [haberin gerçek özeti 30-50 kelime]"
-
-        5. PAS GEÇ MESAJI:
-        "Haber şöyleydi: [haberin özeti 30-50 kelime]"
-
-        6. EMOJİ YORUMU (SADECE responder_emoji VARSA):
-        - ❤️ → "Ben de çok beğenmiştim bu haberi!"
-        - 😢 → "Gerçekten üzücüydü"
-        - 👍 → "Aynen, çok iyi gelişme"
-        - 😮 → "Ben de çok şaşırmıştım"
-        - 😡 → "Gerçekten sinir bozucuydu"
-        - 🔥 → "Çok heyecan vericiydi!"
-        - Emoji yoksa: emoji_comment alanı null olmalı
-
-        JSON formatında dön:
-        {{
-        "questions": [
-            {{
-            "question": "[Haber başlığı] haberini duydun mu?",
-            "correct_option": "Evet evet, [gerçek detay]",
-            "wrong_option": "Hayır hayır, [yanlış detay]",
-            "correct_response": "Evet evet, doğru bildin!",
-            "wrong_response": "Yok ya, yanlış hatırlıyorsun sanki. Doğrusu şöyleydi: [gerçek özet]",
-            "pass_response": "Haber şöyleydi: [özet]",
-            "emoji_comment": "Ben de çok beğenmiştim bu haberi!"
-            }},
-            ...
-        ]
-        }}
-        """
-        return prompt
+        print(f"✅ Scenario assembled: {len(pooled)}/{len(reels)} from question pool")
+        return questions
     
     
     def _generate_fallback_scenario(
@@ -469,7 +318,7 @@ class GameService:
                 correct_response=random.choice(templates["correct_response"]),
                 wrong_response=random.choice(templates["wrong_response"]),
                 pass_response=f"Haber şöyleydi: {reel.news_data.summary[:120]}...",
-                emoji_responses={}
+                emoji_responses=dict(EMOJI_COMMENTS)
             )
             questions.append(question)
         
@@ -479,11 +328,73 @@ class GameService:
     
     # ============ GAME STATE MANAGEMENT ============
     
+    def register_session(self, session: GameSession):
+        """Oyunu memory'e ekle, oyuncuları index'le"""
+        self.active_games[session.game_id] = session
+        self.user_games[session.player1_id] = session.game_id
+        self.user_games[session.player2_id] = session.game_id
+    
+    
     def get_game_session(self, game_id: str) -> Optional[GameSession]:
         """Oyun oturumunu getir"""
         return self.active_games.get(game_id)
     
     
+    def get_active_game_for_user(self, user_id: str) -> Optional[GameSession]:
+        """Kullanıcının bitmemiş oyunu (yoksa None) - O(1)"""
+        game_id = self.user_games.get(user_id)
+        if game_id is None:
+            return None
+        session = self.active_games.get(game_id)
+        if session is None or session.status == "finished":
+            self.user_games.pop(user_id, None)
+            return None
+        return session
+    
+    
+    def _release_players(self, session: GameSession):
+        """Oyun bitti / silindi: oyuncuların index kaydını kaldır (başka oyuna geçmedilerse)"""
+        for player_id in (session.player1_id, session.player2_id):
+            if self.user_games.get(player_id) == session.game_id:
+                del self.user_games[player_id]
+    
+    
+    def evict_stale_sessions(self) -> int:
+        """
+        Memory'den eski oyunları sil
+        
+        - Bitmiş oyunlar: game_finished_session_ttl sonra (geçmiş zaten diske yazıldı)
+        - Bitmemiş oyunlar: game_abandoned_session_ttl boyunca hareketsizse (terk edilmiş)
+        """
+        now = datetime.now()
+        stale = []
+        for game_id, session in self.active_games.items():
+            if session.status == "finished":
+                age = (now - (session.finished_at or session.last_activity_at)).total_seconds()
+                if age > settings.game_finished_session_ttl:
+                    stale.append(game_id)
+            elif (now - session.last_activity_at).total_seconds() > settings.game_abandoned_session_ttl:
+                stale.append(game_id)
+        
+        for game_id in stale:
+            session = self.active_games.pop(game_id)
+            self._release_players(session)
+            if session.status != "finished":
+                print(f"🗑️ Abandoned game evicted: {game_id}")
+        
+        self.evicted_sessions += len(stale)
+        return len(stale)
+    
+    
+    def get_stats(self) -> Dict:
+        """Memory'deki oyun metrikleri"""
+        return {
+            "sessions_in_memory": len(self.active_games),
+            "players_in_game": len(self.user_games),
+            "evicted_sessions": self.evicted_sessions
+        }
+    
+    
     def start_game(self, game_id: str) -> bool:
         """Oyunu başlat"""
         session = self.active_games.get(game_id)
@@ -492,6 +403,7 @@ class GameService:
         
         session.status = "active"
         session.started_at = datetime.now()
+        session.last_activity_at = session.started_at
         return True
     
     
@@ -531,6 +443,7 @@ class GameService:
         
         # Round ilerlet
         session.current_round += 1
+        session.last_activity_at = datetime.now()
         
         # Oyun bitti mi?
         # Oyun bitti mi?
@@ -548,6 +461,9 @@ class GameService:
             
             # Oyunu kaydet
             self._save_finished_game(session)
+            
+            # Oyuncular artık oyunda değil (session sonuç ekranı için TTL'e kadar kalır)
+            self._release_players(session)
         
         # 🔥 FIX: current_score ekle!
         current_score = (session.player1_score if player_id == session.player1_id 
@@ -863,4 +779,15 @@ class GameService:
 
 
 # Global instance
-game_service = GameService()
\ No newline at end of file
+game_service = GameService()
+
+
+# Background task: Terk edilmiş / bitmiş oyunları memory'den temizle
+async def session_cleanup_task():
+    """Her dakika TTL'i dolan oyunları ve eşleştirme penceresi dışındaki izleme günlerini sil"""
+    while True:
+        await asyncio.sleep(60)
+        game_service.evict_stale_sessions()
+        user_viewed_news_storage.viewer_index.prune(
+            datetime.now() - timedelta(days=settings.game_view_index_retention_days)
+        )
\ No newline at end of file
@@ -92,6 +92,8 @@ class GameWebSocketManager:
     
     def __init__(self):
         self.rooms: Dict[str, GameRoom] = {}  # {game_id: GameRoom}
+        # Matchmaking kanalı: kuyrukta bekleyenlere push (polling yerine)
+        self.matchmaking_connections: Dict[str, WebSocket] = {}  # {user_id: websocket}
         print("✅ Game WebSocket Manager initialized")
     
     def get_or_create_room(self, game_id: str) -> GameRoom:
@@ -129,6 +131,36 @@ class GameWebSocketManager:
                 del self.rooms[game_id]
                 print(f"🗑️ Deleted empty room {game_id}")
     
+    # ============ MATCHMAKING CHANNEL ============
+    
+    async def connect_matchmaking(self, user_id: str, websocket: WebSocket):
+        """Matchmaking kanalına bağlan (aynı kullanıcının eski bağlantısı düşer)"""
+        await websocket.accept()
+        self.matchmaking_connections[user_id] = websocket
+        print(f"🔌 Matchmaking channel connected: {user_id[:8]}")
+    
+    def disconnect_matchmaking(self, user_id: str, websocket: Optional[WebSocket] = None):
+        """Matchmaking kanalından çıkar (websocket verilirse sadece o bağlantıysa)"""
+        current = self.matchmaking_connections.get(user_id)
+        if current is not None and (websocket is None or current is websocket):
+            del self.matchmaking_connections[user_id]
+    
+    async def send_matchmaking_event(self, user_id: str, message: dict) -> bool:
+        """Kuyruktaki kullanıcıya event push et (bağlı değilse False)"""
+        websocket = self.matchmaking_connections.get(user_id)
+        if websocket is None:
+            return False
+        try:
+            await websocket.send_json({
+                **message,
+                "timestamp": datetime.now().isoformat()
+            })
+            return True
+        except Exception as e:
+            print(f"❌ Error sending matchmaking event to {user_id[:8]}: {e}")
+            self.disconnect_matchmaking(user_id, websocket)
+            return False
+    
     async def send_turn_update(self, game_id: str, data: dict):
         """Sıra değişimi mesajı gönder"""
         if game_id not in self.rooms:
@@ -13,6 +13,7 @@ from collections import defaultdict
 import json
 
 from ..config import settings
+from .write_behind import write_behind
 
 
 class GamificationData:
@@ -128,6 +129,9 @@ class GamificationService:
         # Load from file
         self._load_from_file()
         
+        # Write-behind: _save_to_file sadece kirli işaretler
+        write_behind.register("gamification", self._collect_snapshot)
+        
         print("✅ Gamification Service initialized")
         print(f"📁 Storage: {self.data_file}")
         print(f"👥 Loaded: {len(self.user_data)} users")
@@ -154,20 +158,15 @@ class GamificationService:
             self.user_data = {}
     
     def _save_to_file(self):
-        """JSON'a kaydet"""
-        try:
-            data = {
-                user_id: user_data.to_dict()
-                for user_id, user_data in self.user_data.items()
-            }
-            
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            
-            print(f"💾 Saved gamification data for {len(data)} users")
-            
-        except Exception as e:
-            print(f"❌ Error saving gamification data: {e}")
+        """JSON'a kaydet (write-behind: flusher toplu ve atomik yazar)"""
+        write_behind.mark_dirty("gamification")
+    
+    def _collect_snapshot(self):
+        """Write-behind için yazılacak dosyalar"""
+        # Sığ kopya; to_dict() + JSON flusher thread'inde
+        data = dict(self.user_data)
+        print(f"💾 Saving gamification data for {len(data)} users")
+        return [(self.data_file, data)]
     
     # ============ USER DATA ============
     
@@ -10,23 +10,34 @@ Features:
 - TF-IDF vectorization (hafif, hızlı)
 - Incremental corpus update (yeni haber → model güncellenir)
 - User profile vectorization
-- Cosine similarity ranking
-- Persistent storage (pickle)
+- Batch cosine similarity ranking (tek sparse matrix-vector çarpımı)
+- Persistent storage (pickle + memmap sparse reel vektör store)
+- Non-blocking refit (process pool'da fit + atomik swap)
+- Opsiyonel hashing modu (HashingVectorizer + online IDF, refit yok)
+- Kullanıcı profil cache'i (her izlemede O(nnz) decayed running sum)
+- IVF aday index'i (büyük katalogda sadece en yakın kümeler skorlanır)
 
 No GPU required, no training needed.
 """
 
-from typing import List, Dict, Optional, Set, Tuple
-from datetime import datetime, timedelta
+from typing import Any, List, Dict, Optional, Set, Tuple
+from datetime import datetime
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import asyncio
+import time
 import pickle
 import json
+import os
 import numpy as np
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
 try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
+    from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
+    from scipy import sparse
+    from .nlp_refit_worker import fit_vectorizer
     SKLEARN_AVAILABLE = True
 except ImportError:
     SKLEARN_AVAILABLE = False
@@ -34,6 +45,9 @@ except ImportError:
 
 from ..models.reels_tracking import ReelFeedItem
 from ..config import settings
+from .reel_vector_store import ReelVectorStore
+from .online_idf import OnlineIDF
+from .ann_index import IVFIndex, train_centroids, assign_labels, choose_nlist
 
 
 class IncrementalNLPEngine:
@@ -46,13 +60,20 @@ class IncrementalNLPEngine:
     3. Her 100 haber: Model refit edilir, vocabulary büyür
     4. 50K+ haber: max_features=2000 cap
     
+    Hashing modu (settings.nlp_engine_mode = "hashing"):
+    - Vocabulary yok, refit yok: yeni haber = transform + df sayaçları, O(len(text))
+    - Reel vektörleri ham TF olarak saklanır, IDF skorlama anında uygulanır
+    - Korpus büyüse de vektörler (ve profiller) geçerli kalır
+    
     Memory: 50K haber ≈ 100MB
     Speed: Transform <10ms
     """
     
     def __init__(self):
-        # Vectorizer (TF-IDF)
-        self.vectorizer: Optional[TfidfVectorizer] = None
+        # Vectorizer (TF-IDF veya Hashing)
+        self.mode = settings.nlp_engine_mode
+        self.vectorizer = None
+        self.online_idf: Optional[OnlineIDF] = None   # Sadece hashing modu
         
         # Corpus tracking
         self.corpus_texts: List[str] = []        # Tüm haber metinleri
@@ -64,9 +85,40 @@ class IncrementalNLPEngine:
         self.last_update: Optional[datetime] = None
         self.counter = 0  # Refit counter
         
-        # Cache for performance
-        self.reel_vectors_cache: Dict[str, np.ndarray] = {}
-        self.cache_ttl = timedelta(hours=24)
+        # Background refit (process pool)
+        self._refit_executor: Optional[ProcessPoolExecutor] = None
+        self._refit_task: Optional[asyncio.Task] = None
+        self._refit_pending = False      # Refit sürerken gelen istek (birleştirilir)
+        self._save_task: Optional[asyncio.Task] = None
+        self._save_lock = asyncio.Lock()
+        self.refit_stats = {
+            "completed": 0,
+            "failed": 0,
+            "last_duration_seconds": None,
+            "max_duration_seconds": 0.0,
+            "total_duration_seconds": 0.0
+        }
+        
+        
+        # User profile cache: user_id → (model_version, sparse 1 x dim profil)
+        # Profil = Σ decay^k · engagement · reel_vector (en yeni izleme k=0)
+        self.user_profiles: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        self.profile_decay = settings.nlp_profile_decay
+        self.profile_cache_size = settings.nlp_profile_cache_size
+        self.profile_min_engagement = 0.5   # Sadece beğenilen izlemeler profile girer
+        self.profile_stats = {"hits": 0, "misses": 0, "updates": 0, "evictions": 0}
+        
+        # ANN candidate index (IVF)
+        self.ann_index = IVFIndex()
+        self._ann_task: Optional[asyncio.Task] = None
+        self.ann_stats = {
+            "ann_queries": 0,
+            "exact_queries": 0,
+            "candidates_total": 0,
+            "candidates_scored": 0,
+            "trainings": 0,
+            "last_train_seconds": None
+        }
         
         # Configuration
         self.min_corpus_size = 50        # En az 50 haber olmalı
@@ -78,14 +130,21 @@ class IncrementalNLPEngine:
         self.storage_dir.mkdir(parents=True, exist_ok=True)
         self.model_path = self.storage_dir / "tfidf_vectorizer.pkl"
         
+        # Reel vektörleri: disk tabanlı CSR store (reel_id → satır)
+        self.vector_store = ReelVectorStore(self.storage_dir / "reel_vectors")
+        
         # Load existing model if available
         self._load_model()
+        if self.mode == "hashing":
+            self._init_hashing()
+        self._open_vector_store()
+        self._train_ann_index_sync()
         
-        print(f"✅ Incremental NLP Engine initialized")
+        print(f"✅ Incremental NLP Engine initialized ({self.mode})")
         print(f"   Fitted: {self.is_fitted}")
         print(f"   Corpus size: {len(self.corpus_texts)}")
         if self.is_fitted:
-            print(f"   Vocabulary size: {len(self.vectorizer.vocabulary_)}")
+            print(f"   Vocabulary size: {self._n_features()}")
     
     def _get_turkish_stop_words(self) -> List[str]:
         """Türkçe stop words"""
@@ -117,100 +176,453 @@ class IncrementalNLPEngine:
         self.corpus_metadata.append(metadata or {})
         self.counter += 1
         
-        # Periyodik refit (her 100 haberde)
+        if self.mode == "hashing":
+            self._add_hashed(reel_id, text)
+            return
+        
+        # Periyodik refit (her 100 haberde) - arka planda, eski model servis etmeye devam eder
         if self.counter >= self.refit_threshold:
-            await self._refit_model()
             self.counter = 0
+            self._request_refit()
         
         # İlk fit (minimum corpus size)
-        elif not self.is_fitted and len(self.corpus_texts) >= self.min_corpus_size:
-            await self._fit_initial()
+        elif (
+            not self.is_fitted
+            and len(self.corpus_texts) >= self.min_corpus_size
+            and not self.refit_in_progress
+        ):
+            self._request_refit()
+        
+        # Model değişmediyse sadece yeni vektörü store'a ekle
+        if self.is_fitted:
+            try:
+                self._ensure_reel_rows([(reel_id, text)])
+            except Exception as e:
+                print(f"❌ Vector append error for {reel_id}: {e}")
     
-    async def _fit_initial(self):
-        """İlk model fitting (50+ haber olunca)"""
+    def _init_hashing(self):
+        """Hashing modu: stateless vectorizer + online IDF"""
         if not SKLEARN_AVAILABLE:
-            print("⚠️ sklearn not available, skipping fit")
+            print("⚠️ sklearn not available, hashing mode disabled")
             return
         
-        print(f"🎯 Initial TF-IDF fit with {len(self.corpus_texts)} news items")
+        n_features = settings.nlp_hashing_n_features
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=(1, 2),
+            stop_words=self._get_turkish_stop_words(),
+            lowercase=True,
+            strip_accents='unicode',
+            alternate_sign=False,   # Ham TF sayıları (IDF sonra uygulanır)
+            norm=None
+        )
+        self.online_idf = OnlineIDF(n_features)
+        self.is_fitted = len(self.corpus_texts) >= self.min_corpus_size
+    
+    def _add_hashed(self, reel_id: str, text: str):
+        """Hashing modu: vektörü store'a ekle, df sayaçlarını güncelle"""
+        if self.online_idf is None:
+            return
         
         try:
-            # Create vectorizer
-            self.vectorizer = TfidfVectorizer(
-                max_features=500,
-                ngram_range=(1, 2),  # Unigram + bigram
-                stop_words=self._get_turkish_stop_words(),
-                min_df=2,            # En az 2 haberde geçsin
-                max_df=0.8,          # Çok yaygın kelimeleri atla
-                lowercase=True,
-                strip_accents='unicode'
-            )
-            
-            # Fit
-            self.vectorizer.fit(self.corpus_texts)
+            self._ensure_reel_rows([(reel_id, text)])
+        except Exception as e:
+            print(f"❌ Vector append error for {reel_id}: {e}")
+            return
+        
+        if not self.is_fitted and len(self.corpus_texts) >= self.min_corpus_size:
             self.is_fitted = True
             self.last_update = datetime.now()
-            
-            # Save model
-            await self._save_model()
-            
-            print(f"✅ Model fitted! Vocabulary size: {len(self.vectorizer.vocabulary_)}")
-            
-        except Exception as e:
-            print(f"❌ Initial fit error: {e}")
+            print(f"✅ Hashing engine ready with {len(self.corpus_texts)} news items")
+        
+        # Korpusu periyodik kaydet (refit yerine)
+        if self.counter >= self.refit_threshold:
+            self.counter = 0
+            self.last_update = datetime.now()
+            self._request_save()
+    
+    def _request_save(self):
+        """Model/korpus kaydını arka planda başlat (çalışan kayıt varsa atla)"""
+        if self._save_task is not None and not self._save_task.done():
+            return
+        try:
+            self._save_task = asyncio.get_running_loop().create_task(self._save_model())
+        except RuntimeError:
+            pass
+    
+    def _vectorizer_params(self, initial: bool) -> Dict[str, Any]:
+        """TfidfVectorizer parametreleri (ilk fit / refit)"""
+        if initial:
+            return {
+                "max_features": 500,
+                "ngram_range": (1, 2),  # Unigram + bigram
+                "stop_words": self._get_turkish_stop_words(),
+                "min_df": 2,            # En az 2 haberde geçsin
+                "max_df": 0.8,          # Çok yaygın kelimeleri atla
+                "lowercase": True,
+                "strip_accents": 'unicode'
+            }
+        
+        # Dinamik max_features (korpus büyüdükçe artar)
+        corpus_size = len(self.corpus_texts)
+        dynamic_max_features = min(
+            500 + corpus_size // 10,  # Her 10 haber için +1 feature
+            self.max_features_cap     # Max 2000
+        )
+        
+        # Adaptive min_df (korpus büyüdükçe artar)
+        adaptive_min_df = max(2, corpus_size // 1000)
+        
+        return {
+            "max_features": dynamic_max_features,
+            "ngram_range": (1, 2),
+            "stop_words": self._get_turkish_stop_words(),
+            "min_df": adaptive_min_df,
+            "max_df": 0.8,
+            "lowercase": True,
+            "strip_accents": 'unicode'
+        }
+    
+    @property
+    def refit_in_progress(self) -> bool:
+        return self._refit_task is not None and not self._refit_task.done()
     
-    async def _refit_model(self):
+    def _request_refit(self):
         """
-        Model'i yeniden fit et (incremental update)
+        Refit iste (non-blocking)
         
-        Yeni haberler geldikçe vocabulary genişler
+        Refit zaten çalışıyorsa istek birleştirilir: bitince bir tur daha
+        çalışır (en güncel korpus ile).
         """
         if not SKLEARN_AVAILABLE:
+            print("⚠️ sklearn not available, skipping fit")
+            return
+        
+        if self.refit_in_progress:
+            self._refit_pending = True
             return
         
-        print(f"🔄 Refitting TF-IDF model with {len(self.corpus_texts)} news items")
+        self._refit_task = asyncio.create_task(self._refit_loop())
+    
+    async def _refit_loop(self):
+        """Bekleyen refit isteği kalmayana kadar refit et"""
+        while True:
+            self._refit_pending = False
+            await self._run_refit()
+            if not self._refit_pending:
+                break
+    
+    async def _run_refit(self):
+        """
+        Model'i worker'da fit et, sonra atomik olarak değiştir
+        
+        Fit, yeni vektör store'unun yazımı ve model kaydı event loop dışında
+        çalışır; eski vectorizer + vektörler bu sırada servis etmeye devam eder.
+        Swap adımında await yok: hiçbir request yarım state görmez.
+        """
+        initial = not self.is_fitted
+        texts = list(self.corpus_texts)
+        ids = list(self.corpus_ids)
+        params = self._vectorizer_params(initial)
+        
+        print(f"{'🎯 Initial TF-IDF fit' if initial else '🔄 Refitting TF-IDF model'} with {len(texts)} news items")
         
+        started = time.perf_counter()
         try:
-            # Dinamik max_features (korpus büyüdükçe artar)
-            corpus_size = len(self.corpus_texts)
-            dynamic_max_features = min(
-                500 + corpus_size // 10,  # Her 10 haber için +1 feature
-                self.max_features_cap     # Max 2000
-            )
-            
-            # Adaptive min_df (korpus büyüdükçe artar)
-            adaptive_min_df = max(2, corpus_size // 1000)
-            
-            # Yeni vectorizer
-            self.vectorizer = TfidfVectorizer(
-                max_features=dynamic_max_features,
-                ngram_range=(1, 2),
-                stop_words=self._get_turkish_stop_words(),
-                min_df=adaptive_min_df,
-                max_df=0.8,
-                lowercase=True,
-                strip_accents='unicode'
+            vectorizer, matrix = await self._fit_off_loop(texts, params)
+        except Exception as e:
+            self.refit_stats["failed"] += 1
+            print(f"❌ {'Initial fit' if initial else 'Refit'} error: {e}")
+            return
+        
+        # Yeni store dosyaları thread'de (fit sürerken eklenen haberler dahil)
+        last_update = datetime.now()
+        tail_ids = self.corpus_ids[len(ids):]
+        tail_texts = self.corpus_texts[len(ids):]
+        try:
+            staged = await asyncio.to_thread(
+                self._stage_vector_store,
+                vectorizer, last_update.isoformat(), ids, matrix, tail_ids, tail_texts
             )
-            
-            # Refit
-            self.vectorizer.fit(self.corpus_texts)
-            self.last_update = datetime.now()
-            
-            # Cache'i temizle (vectorizer değişti)
-            self.reel_vectors_cache.clear()
-            
-            # Save
+        except Exception as e:
+            self.refit_stats["failed"] += 1
+            print(f"❌ Vector store staging error: {e}")
+            return
+        duration = time.perf_counter() - started
+        
+        # ---- Atomic swap ----
+        self.vectorizer = vectorizer
+        self.is_fitted = True
+        self.last_update = last_update
+        self.vector_store.adopt(staged)
+        
+        self.ann_index.reset()
+        
+        # Hazırlık sırasında eklenen (birkaç) haber yeni model ile vektörleştirilir
+        covered = len(ids) + len(tail_ids)
+        tail = list(zip(self.corpus_ids[covered:], self.corpus_texts[covered:]))
+        if tail:
+            self._ensure_reel_rows(tail)
+        # ---------------------
+        
+        self._schedule_ann_training()
+        
+        self.refit_stats["completed"] += 1
+        self.refit_stats["last_duration_seconds"] = round(duration, 3)
+        self.refit_stats["max_duration_seconds"] = round(
+            max(self.refit_stats["max_duration_seconds"], duration), 3
+        )
+        self.refit_stats["total_duration_seconds"] += duration
+        
+        # Save model
+        await self._save_model()
+        
+        if initial:
+            print(f"✅ Model fitted! Vocabulary size: {len(vectorizer.vocabulary_)} ({duration:.2f}s)")
+        else:
+            print(f"✅ Model refitted! New vocab size: {len(vectorizer.vocabulary_)} ({duration:.2f}s)")
+            print(f"   max_features: {params['max_features']}, min_df: {params['min_df']}")
+    
+    def _stage_vector_store(self, vectorizer, model_version: str, ids: List[str], matrix,
+                            tail_ids: List[str], tail_texts: List[str]) -> ReelVectorStore:
+        """Refit sonucu store'u yan dizinde yaz (thread'de çalışır)"""
+        if tail_texts:
+            matrix = sparse.vstack([matrix, vectorizer.transform(tail_texts)], format='csr')
+        return self.vector_store.stage(
+            model_version, len(vectorizer.vocabulary_), ids + tail_ids, matrix
+        )
+    
+    async def _fit_off_loop(self, texts: List[str], params: Dict[str, Any]):
+        """Fit'i process pool'da çalıştır (olmazsa thread'de)"""
+        if settings.nlp_refit_in_process:
+            try:
+                # submit() ilk çağrıda worker process'i başlatır → o da thread'de
+                future = await asyncio.to_thread(
+                    self._get_refit_executor().submit, fit_vectorizer, texts, params
+                )
+                return await asyncio.wrap_future(future)
+            except (BrokenProcessPool, OSError, NotImplementedError) as e:
+                print(f"⚠️ Refit process pool unavailable ({e}), falling back to thread")
+                self._shutdown_refit_executor()
+        
+        return await asyncio.to_thread(fit_vectorizer, texts, params)
+    
+    def _get_refit_executor(self) -> ProcessPoolExecutor:
+        """Tek worker'lı process pool (lazy)"""
+        if self._refit_executor is None:
+            context = None
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                # Worker'lar uygulamayı değil sadece worker modülünü yükler
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload([fit_vectorizer.__module__])
+            self._refit_executor = ProcessPoolExecutor(max_workers=1, mp_context=context)
+        return self._refit_executor
+    
+    def _shutdown_refit_executor(self):
+        if self._refit_executor is not None:
+            self._refit_executor.shutdown(wait=False, cancel_futures=True)
+            self._refit_executor = None
+    
+    async def wait_for_refit(self):
+        """Çalışan/bekleyen refit bitene kadar bekle (script ve shutdown için)"""
+        while self.refit_in_progress:
+            await asyncio.shield(self._refit_task)
+    
+    async def shutdown(self):
+        """Uygulama kapanırken: çalışan refit'i bitir, process pool'u kapat"""
+        try:
+            await self.wait_for_refit()
+        except Exception as e:
+            print(f"⚠️ Refit during shutdown failed: {e}")
+        self._shutdown_refit_executor()
+        
+        if self._save_task is not None and not self._save_task.done():
+            await self._save_task
+        
+        # Hashing modunda korpus periyodik kaydediliyor: son hali yaz
+        if self.mode == "hashing":
             await self._save_model()
-            
-            print(f"✅ Model refitted! New vocab size: {len(self.vectorizer.vocabulary_)}")
-            print(f"   max_features: {dynamic_max_features}, min_df: {adaptive_min_df}")
-            
+    
+    def _model_version(self) -> str:
+        """Vector store'un hangi fit'e ait olduğunu belirler"""
+        if self.mode == "hashing":
+            # Hashing uzayı sabit: vektörler korpus büyüdükçe değişmez
+            return f"hashing:{self._n_features()}"
+        return self.last_update.isoformat() if self.last_update else ""
+    
+    def _n_features(self) -> int:
+        """Vektör boyutu (vocabulary veya hash uzayı)"""
+        if self.vectorizer is None:
+            return 0
+        if isinstance(self.vectorizer, HashingVectorizer):
+            return self.vectorizer.n_features
+        return len(self.vectorizer.vocabulary_)
+    
+    def _open_vector_store(self):
+        """Startup: kayıtlı vektörleri aç, model değiştiyse yeniden oluştur"""
+        if self.mode == "hashing":
+            if self.online_idf is None:
+                return
+        elif not self.is_fitted:
+            return
+        elif not isinstance(self.vectorizer, TfidfVectorizer):
+            # Hashing modundan dönülmüş: ilk haberde yeniden fit edilir
+            print("⚠️ Saved model is not TF-IDF, waiting for refit")
+            self.vectorizer = None
+            self.is_fitted = False
+            return
+        
+        if not self.vector_store.open(self._model_version(), self._n_features()):
+            print("⚠️ Reel vector store missing or stale, rebuilding...")
+            self._rebuild_vector_store()
+        elif self.online_idf is not None:
+            self.online_idf.reset_from(self.vector_store.matrix)
+    
+    def _rebuild_vector_store(self):
+        """Korpusun tamamını mevcut vectorizer ile store'a yaz"""
+        if not self.corpus_texts:
+            self.vector_store.reset(self._model_version(), self._n_features())
+            return
+        
+        try:
+            matrix = self.vectorizer.transform(self.corpus_texts)
+            self.vector_store.rebuild(
+                self._model_version(),
+                self._n_features(),
+                list(self.corpus_ids),
+                matrix
+            )
+            if self.online_idf is not None:
+                self.online_idf.reset_from(self.vector_store.matrix)
         except Exception as e:
-            print(f"❌ Refit error: {e}")
+            print(f"❌ Vector store rebuild error: {e}")
+            self.vector_store.reset(self._model_version(), self._n_features())
+        
+        # Satır index'leri değişti: ANN index yeniden eğitilmeli
+        self.ann_index.reset()
+        self._schedule_ann_training()
+    
+    def _weighted_rows(self, rows: np.ndarray):
+        """
+        Store satırlarını skorlamaya hazır (L2-normalize TF-IDF) hale getir
+        
+        TF-IDF modunda satırlar zaten hazır; hashing modunda güncel IDF uygulanır.
+        """
+        matrix = self.vector_store.rows(rows)
+        if self.online_idf is not None:
+            return self.online_idf.transform(matrix)
+        return matrix
+    
+    def _ensure_reel_rows(self, items: List[Tuple[str, str]]) -> np.ndarray:
+        """
+        Reel'lerin matrix satır index'lerini döndür
+        
+        Store'da olmayan reel'ler (korpus dışı adaylar) tek transform()
+        çağrısıyla vektörleştirilip store'a eklenir.
+        
+        Args:
+            items: [(reel_id, text), ...]
+        
+        Returns:
+            Satır index array'i (items ile aynı sırada)
+        """
+        row_index = self.vector_store.row_index
+        
+        missing: Dict[str, str] = {}
+        for reel_id, text in items:
+            if reel_id not in row_index and reel_id not in missing:
+                missing[reel_id] = text
+        
+        if missing:
+            new_rows = self.vectorizer.transform(list(missing.values()))
+            self.vector_store.append(list(missing.keys()), new_rows)
+            if self.online_idf is not None:
+                self.online_idf.add(new_rows)
+            self._on_rows_appended(len(missing))
+        
+        return np.fromiter(
+            (row_index[reel_id] for reel_id, _ in items),
+            dtype=np.int64,
+            count=len(items)
+        )
+    
+    # ============ ANN INDEX ============
+    
+    def _on_rows_appended(self, count: int):
+        """Yeni satırları en yakın kümeye ata, katalog 2 katına çıktıysa yeniden eğit"""
+        if self.ann_index.is_ready:
+            total = len(self.vector_store)
+            if len(self.ann_index.assignments) == total - count:
+                self.ann_index.append(self._weighted_rows(np.arange(total - count, total)))
+            if total >= 2 * self.ann_index.trained_rows:
+                self._schedule_ann_training()
+        elif len(self.vector_store) >= settings.nlp_ann_min_rows:
+            self._schedule_ann_training()
+    
+    def _schedule_ann_training(self):
+        """ANN index'i arka planda eğit (event loop yoksa senkron)"""
+        if not settings.nlp_ann_enabled or len(self.vector_store) < settings.nlp_ann_min_rows:
+            return
+        if self._ann_task is not None and not self._ann_task.done():
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._train_ann_index_sync()
+            return
+        self._ann_task = loop.create_task(self._train_ann_index())
+    
+    def _train_ann_index_sync(self):
+        """Startup: event loop yokken senkron eğitim"""
+        if not settings.nlp_ann_enabled or len(self.vector_store) < settings.nlp_ann_min_rows:
+            return
+        
+        n_rows = len(self.vector_store)
+        started = time.perf_counter()
+        matrix = self._weighted_rows(np.arange(n_rows))
+        centroids, labels = self._fit_ann(matrix)
+        self._install_ann(centroids, labels, n_rows, time.perf_counter() - started)
+    
+    async def _train_ann_index(self):
+        """
+        Eğitim thread'de, kurulum event loop'ta
+        
+        Eğitim sırasında model değiştiyse (refit swap) sonuç atılır ve tekrar eğitilir.
+        """
+        while True:
+            version = self._model_version()
+            n_rows = len(self.vector_store)
+            started = time.perf_counter()
+            try:
+                matrix = self._weighted_rows(np.arange(n_rows))
+                centroids, labels = await asyncio.to_thread(self._fit_ann, matrix)
+            except Exception as e:
+                print(f"❌ ANN index training error: {e}")
+                return
+            
+            if version == self._model_version() and len(self.vector_store) >= n_rows:
+                self._install_ann(centroids, labels, n_rows, time.perf_counter() - started)
+                return
+    
+    def _fit_ann(self, matrix):
+        centroids = train_centroids(matrix, choose_nlist(matrix.shape[0]))
+        return centroids, assign_labels(matrix, centroids)
+    
+    def _install_ann(self, centroids, labels: np.ndarray, n_rows: int, duration: float):
+        """Eğitilmiş index'i kur, eğitim sırasında eklenen satırları ata"""
+        self.ann_index.install(centroids, labels)
+        total = len(self.vector_store)
+        if total > n_rows:
+            self.ann_index.append(self._weighted_rows(np.arange(n_rows, total)))
+        
+        self.ann_stats["trainings"] += 1
+        self.ann_stats["last_train_seconds"] = round(duration, 3)
+        print(f"🧭 ANN index trained: {self.ann_index.nlist} clusters over {n_rows} reels ({duration:.2f}s)")
     
     def get_reel_vector(self, reel_id: str, text: str) -> Optional[np.ndarray]:
         """
-        Reel'in TF-IDF vektörünü al (cached)
+        Reel'in TF-IDF vektörünü al (dense, matrix'ten)
         
         Args:
             reel_id: Reel ID
@@ -223,18 +635,9 @@ class IncrementalNLPEngine:
         if not self.is_fitted:
             return None
         
-        # Cache check
-        if reel_id in self.reel_vectors_cache:
-            return self.reel_vectors_cache[reel_id]
-        
         try:
-            # Transform
-            vector = self.vectorizer.transform([text]).toarray()[0]
-            
-            # Cache (24 saat TTL)
-            self.reel_vectors_cache[reel_id] = vector
-            
-            return vector
+            row = self._ensure_reel_rows([(reel_id, text)])[0]
+            return self._weighted_rows(np.array([row])).toarray()[0]
             
         except Exception as e:
             print(f"❌ Vector error for {reel_id}: {e}")
@@ -263,41 +666,44 @@ class IncrementalNLPEngine:
         if not self.is_fitted or not watched_reels:
             return None
         
-        # Ağırlıklı ortalama (engagement'e göre)
-        vectors = []
-        weights = []
-        
-        for item in watched_reels:
-            vector = self.get_reel_vector(item["reel_id"], item["text"])
-            if vector is not None:
-                vectors.append(vector)
-                weights.append(item.get("engagement", 0.5))
-        
-        if not vectors:
+        try:
+            rows = self._ensure_reel_rows(
+                [(item["reel_id"], item["text"]) for item in watched_reels]
+            )
+        except Exception as e:
+            print(f"❌ User profile vector error: {e}")
             return None
         
-        # Weighted average
-        vectors = np.array(vectors)
-        weights = np.array(weights)
+        # Ağırlıklı ortalama (engagement'e göre)
+        weights = np.array(
+            [item.get("engagement", 0.5) for item in watched_reels],
+            dtype=np.float64
+        )
+        if weights.sum() <= 0:
+            return None
         
-        # Normalize weights
+        # Normalize weights + weighted average (sparse: weights @ vectors)
         weights = weights / weights.sum()
-        
-        # Weighted average
-        user_profile = np.average(vectors, axis=0, weights=weights)
+        user_profile = np.asarray(self._weighted_rows(rows).T @ weights).ravel()
         
         return user_profile
     
     async def rank_reels(
         self, 
         user_profile: Optional[np.ndarray], 
-        candidate_reels: List[Dict]
+        candidate_reels: List[Dict],
+        top_k: Optional[int] = None,
+        exact: bool = False
     ) -> List[Tuple[any, float]]:
         """
         Reels'leri kullanıcı profiline göre sırala
         
+        Adaylar tek bir sparse matrix-vector çarpımıyla skorlanır. Aday sayısı
+        settings.nlp_ann_candidates'ı aşarsa önce IVF index ile profile en yakın
+        kümelerdeki adaylar seçilir; diğerleri 0 skorla sona eklenir.
+        
         Args:
-            user_profile: User vector (from build_user_profile)
+            user_profile: User vector (build_user_profile veya get_user_profile)
             candidate_reels: [
                 {
                     "reel_id": "...", 
@@ -306,6 +712,9 @@ class IncrementalNLPEngine:
                 },
                 ...
             ]
+            top_k: Verilirse sadece en iyi top_k argpartition ile seçilip
+                sıralanır, kalanlar sırasız olarak arkaya eklenir
+            exact: True ise ANN atlanır, tüm adaylar skorlanır (benchmark)
         
         Returns:
             [(reel_obj, similarity_score), ...]
@@ -315,27 +724,152 @@ class IncrementalNLPEngine:
             # Fallback: sıralama yok, olduğu gibi dön
             return [(r["reel_obj"], 0.5) for r in candidate_reels]
         
-        scored_reels = []
+        if not candidate_reels:
+            return []
         
-        for item in candidate_reels:
-            # Reel vektörü
-            reel_vector = self.get_reel_vector(item["reel_id"], item["text"])
+        try:
+            rows = self._ensure_reel_rows(
+                [(item["reel_id"], item["text"]) for item in candidate_reels]
+            )
             
-            if reel_vector is not None:
-                # Cosine similarity
-                similarity = cosine_similarity(
-                    [user_profile], 
-                    [reel_vector]
-                )[0][0]
+            # Cosine similarity = (M · u) / |u|
+            if sparse.issparse(user_profile):
+                # Cache'lenmiş profil (sparse 1 x dim)
+                user_vector = user_profile.tocsr().T
+                user_norm = np.sqrt(user_profile.multiply(user_profile).sum())
             else:
-                similarity = 0.3  # Default skor
+                user_vector = np.asarray(user_profile, dtype=np.float64).ravel()
+                user_norm = np.linalg.norm(user_vector)
+            if user_norm == 0:
+                return [(r["reel_obj"], 0.0) for r in candidate_reels]
             
-            scored_reels.append((item["reel_obj"], float(similarity)))
+            # ANN: sadece en yakın kümelerdeki adayları skorla
+            n = len(rows)
+            selected = np.arange(n)
+            if (
+                not exact
+                and settings.nlp_ann_enabled
+                and n > settings.nlp_ann_candidates
+                and self.ann_index.covers(rows)
+            ):
+                mask, _ = self.ann_index.select(rows, user_vector, settings.nlp_ann_candidates)
+                selected = np.flatnonzero(mask)
+                self.ann_stats["ann_queries"] += 1
+            else:
+                self.ann_stats["exact_queries"] += 1
+            self.ann_stats["candidates_total"] += n
+            self.ann_stats["candidates_scored"] += len(selected)
+            
+            # Satırlar L2-normalize: |M_i| = 1 (boş satırlar 0 skor alır)
+            candidate_matrix = self._weighted_rows(rows[selected])
+            product = candidate_matrix @ user_vector
+            if sparse.issparse(product):
+                product = product.toarray()
+            selected_scores = np.asarray(product, dtype=np.float64).ravel() / user_norm
+            
+        except Exception as e:
+            print(f"❌ Batch ranking error: {e}")
+            return [(r["reel_obj"], 0.5) for r in candidate_reels]
+        
+        # Sırala (yüksekten düşüğe) - skorlanmayan adaylar en sonda
+        m = len(selected_scores)
+        if top_k is not None and 0 < top_k < m:
+            top = np.argpartition(-selected_scores, top_k - 1)[:top_k]
+            top = top[np.argsort(-selected_scores[top], kind='stable')]
+            rest = np.setdiff1d(np.arange(m), top, assume_unique=True)
+            local_order = np.concatenate([top, rest])
+        else:
+            local_order = np.argsort(-selected_scores, kind='stable')
+        
+        scores = np.zeros(n)
+        scores[selected] = selected_scores
+        order = np.concatenate([
+            selected[local_order],
+            np.setdiff1d(np.arange(n), selected, assume_unique=True)
+        ])
+        
+        return [(candidate_reels[i]["reel_obj"], float(scores[i])) for i in order]
+    
+    # ============ USER PROFILE CACHE ============
+    
+    def get_user_profile(self, user_id: str):
+        """
+        Cache'lenmiş kullanıcı profili (sparse 1 x dim)
         
-        # Sırala (yüksekten düşüğe)
-        scored_reels.sort(key=lambda x: x[1], reverse=True)
+        Model refit edildiyse (vocabulary değişti) profil geçersizdir → None
+        """
+        cached = self.user_profiles.get(user_id)
+        if cached is None or cached[0] != self._model_version():
+            self.profile_stats["misses"] += 1
+            return None
         
-        return scored_reels
+        self.user_profiles.move_to_end(user_id)
+        self.profile_stats["hits"] += 1
+        return cached[1]
+    
+    def seed_user_profile(self, user_id: str, watched_reels: List[Dict]):
+        """
+        İzleme geçmişinden profil oluştur ve cache'le (cache miss'te bir kez)
+        
+        Args:
+            watched_reels: build_user_profile formatı, yeniden eskiye sıralı
+        
+        Returns:
+            Sparse profil veya None
+        """
+        if not self.is_fitted or not watched_reels:
+            return None
+        
+        try:
+            rows = self._ensure_reel_rows(
+                [(item["reel_id"], item["text"]) for item in watched_reels]
+            )
+        except Exception as e:
+            print(f"❌ User profile seed error: {e}")
+            return None
+        
+        # Running sum ile aynı ağırlıklar: engagement · decay^k
+        weights = np.array(
+            [item.get("engagement", 0.5) for item in watched_reels],
+            dtype=np.float32
+        ) * (self.profile_decay ** np.arange(len(watched_reels), dtype=np.float32))
+        if weights.sum() <= 0:
+            return None
+        
+        profile = (sparse.csr_matrix(weights) @ self._weighted_rows(rows)).tocsr()
+        self._store_user_profile(user_id, profile)
+        return profile
+    
+    def update_user_profile(self, user_id: str, reel_id: str, text: str, engagement: float):
+        """
+        Yeni izlemeyi profile ekle: p ← decay · p + engagement · x  (O(nnz))
+        
+        track_reel_view tarafından çağrılır. Profil cache'te yoksa bir şey
+        yapılmaz: ilk feed isteğinde geçmişten seed edilir (bu izleme dahil).
+        """
+        if not self.is_fitted or engagement < self.profile_min_engagement:
+            return
+        
+        cached = self.user_profiles.get(user_id)
+        if cached is None or cached[0] != self._model_version():
+            return
+        
+        try:
+            row = self._ensure_reel_rows([(reel_id, text)])
+            vector = self._weighted_rows(row)
+            profile = (cached[1] * self.profile_decay + vector * engagement).tocsr()
+            self._store_user_profile(user_id, profile)
+            self.profile_stats["updates"] += 1
+        except Exception as e:
+            print(f"❌ User profile update error for {user_id}: {e}")
+    
+    def _store_user_profile(self, user_id: str, profile):
+        """LRU cache'e yaz (kapasite aşılırsa en eski kullanıcı atılır)"""
+        self.user_profiles[user_id] = (self._model_version(), profile)
+        self.user_profiles.move_to_end(user_id)
+        while len(self.user_profiles) > self.profile_cache_size:
+            self.user_profiles.popitem(last=False)
+            self.profile_stats["evictions"] += 1
     
     def extract_keywords(self, text: str, top_n: int = 10) -> List[str]:
         """
@@ -348,8 +882,8 @@ class IncrementalNLPEngine:
         Returns:
             List of keywords
         """
-        if not self.is_fitted:
-            # Fallback: basit split
+        if not self.is_fitted or self.mode == "hashing":
+            # Fallback: basit split (hash'ten kelimeye geri dönüş yok)
             words = text.lower().split()
             stop_words = set(self._get_turkish_stop_words())
             keywords = [w for w in words if w not in stop_words and len(w) > 3]
@@ -376,32 +910,45 @@ class IncrementalNLPEngine:
             return []
     
     async def _save_model(self):
-        """Model'i pickle ile kaydet"""
+        """
+        Model'i pickle ile kaydet
+        
+        Event loop'ta sadece liste snapshot'ı alınır; pickle + JSON
+        serileştirme ve disk yazımı thread'de.
+        """
         if not self.is_fitted:
             return
         
-        try:
+        async with self._save_lock:
             data = {
                 'vectorizer': self.vectorizer,
-                'corpus_ids': self.corpus_ids,
-                'corpus_metadata': self.corpus_metadata,
+                'corpus_ids': list(self.corpus_ids),
+                'corpus_metadata': list(self.corpus_metadata),
                 'last_update': self.last_update,
                 'is_fitted': self.is_fitted,
                 'counter': self.counter
             }
+            corpus_texts = list(self.corpus_texts)
             
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(data, f)
-            
-            # Corpus texts ayrı kaydet (çok büyük olabilir)
-            corpus_path = self.storage_dir / "corpus_texts.json"
-            with open(corpus_path, 'w', encoding='utf-8') as f:
-                json.dump(self.corpus_texts, f, ensure_ascii=False)
-            
-            print(f"💾 Model saved: {self.model_path}")
-            
-        except Exception as e:
-            print(f"❌ Model save error: {e}")
+            try:
+                await asyncio.to_thread(self._write_model_files, data, corpus_texts)
+                print(f"💾 Model saved: {self.model_path}")
+            except Exception as e:
+                print(f"❌ Model save error: {e}")
+    
+    def _write_model_files(self, data: Dict[str, Any], corpus_texts: List[str]):
+        """Pickle + korpus JSON'u temp dosya + os.replace ile yaz (thread'de)"""
+        tmp_path = self.model_path.with_name(f".{self.model_path.name}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f)
+        os.replace(tmp_path, self.model_path)
+        
+        # Corpus texts ayrı kaydet (çok büyük olabilir)
+        corpus_path = self.storage_dir / "corpus_texts.json"
+        tmp_path = corpus_path.with_name(f".{corpus_path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(corpus_texts, f, ensure_ascii=False)
+        os.replace(tmp_path, corpus_path)
     
     def _load_model(self):
         """Kaydedilmiş model'i yükle"""
@@ -429,7 +976,7 @@ class IncrementalNLPEngine:
             
             print(f"✅ Model loaded!")
             print(f"   Corpus size: {len(self.corpus_texts)}")
-            print(f"   Vocab size: {len(self.vectorizer.vocabulary_)}")
+            print(f"   Vocab size: {self._n_features()}")
             
         except Exception as e:
             print(f"❌ Model load error: {e}")
@@ -440,17 +987,35 @@ class IncrementalNLPEngine:
         return {
             "is_fitted": self.is_fitted,
             "corpus_size": len(self.corpus_texts),
-            "vocab_size": len(self.vectorizer.vocabulary_) if self.is_fitted else 0,
+            "mode": self.mode,
+            "vocab_size": self._n_features() if self.is_fitted else 0,
             "last_update": self.last_update.isoformat() if self.last_update else None,
-            "cache_size": len(self.reel_vectors_cache),
+            "vector_store": self.vector_store.get_stats(),
             "refit_counter": self.counter,
             "next_refit_in": self.refit_threshold - self.counter,
-            "max_features": self.vectorizer.max_features if self.is_fitted else 0
+            "max_features": getattr(self.vectorizer, "max_features", None) or self._n_features(),
+            "online_idf": self.online_idf.get_stats() if self.online_idf is not None else None,
+            "user_profiles": {**self.profile_stats, "cached": len(self.user_profiles)},
+            "ann": {**self.ann_stats, **self.ann_index.get_stats()},
+            "refit": {
+                **self.refit_stats,
+                "total_duration_seconds": round(self.refit_stats["total_duration_seconds"], 3),
+                "in_progress": self.refit_in_progress,
+                # Çalışan + birleştirilmiş bekleyen istek
+                "queue_depth": int(self.refit_in_progress) + int(self._refit_pending),
+                "backend": "process" if settings.nlp_refit_in_process else "thread"
+            }
         }
     
     def clear_cache(self):
-        """Cache'i temizle"""
-        self.reel_vectors_cache.clear()
+        """Reel vektör store'unu sıfırla (vektörler erişildikçe yeniden eklenir)"""
+        if self.is_fitted or self.online_idf is not None:
+            self.vector_store.reset(self._model_version(), self._n_features())
+            self.ann_index.reset()
+            if self.online_idf is not None:
+                self.online_idf.reset()
+        else:
+            self.vector_store.reset()
         print("🗑️ Cache cleared")
 
 
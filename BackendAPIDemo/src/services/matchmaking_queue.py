@@ -2,11 +2,21 @@
 """
 Matchmaking Queue - Hafıza Tabanlı Basit Queue Sistemi
 Az kod çok iş: Bekleyen oyuncuları yönet, eşleştir
+
+Her kayıt kullanıcının son N günde izlediği reel set'ini tutar. Eşleşme
+sadece kuyrukta bekleyenlerle set kesişimiyle aranır (maliyet kuyruk
+boyutuyla sınırlı, toplam kullanıcı sayısından bağımsız).
+
+Background matcher (matcher_task): kuyruğa her yeni giren bir kez
+kuyruktakilerle karşılaştırılır; eşleşme olunca oyun oluşturulur ve iki
+oyuncuya matchmaking WebSocket'i üzerinden "matched" push edilir. Sunucu işi
+poll sayısıyla değil, katılma / eşleşme olaylarıyla orantılıdır.
 """
 
-from typing import Dict, Optional, List
+from typing import Deque, Dict, FrozenSet, Iterable, Optional, List, Set, Tuple
+from collections import deque
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import asyncio
 
 
@@ -18,6 +28,16 @@ class QueueEntry:
     min_common_reels: int
     joined_at: datetime
     common_reels_count: int = 0  # Cache için
+    recent_reels: FrozenSet[str] = field(default_factory=frozenset)  # Katılırken son N gün
+
+
+@dataclass
+class MatchResult:
+    """Tamamlanan eşleşme (polling client'ları için kısa süre saklanır)"""
+    game_id: str
+    opponent_id: str
+    matched_at: datetime
+    common_reels_count: int = 0
 
 
 class MatchmakingQueue:
@@ -29,6 +49,24 @@ class MatchmakingQueue:
     def __init__(self):
         self.queue: Dict[str, QueueEntry] = {}  # user_id -> entry
         self.timeout_seconds = 60  # 60 saniye timeout
+        self.result_ttl_seconds = 300  # Eşleşme sonucu poll ile bu süre okunabilir
+        
+        # Background matcher
+        self._new_entries: Deque[str] = deque()
+        self._wakeup = asyncio.Event()
+        self._match_tasks: Set[asyncio.Task] = set()
+        self.matcher_running = False
+        
+        # Oyun oluşturuluyor (kuyruktan çıktı, henüz active_games'te değil)
+        self.pending_matches: Dict[str, str] = {}   # user_id -> opponent_id
+        self.match_results: Dict[str, MatchResult] = {}
+        self.last_expired: List[str] = []
+        
+        # Metrics
+        self.match_attempts = 0
+        self.entries_compared = 0
+        self.matches_made = 0
+        
         print("✅ Matchmaking Queue initialized")
     
     
@@ -37,24 +75,36 @@ class MatchmakingQueue:
         user_id: str, 
         days: int, 
         min_common_reels: int,
-        common_reels_count: int = 0
+        common_reels_count: int = 0,
+        recent_reels: Iterable[str] = ()
     ) -> bool:
         """
         Kullanıcıyı queue'ya ekle
+        
+        recent_reels: Kullanıcının son `days` günde izlediği reel ID'leri
+        (kuyruk içi eşleştirmede kullanılır)
+        
         Returns: True if added, False if already in queue
         """
-        if user_id in self.queue:
-            # Zaten queue'da
+        if user_id in self.queue or user_id in self.pending_matches:
+            # Zaten queue'da (veya oyunu hazırlanıyor)
             return False
         
+        self.match_results.pop(user_id, None)
+        
         self.queue[user_id] = QueueEntry(
             user_id=user_id,
             days=days,
             min_common_reels=min_common_reels,
             joined_at=datetime.now(),
-            common_reels_count=common_reels_count
+            common_reels_count=common_reels_count,
+            recent_reels=frozenset(recent_reels)
         )
         
+        # Background matcher'ı uyandır
+        self._new_entries.append(user_id)
+        self._wakeup.set()
+        
         print(f"➕ Added to queue: {user_id} (Queue size: {len(self.queue)})")
         return True
     
@@ -91,6 +141,163 @@ class MatchmakingQueue:
         return None
     
     
+    def find_best_match(
+        self,
+        user_id: str,
+        recent_reels: Optional[Iterable[str]] = None,
+        min_common_reels: Optional[int] = None
+    ) -> Optional[Tuple[str, int]]:
+        """
+        Kuyruktakiler arasında en çok ortak reel'i olan rakibi bul
+        
+        Args:
+            user_id: Eşleşme arayan kullanıcı
+            recent_reels: Son N günde izlenen reels (None = kuyruk kaydındaki set)
+            min_common_reels: Minimum ortak reel (None = kuyruk kaydındaki değer)
+        
+        Returns:
+            (rakip user_id, ortak reel sayısı) veya None.
+            Her iki tarafın min_common_reels şartı da sağlanmalı; eşitlikte
+            daha uzun bekleyen seçilir.
+        """
+        own = self.queue.get(user_id)
+        if recent_reels is None:
+            recent_reels = own.recent_reels if own else frozenset()
+        if min_common_reels is None:
+            min_common_reels = own.min_common_reels if own else 0
+        
+        reels = recent_reels if isinstance(recent_reels, (set, frozenset)) else set(recent_reels)
+        if not reels:
+            return None
+        
+        self.match_attempts += 1
+        best: Optional[Tuple[str, int]] = None
+        
+        # Queue dict'i katılma sırasında → eşitlikte ilk bulunan en uzun bekleyen
+        for candidate_id, entry in self.queue.items():
+            if candidate_id == user_id:
+                continue
+            self.entries_compared += 1
+            common = len(reels & entry.recent_reels)
+            if common < max(min_common_reels, entry.min_common_reels):
+                continue
+            if best is None or common > best[1]:
+                best = (candidate_id, common)
+        
+        if best:
+            print(f"🎯 Match found: {user_id} <-> {best[0]} ({best[1]} common reels)")
+        return best
+    
+    
+    async def complete_match(
+        self,
+        user_id: str,
+        opponent_id: str,
+        days: int = 6,
+        question_count: int = 8
+    ):
+        """
+        Eşleşmeyi tamamla: kuyruktan çıkar, oyun oluştur, iki oyuncuya push et
+        
+        Hata durumunda iki oyuncuya "match_failed" gönderilir ve hata yükseltilir.
+        """
+        from .game_service import game_service
+        from .game_websocket import game_ws_manager
+        
+        self.remove_from_queue(opponent_id)
+        self.remove_from_queue(user_id)
+        self.pending_matches[user_id] = opponent_id
+        self.pending_matches[opponent_id] = user_id
+        
+        try:
+            game_session = await game_service.create_game_session(
+                player1_id=user_id,
+                player2_id=opponent_id,
+                days=days,
+                question_count=question_count
+            )
+        except Exception as e:
+            for player in (user_id, opponent_id):
+                await game_ws_manager.send_matchmaking_event(player, {
+                    "type": "match_failed",
+                    "message": f"Oyun oluşturulamadı: {e}"
+                })
+            raise
+        finally:
+            self.pending_matches.pop(user_id, None)
+            self.pending_matches.pop(opponent_id, None)
+        
+        now = datetime.now()
+        common_count = len(game_session.questions)
+        for player, opponent in ((user_id, opponent_id), (opponent_id, user_id)):
+            self.match_results[player] = MatchResult(game_session.game_id, opponent, now, common_count)
+            await game_ws_manager.send_matchmaking_event(player, {
+                "type": "matched",
+                "game_id": game_session.game_id,
+                "opponent_id": opponent,
+                "common_reels_count": common_count,
+                "message": "Rakip bulundu!"
+            })
+        
+        self.matches_made += 1
+        print(f"✅ Match completed: {user_id} <-> {opponent_id} ({game_session.game_id})")
+        return game_session
+    
+    
+    def get_match_result(self, user_id: str) -> Optional[MatchResult]:
+        """Kullanıcının son eşleşme sonucu (TTL içinde)"""
+        result = self.match_results.get(user_id)
+        if result and (datetime.now() - result.matched_at).total_seconds() > self.result_ttl_seconds:
+            del self.match_results[user_id]
+            return None
+        return result
+    
+    
+    async def run_matcher(self):
+        """
+        Yeni girenleri kuyruktakilerle eşleştir (event-driven)
+        
+        Sadece add_to_queue ile uyanır; boş kuyrukta / poll'larda iş yapmaz.
+        Oyun oluşturma (AI senaryoları) ayrı task'ta çalışır, matcher beklemez.
+        """
+        self.matcher_running = True
+        print("✅ Matchmaking matcher started")
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                
+                while self._new_entries:
+                    user_id = self._new_entries.popleft()
+                    entry = self.queue.get(user_id)
+                    if entry is None:
+                        continue  # Bu arada eşleşti / çıktı
+                    
+                    match = self.find_best_match(user_id)
+                    if not match:
+                        continue
+                    
+                    opponent_id, _ = match
+                    # Kuyruktan hemen çıkar: aynı rakip iki kez eşleşmesin
+                    self.remove_from_queue(opponent_id)
+                    self.remove_from_queue(user_id)
+                    self.pending_matches[user_id] = opponent_id
+                    self.pending_matches[opponent_id] = user_id
+                    
+                    task = asyncio.create_task(self._complete_in_background(user_id, opponent_id, entry.days))
+                    self._match_tasks.add(task)
+                    task.add_done_callback(self._match_tasks.discard)
+        finally:
+            self.matcher_running = False
+    
+    
+    async def _complete_in_background(self, user_id: str, opponent_id: str, days: int):
+        try:
+            await self.complete_match(user_id, opponent_id, days=days)
+        except Exception as e:
+            print(f"❌ Background match failed ({user_id} <-> {opponent_id}): {e}")
+    
+    
     def get_queue_info(self, user_id: str) -> Optional[Dict]:
         """
         Kullanıcının queue bilgisini getir
@@ -124,10 +331,30 @@ class MatchmakingQueue:
         for user_id in expired:
             self.remove_from_queue(user_id)
             print(f"⏱️ Timeout: {user_id}")
+        self.last_expired = expired
+        
+        # Süresi dolan eşleşme sonuçları
+        for user_id in [
+            user_id for user_id, result in self.match_results.items()
+            if (now - result.matched_at).total_seconds() > self.result_ttl_seconds
+        ]:
+            del self.match_results[user_id]
         
         return len(expired)
     
     
+    def get_stats(self) -> Dict:
+        """Queue metrikleri"""
+        return {
+            "queue_size": len(self.queue),
+            "match_attempts": self.match_attempts,
+            "entries_compared": self.entries_compared,
+            "matches_made": self.matches_made,
+            "pending_matches": len(self.pending_matches) // 2,
+            "matcher_running": self.matcher_running
+        }
+    
+    
     def get_queue_size(self) -> int:
         """Queue boyutunu döndür"""
         return len(self.queue)
@@ -144,7 +371,20 @@ matchmaking_queue = MatchmakingQueue()
 
 # Background task: Her 10 saniyede expired temizle
 async def cleanup_task():
-    """Background task: Expired entries temizle"""
+    """Background task: Expired entries temizle, WebSocket'teki bekleyenlere bildir"""
+    from .game_websocket import game_ws_manager
+    
     while True:
         await asyncio.sleep(10)
-        matchmaking_queue.cleanup_expired()
\ No newline at end of file
+        matchmaking_queue.cleanup_expired()
+        for user_id in matchmaking_queue.last_expired:
+            await game_ws_manager.send_matchmaking_event(user_id, {
+                "type": "queue_timeout",
+                "message": "Rakip bulunamadı, tekrar deneyin."
+            })
+
+
+# Background task: Yeni girenleri eşleştir, sonucu push et
+async def matcher_task():
+    """Background task: Event-driven matcher"""
+    await matchmaking_queue.run_matcher()
\ No newline at end of file
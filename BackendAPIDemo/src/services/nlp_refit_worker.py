@@ -0,0 +1,31 @@
+# ================================
+# src/services/nlp_refit_worker.py - TF-IDF Refit Worker
+# ================================
+
+"""
+Process pool içinde çalışan TF-IDF fit fonksiyonu
+
+Bu modül bilerek hafif tutulur (config, servis, global instance import etmez):
+worker process'ler sadece bu modülü import eder.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+def fit_vectorizer(texts: List[str], params: Dict[str, Any]) -> Tuple[TfidfVectorizer, Any]:
+    """
+    Vectorizer'ı korpus üzerinde fit et ve korpusu vektörleştir
+
+    Args:
+        texts: Korpus metinleri (satır sırası = reel sırası)
+        params: TfidfVectorizer parametreleri
+
+    Returns:
+        (fitted vectorizer, float32 CSR matrix)
+    """
+    vectorizer = TfidfVectorizer(**params)
+    matrix = vectorizer.fit_transform(texts).astype(np.float32)
+    return vectorizer, matrix
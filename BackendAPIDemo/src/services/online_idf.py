@@ -0,0 +1,79 @@
+# ================================
+# src/services/online_idf.py - Online Document Frequency / IDF
+# ================================
+
+"""
+HashingVectorizer için online IDF
+
+Feature hashing'de vocabulary yoktur; IDF de fit edilmez. Bunun yerine her
+yeni dokümanda (reel) document frequency sayaçları artırılır:
+
+    df[j]  += 1   (doküman j. feature'ı içeriyorsa)
+    idf[j]  = ln((1 + n_docs) / (1 + df[j])) + 1   (sklearn smooth_idf ile aynı)
+
+Reel vektörleri ham TF olarak saklanır (korpus büyüse de değişmez),
+IDF ağırlığı skorlama anında uygulanır.
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+try:
+    from sklearn.preprocessing import normalize
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+
+class OnlineIDF:
+    """Hashed feature uzayında artımlı document frequency"""
+
+    def __init__(self, n_features: int):
+        self.n_features = n_features
+        self.df = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+        self._idf: Optional[np.ndarray] = None  # add() ile geçersiz olur
+
+    def add(self, rows):
+        """Yeni doküman satırlarını say - O(nnz)"""
+        rows = rows.tocsr()
+        rows.sum_duplicates()
+        np.add.at(self.df, rows.indices, 1)
+        self.n_docs += rows.shape[0]
+        self._idf = None
+
+    def reset_from(self, matrix):
+        """Tüm korpus matrix'inden sayaçları yeniden hesapla (startup/rebuild)"""
+        matrix = matrix.tocsr()
+        self.df = np.bincount(
+            np.asarray(matrix.indices), minlength=self.n_features
+        ).astype(np.int64)
+        self.n_docs = matrix.shape[0]
+        self._idf = None
+
+    def reset(self):
+        self.df = np.zeros(self.n_features, dtype=np.int64)
+        self.n_docs = 0
+        self._idf = None
+
+    @property
+    def idf(self) -> np.ndarray:
+        if self._idf is None:
+            self._idf = (
+                np.log((1.0 + self.n_docs) / (1.0 + self.df)) + 1.0
+            ).astype(np.float32)
+        return self._idf
+
+    def transform(self, rows):
+        """Ham TF satırlarını TF-IDF'e çevir ve L2 normalize et"""
+        weighted = rows.tocsr().astype(np.float32, copy=True)
+        weighted.data *= self.idf[weighted.indices]
+        return normalize(weighted, norm='l2', copy=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "n_docs": self.n_docs,
+            "n_features": self.n_features,
+            "active_features": int(np.count_nonzero(self.df))
+        }
@@ -0,0 +1,349 @@
+# ================================
+# src/services/profile_kv_store.py - Sharded Profile KV Store + LRU Cache
+# ================================
+
+"""
+Kullanıcı başına JSON dosyası yerine sharded SQLite key-value store
+
+    user_profiles/{user_id}.json × 500k  →  user_profiles/shard_00..15.db
+
+- ShardedKVStore: key → JSON, crc32(key) % shards ile shard seçilir.
+  Her shard WAL modunda ayrı bir SQLite dosyası; updated_at index'li.
+- CachedProfileStore: üstünde LRU sınırlı obje cache'i. Değişiklikler
+  write-behind flusher ile batch halinde (shard başına tek transaction) yazılır.
+  Startup'ta son aktif kullanıcılar önceden yüklenir (warm-up).
+  Request path'leri aget() kullanır: cache miss'teki disk okuması thread'de.
+
+Eski {user_id}.json dosyaları store boşsa ilk açılışta bir kez import edilir.
+"""
+
+from typing import Any, Callable, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+from collections import OrderedDict
+from pathlib import Path
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+from .write_behind import write_behind
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key        TEXT PRIMARY KEY,
+    data       TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_kv_updated_at ON kv(updated_at);
+"""
+
+T = TypeVar("T")
+
+
+class ShardedKVStore:
+    """
+    key → JSON string, N SQLite shard'ına dağıtılmış
+
+    Usage:
+        store = ShardedKVStore(Path("outputs/user_profiles"), shards=16)
+        store.put_many([("user_1", '{"...": 1}')])
+        store.get("user_1")
+    """
+
+    def __init__(self, directory: Path, shards: int = 16):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.shards = shards
+
+        self._conns: List[sqlite3.Connection] = []
+        self._locks: List[threading.Lock] = []
+        for shard in range(shards):
+            conn = sqlite3.connect(
+                str(self.directory / f"shard_{shard:02d}.db"),
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            conn.commit()
+            self._conns.append(conn)
+            self._locks.append(threading.Lock())
+
+        # Metrics
+        self.reads = 0
+        self.rows_written = 0
+        self.batches_written = 0
+
+    def shard_of(self, key: str) -> int:
+        """Process'ler arası sabit shard seçimi (hash() randomize olduğu için crc32)"""
+        return zlib.crc32(key.encode('utf-8')) % self.shards
+
+    # ============ READ ============
+
+    def get(self, key: str) -> Optional[str]:
+        shard = self.shard_of(key)
+        with self._locks[shard]:
+            row = self._conns[shard].execute(
+                "SELECT data FROM kv WHERE key = ?", (key,)
+            ).fetchone()
+        self.reads += 1
+        return row[0] if row else None
+
+    def recent(self, limit: int, since: Optional[float] = None) -> List[Tuple[str, str]]:
+        """En son güncellenen kayıtlar (tüm shard'lar birleştirilir) - warm-up için"""
+        rows: List[Tuple[float, str, str]] = []
+        for shard, conn in enumerate(self._conns):
+            with self._locks[shard]:
+                rows.extend(conn.execute(
+                    "SELECT updated_at, key, data FROM kv WHERE updated_at >= ? "
+                    "ORDER BY updated_at DESC LIMIT ?",
+                    (since or 0.0, limit)
+                ).fetchall())
+        rows.sort(reverse=True)
+        return [(key, data) for _, key, data in rows[:limit]]
+
+    def count(self) -> int:
+        total = 0
+        for shard, conn in enumerate(self._conns):
+            with self._locks[shard]:
+                total += conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+        return total
+
+    def is_empty(self) -> bool:
+        for shard, conn in enumerate(self._conns):
+            with self._locks[shard]:
+                if conn.execute("SELECT 1 FROM kv LIMIT 1").fetchone():
+                    return False
+        return True
+
+    # ============ WRITE ============
+
+    def put_many(self, items: List[Tuple[str, str]], updated_at: Optional[float] = None):
+        """Batch upsert - shard başına tek transaction"""
+        now = updated_at or time.time()
+        by_shard: Dict[int, List[Tuple[str, str, float]]] = {}
+        for key, data in items:
+            by_shard.setdefault(self.shard_of(key), []).append((key, data, now))
+
+        for shard, rows in by_shard.items():
+            with self._locks[shard]:
+                conn = self._conns[shard]
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO kv (key, data, updated_at) VALUES (?, ?, ?)",
+                        rows
+                    )
+            self.rows_written += len(rows)
+            self.batches_written += 1
+
+    def import_json_files(self, pattern: str, key_from_path: Callable[[Path], str]) -> int:
+        """
+        Eski dosya başına JSON formatını import et (store boşken, bir kez)
+
+        Dosyalar silinmez; store dolu olduğu sürece tekrar okunmaz.
+        """
+        items = []
+        for path in self.directory.glob(pattern):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    items.append((key_from_path(path), json.dumps(json.load(f), ensure_ascii=False)))
+            except Exception as e:
+                print(f"⚠️ Skipping unreadable profile file {path.name}: {e}")
+
+        for start in range(0, len(items), 1000):
+            # Dosyanın mtime'ı yerine import anı: warm-up sırası önemsiz
+            self.put_many(items[start:start + 1000])
+        return len(items)
+
+    def close(self):
+        for conn in self._conns:
+            conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "shards": self.shards,
+            "directory": str(self.directory),
+            "reads": self.reads,
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written
+        }
+
+
+class CachedProfileStore(Generic[T]):
+    """
+    ShardedKVStore + LRU obje cache + write-behind batch flush
+
+    Usage:
+        store = CachedProfileStore("user_preferences", directory, UserPreference.from_dict,
+                                   lambda p: p.to_dict(), capacity=50000)
+        pref = store.get(user_id)      # cache → KV (senkron)
+        pref = await store.aget(user_id)  # request path'i: KV okuması thread'de
+        store.put(user_id, pref)       # cache'e yaz, kirli işaretle
+    """
+
+    def __init__(
+        self,
+        name: str,
+        directory: Path,
+        load: Callable[[Dict[str, Any]], T],
+        dump: Callable[[T], Dict[str, Any]],
+        capacity: int,
+        shards: int = 16
+    ):
+        self.name = name
+        self.load = load
+        self.dump = dump
+        self.capacity = capacity
+
+        self.kv = ShardedKVStore(directory, shards=shards)
+        self.cache: "OrderedDict[str, T]" = OrderedDict()
+
+        self._dirty: Set[str] = set()
+        # Serileştirilmiş ama henüz yazılmamış kayıtlar (cache'ten düşenler dahil)
+        self._unflushed: Dict[str, Dict[str, Any]] = {}
+        self._flushing: Dict[str, Dict[str, Any]] = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        write_behind.register(
+            f"profile_store:{name}",
+            self._collect_batch,
+            after_flush=self._on_flushed,
+            write=self._write_batch
+        )
+
+    # ============ READ ============
+
+    def get(self, key: str) -> Optional[T]:
+        """Cache → yazılmamış kayıtlar → KV"""
+        obj = self._cache_hit(key)
+        if obj is not None:
+            return obj
+
+        self.misses += 1
+        data = self._unflushed.get(key)
+        if data is None:
+            raw = self.kv.get(key)
+            if raw is None:
+                return None
+            data = json.loads(raw)
+        return self._load(key, data)
+
+    async def aget(self, key: str) -> Optional[T]:
+        """get() ile aynı; cache miss'te SQLite okuması thread'de (event loop bloklanmaz)"""
+        obj = self._cache_hit(key)
+        if obj is not None:
+            return obj
+
+        self.misses += 1
+        data = self._unflushed.get(key)
+        if data is None:
+            raw = await asyncio.to_thread(self.kv.get, key)
+
+            # Okuma sırasında başka bir request yüklemiş / yazmış olabilir: o daha yeni
+            obj = self.cache.get(key)
+            if obj is not None:
+                return obj
+            data = self._unflushed.get(key)
+            if data is None:
+                if raw is None:
+                    return None
+                data = json.loads(raw)
+        return self._load(key, data)
+
+    # ============ WRITE ============
+
+    def put(self, key: str, obj: T, dirty: bool = True):
+        """Cache'e yaz; dirty ise bir sonraki flush'ta KV'ye yazılır"""
+        self._remember(key, obj)
+        if dirty:
+            self._dirty.add(key)
+            write_behind.mark_dirty(f"profile_store:{self.name}")
+
+    def warm_up(self, limit: int, since: Optional[float] = None) -> int:
+        """Son aktif kullanıcıları cache'e yükle (startup)"""
+        loaded = 0
+        rows = self.kv.recent(min(limit, self.capacity), since)
+        
+        # recent() yeniden eskiye döner; en yeni LRU'nun sonunda olmalı
+        for key, raw in reversed(rows):
+            if key in self.cache:
+                continue
+            try:
+                self.cache[key] = self.load(json.loads(raw))
+                loaded += 1
+            except Exception as e:
+                print(f"⚠️ Warm-up skip ({self.name}/{key}): {e}")
+        return loaded
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "cached": len(self.cache),
+            "capacity": self.capacity,
+            "dirty": len(self._dirty),
+            "unflushed": len(self._unflushed),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.evictions,
+            "kv": self.kv.get_stats()
+        }
+
+    # ============ HELPERS ============
+
+    def _cache_hit(self, key: str) -> Optional[T]:
+        obj = self.cache.get(key)
+        if obj is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+        return obj
+
+    def _load(self, key: str, data: Dict[str, Any]) -> Optional[T]:
+        try:
+            obj = self.load(data)
+        except Exception as e:
+            print(f"❌ Profile load error ({self.name}/{key}): {e}")
+            return None
+
+        self._remember(key, obj)
+        return obj
+
+    def _remember(self, key: str, obj: T):
+        self.cache[key] = obj
+        self.cache.move_to_end(key)
+
+        while len(self.cache) > self.capacity:
+            old_key, old_obj = self.cache.popitem(last=False)
+            self.evictions += 1
+            # Kirli obje düşerken serileştirilir, flush'ta yazılır
+            if old_key in self._dirty:
+                self._dirty.discard(old_key)
+                self._unflushed[old_key] = self.dump(old_obj)
+
+    def _collect_batch(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Write-behind: kirli kayıtları event loop üzerinde serileştir"""
+        for key in self._dirty:
+            obj = self.cache.get(key)
+            if obj is not None:
+                self._unflushed[key] = self.dump(obj)
+        self._dirty.clear()
+        self._flushing = dict(self._unflushed)
+        return list(self._flushing.items())
+
+    def _write_batch(self, payload: List[Tuple[str, str]]):
+        """Thread'de: batch'i KV'ye yaz"""
+        if payload:
+            self.kv.put_many(payload)
+
+    def _on_flushed(self):
+        """Yazılanları çıkar (yazma sırasında cache'ten düşüp yeniden serileştirilenler kalır)"""
+        for key, data in self._flushing.items():
+            if self._unflushed.get(key) is data:
+                del self._unflushed[key]
+        self._flushing = {}
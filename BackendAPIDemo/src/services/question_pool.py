@@ -0,0 +1,380 @@
+# ================================
+# src/services/question_pool.py - Pre-generated Game Question Pool
+# ================================
+
+"""
+Oyun soruları için önceden üretilmiş havuz
+
+Eskiden eşleşmeden sonra iki oyuncu beklerken tek bir OpenAI çağrısı
+(25 sn timeout) ile 8 soru üretiliyordu. Artık:
+
+- Reel yayınlanınca background generator kuyruğuna girer; sorular
+  batch halinde üretilip diske yazılır (ShardedKVStore, key = reel_id)
+- Kayıt haberin içerik hash'i ve üreticinin adıyla birlikte saklanır;
+  başlık / özet değişirse veya üretici değişirse (stub → openai) yeniden üretilir
+- create_game_session soruları havuzdan milisaniyede toplar; sadece cache
+  miss'ler için model çağrılır
+- Emoji yorumları sabit tablodan gelir (model gerekmez)
+
+Üreticiler:
+- OpenAIQuestionLLM: gpt-4o-mini, JSON çıktısı
+- StubQuestionLLM: yerel, ağsız, deterministik (test / API key yok)
+  settings.game_question_llm = "stub" ile zorlanır
+"""
+
+from typing import Any, Dict, List, Optional, Set
+from datetime import datetime, timedelta
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import time
+
+from ..config import settings
+from .profile_kv_store import ShardedKVStore
+
+
+# Cevaplayanın emojisine göre yorum (answer endpoint emoji ile okur)
+EMOJI_COMMENTS = {
+    "❤️": "Ben de çok beğenmiştim bu haberi!",
+    "😢": "Gerçekten üzücüydü",
+    "👍": "Aynen, çok iyi gelişme",
+    "😮": "Ben de çok şaşırmıştım",
+    "😡": "Gerçekten sinir bozucuydu",
+    "🔥": "Çok heyecan vericiydi!",
+}
+
+QUESTION_FIELDS = (
+    "question", "correct_option", "wrong_option",
+    "correct_response", "wrong_response", "pass_response"
+)
+
+SYSTEM_PROMPT = (
+    "Sen Türkçe haber quiz oyunu için doğal ve samimi diyaloglar üreten bir asistansın. "
+    "Cevaplar konuşma tarzında, kısa ve doğal olmalı."
+)
+
+
+def content_hash(title: str, summary: str) -> str:
+    """Haber içeriği değişirse soru yeniden üretilir"""
+    return hashlib.sha1(f"{title}\n{summary}".encode("utf-8")).hexdigest()
+
+
+def reel_item(reel) -> Dict[str, Any]:
+    """Üreticiye giden haber bilgisi"""
+    return {
+        "reel_id": reel.id,
+        "title": reel.news_data.title,
+        "summary": (reel.news_data.summary or "")[:300],
+        "content_hash": content_hash(reel.news_data.title, reel.news_data.summary or "")
+    }
+
+
+# ============ GENERATORS ============
+
+class StubQuestionLLM:
+    """Yerel, ağsız soru üretici - testler ve API key olmayan ortamlar için"""
+
+    name = "stub"
+
+    async def generate(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        questions = []
+        for index, item in enumerate(items):
+            title = item["title"]
+            summary = item["summary"] or title
+            short_summary = summary[:120] + "..." if len(summary) > 120 else summary
+            questions.append({
+                "index": index,
+                "question": f"{title} haberini duydun mu?",
+                "correct_option": f"Evet evet, {short_summary}",
+                "wrong_option": "Hayır hayır, öyle bir şey olmamıştı sanki",
+                "correct_response": "Evet evet, doğru bildin!",
+                "wrong_response": f"Yok ya, yanlış hatırlıyorsun sanki. Doğrusu şöyleydi: {short_summary}",
+                "pass_response": f"Haber şöyleydi: {short_summary}"
+            })
+        return questions
+
+
+class OpenAIQuestionLLM:
+    """OpenAI ile batch soru üretimi (tek çağrıda birden fazla haber)"""
+
+    name = "openai"
+
+    def __init__(self, api_key: str, model: str):
+        from openai import AsyncOpenAI  # lazy
+        self.client = AsyncOpenAI(api_key=api_key)
+        self.model = model
+
+    async def generate(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": self._build_prompt(items)}
+            ],
+            temperature=0.7,
+            max_tokens=250 * len(items) + 200,
+            response_format={"type": "json_object"}
+        )
+        output = json.loads(response.choices[0].message.content)
+        return output.get("questions", [])
+
+    @staticmethod
+    def _build_prompt(items: List[Dict[str, Any]]) -> str:
+        news_list = [
+            {"index": i, "title": item["title"], "summary": item["summary"]}
+            for i, item in enumerate(items)
+        ]
+        return f"""Sen bir haber quiz oyunu için SABİT FORMATTA cevaplar üreten bir asistansın.
+
+        HABERLER ({len(items)} adet):
+        {json.dumps(news_list, ensure_ascii=False, indent=2)}
+
+        GÖREV:
+        Her haber için SABİT FORMATTA diyalog senaryosu oluştur.
+        Her çıktı objesinde ilgili haberin "index" değerini AYNEN tekrar et.
+
+        🔥 ÖNEMLİ KURALLAR:
+
+        1. SORU FORMATI (DEĞİŞMEZ):
+        "[Haber başlığı] haberini duydun mu?"
+
+        2. CEVAP SEÇENEKLERİ:
+        - DOĞRU seçenek: "Evet evet, [haberin gerçek bir detayı 40-60 kelime]"
+        - YANLIŞ seçenek: "Hayır hayır, [mantıklı ama yanlış detay 40-60 kelime]"
+
+        3. DOĞRU CEVAP MESAJI (SABİT):
+        "Evet evet, doğru bildin!"
+
+        4. YANLIŞ CEVAP MESAJI (DOĞRUYU SÖYLE):
+        "Yok ya, yanlış hatırlıyorsun sanki. Doğrusu şöyleydi: [haberin gerçek özeti 30-50 kelime]"
+
+        5. PAS GEÇ MESAJI:
+        "Haber şöyleydi: [haberin özeti 30-50 kelime]"
+
+        JSON formatında dön:
+        {{
+        "questions": [
+            {{
+            "index": 0,
+            "question": "[Haber başlığı] haberini duydun mu?",
+            "correct_option": "Evet evet, [gerçek detay]",
+            "wrong_option": "Hayır hayır, [yanlış detay]",
+            "correct_response": "Evet evet, doğru bildin!",
+            "wrong_response": "Yok ya, yanlış hatırlıyorsun sanki. Doğrusu şöyleydi: [gerçek özet]",
+            "pass_response": "Haber şöyleydi: [özet]"
+            }},
+            ...
+        ]
+        }}
+        """
+
+
+def create_question_llm():
+    """settings.game_question_llm'e göre üretici (API key yoksa stub)"""
+    if settings.game_question_llm == "stub" or not settings.openai_api_key:
+        return StubQuestionLLM()
+    try:
+        return OpenAIQuestionLLM(settings.openai_api_key, settings.game_question_model)
+    except ImportError:
+        print("⚠️ openai package not available, using stub question generator")
+        return StubQuestionLLM()
+
+
+# ============ POOL ============
+
+class QuestionPool:
+    """
+    reel_id → önceden üretilmiş soru adayı
+
+    Usage:
+        question_pool.enqueue(reel)                     # yayınlanınca (background)
+        found = await question_pool.get_or_generate(reels)  # {reel_id: question dict}
+    """
+
+    def __init__(self, directory: Path, llm=None):
+        self.kv = ShardedKVStore(directory, shards=4)
+        self.llm = llm or create_question_llm()
+
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._queued: Set[str] = set()
+        self.generator_running = False
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.llm_calls = 0
+        self.llm_failures = 0
+        self.last_llm_seconds = 0.0
+
+    # ============ READ ============
+
+    async def get_many(self, reels: List) -> Dict[str, Dict[str, str]]:
+        """
+        Havuzdaki sorular {reel_id: soru} (içerik / üretici değiştiyse yok sayılır)
+
+        KV okumaları tek seferde thread'de yapılır (event loop bloklanmaz).
+        """
+        raws = await asyncio.to_thread(lambda: [self.kv.get(reel.id) for reel in reels])
+        found: Dict[str, Dict[str, str]] = {}
+        for reel, raw in zip(reels, raws):
+            question = self._valid_question(reel, raw)
+            if question is not None:
+                found[reel.id] = question
+        return found
+
+    async def get_or_generate(self, reels: List, timeout: Optional[float] = None) -> Dict[str, Dict[str, str]]:
+        """
+        Reels için soruları havuzdan topla; eksikleri tek model çağrısıyla üret
+
+        Üretim timeout / hata verirse eksikler sonuçta yer almaz
+        (çağıran template fallback kullanır).
+        """
+        found = await self.get_many(reels)
+        missing = [reel for reel in reels if reel.id not in found]
+
+        self.hits += len(found)
+        self.misses += len(missing)
+
+        if missing:
+            print(f"🧩 Question pool miss: {len(missing)}/{len(reels)} reels, generating")
+            try:
+                generated = await asyncio.wait_for(
+                    self._generate([reel_item(reel) for reel in missing]),
+                    timeout or settings.game_question_llm_timeout
+                )
+                found.update(generated)
+            except asyncio.TimeoutError:
+                self.llm_failures += 1
+                print(f"⏱️ Question generation timeout ({len(missing)} reels)")
+            except Exception as e:
+                self.llm_failures += 1
+                print(f"❌ Question generation failed: {e}")
+
+        return found
+
+    # ============ BACKGROUND GENERATOR ============
+
+    def enqueue(self, reel):
+        """Yayınlanan reel'i background üretime ekle (generator çalışmıyorsa no-op)"""
+        if not self.generator_running or reel.id in self._queued:
+            return
+        self._queued.add(reel.id)
+        self._queue.put_nowait(reel_item(reel))
+
+    async def run_generator(self):
+        """Kuyruktaki reels için batch halinde soru üret"""
+        self.generator_running = True
+        print(f"✅ Question pool generator started ({self.llm.name})")
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                while len(batch) < settings.game_question_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                for item in batch:
+                    self._queued.discard(item["reel_id"])
+
+                try:
+                    await asyncio.wait_for(self._generate(batch), settings.game_question_llm_timeout)
+                except Exception as e:
+                    self.llm_failures += 1
+                    print(f"❌ Background question generation failed ({len(batch)} reels): {e}")
+                    await asyncio.sleep(5)  # Model hatasında kuyruğu hızla tüketme
+        finally:
+            self.generator_running = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "generator": self.llm.name,
+            "generator_running": self.generator_running,
+            "queued": self._queue.qsize(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "generated": self.generated,
+            "llm_calls": self.llm_calls,
+            "llm_failures": self.llm_failures,
+            "last_llm_seconds": round(self.last_llm_seconds, 2)
+        }
+
+    # ============ HELPERS ============
+
+    def _valid_question(self, reel, raw: Optional[str]) -> Optional[Dict[str, str]]:
+        """KV kaydındaki soru (içerik hash'i / üretici eşleşmiyorsa None)"""
+        if raw is None:
+            return None
+        record = json.loads(raw)
+        item = reel_item(reel)
+        if record.get("content_hash") != item["content_hash"] or record.get("generator") != self.llm.name:
+            return None
+        return record["question"]
+
+    async def _generate(self, items: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+        """Üret, eksik alanları ele, diske yaz"""
+        started = time.perf_counter()
+        self.llm_calls += 1
+        outputs = await self.llm.generate(items)
+        self.last_llm_seconds = time.perf_counter() - started
+
+        # Çıktılar sıraya göre değil index'e göre eşlenir: model bir haberi atlar,
+        # birleştirir veya sırayı değiştirirse soru yanlış reel'e kaydedilmesin
+        by_index: Dict[int, Dict[str, Any]] = {}
+        duplicated: Set[int] = set()
+        for output in outputs:
+            if not isinstance(output, dict):
+                continue
+            index = output.get("index")
+            if isinstance(index, bool) or not isinstance(index, int) or not 0 <= index < len(items):
+                continue
+            if index in by_index:
+                duplicated.add(index)
+            by_index[index] = output
+        for index in duplicated:
+            del by_index[index]
+
+        generated: Dict[str, Dict[str, str]] = {}
+        rows = []
+        for index, output in sorted(by_index.items()):
+            item = items[index]
+            if not all(output.get(f) for f in QUESTION_FIELDS):
+                continue
+            question = {f: output[f] for f in QUESTION_FIELDS}
+            generated[item["reel_id"]] = question
+            rows.append((item["reel_id"], json.dumps({
+                "content_hash": item["content_hash"],
+                "generator": self.llm.name,
+                "generated_at": datetime.now().isoformat(),
+                "question": question
+            }, ensure_ascii=False)))
+
+        if rows:
+            await asyncio.to_thread(self.kv.put_many, rows)
+        self.generated += len(rows)
+        return generated
+
+
+# Global instance
+question_pool = QuestionPool(Path(settings.storage_base_path) / "game_questions")
+
+
+# Background task: Yayınlanan reels için soru üret
+async def question_pool_task():
+    """Generator + startup'ta oyun penceresindeki (son 6 gün) eksik reels"""
+    from .reels_analytics import reels_analytics
+
+    generator = asyncio.create_task(question_pool.run_generator())
+    await asyncio.sleep(0)  # generator_running set edilsin
+
+    backfill = 0
+    reels = await reels_analytics.get_published_reels_since(datetime.now() - timedelta(days=6))
+    pooled = await question_pool.get_many(reels)
+    for reel in reels:
+        if reel.id not in pooled:
+            question_pool.enqueue(reel)
+            backfill += 1
+    if backfill:
+        print(f"🧩 Question pool backfill: {backfill} reels queued")
+
+    await generator
@@ -0,0 +1,176 @@
+# ================================
+# src/services/reel_catalog_index.py - Time-Bucketed Reel Catalog Index
+# ================================
+
+"""
+Yayınlanmış reels için published_at sıralı katalog index'i
+
+reel_storage dict'i her "son N saat" / "şu tarihten beri" sorgusunda
+baştan taranıyordu. Bu index sadece PUBLISHED reels'i tutar:
+
+- (published_at, reel_id) anahtarları sıralı liste → bisect ile aralık sorgusu
+- Saatlik ve günlük bucket sayaçları → "o gün kaç reel" O(1)
+
+Reels çoğunlukla zaman sırasıyla geldiği için ekleme pratikte append'dir.
+Aynı sınıf kategori başına da kullanılır (kategori → sıralı reels + sayaç).
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def category_key(category: Optional[str]) -> str:
+    """Kategori index anahtarı (RSS'ten 'spor' / 'Spor' gibi farklı yazımlar gelebilir)"""
+    return (category or "").strip().lower()
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    """Saat başına yuvarla"""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class ReelCatalogIndex:
+    """
+    published_at sıralı reel_id index'i
+
+    Usage:
+        catalog.add(reel.id, reel.published_at)
+        catalog.ids_since(datetime.now() - timedelta(hours=3))  # yeniden eskiye
+        catalog.count_on_date(date.today())
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[datetime, str]] = []
+        self._published_at: Dict[str, datetime] = {}
+        self.hourly_counts: Counter = Counter()
+        self.daily_counts: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, reel_id: str) -> bool:
+        return reel_id in self._published_at
+
+    # ============ UPDATE ============
+
+    def add(self, reel_id: str, published_at: datetime):
+        """Reel'i index'e ekle (zaten varsa yeni tarihle günceller)"""
+        if reel_id in self._published_at:
+            self.remove(reel_id)
+
+        key = (published_at, reel_id)
+        if not self._keys or key >= self._keys[-1]:
+            self._keys.append(key)
+        else:
+            insort(self._keys, key)
+
+        self._published_at[reel_id] = published_at
+        self.hourly_counts[hour_bucket(published_at)] += 1
+        self.daily_counts[published_at.date()] += 1
+
+    def remove(self, reel_id: str) -> bool:
+        """Reel'i index'ten çıkar (unpublish/archive)"""
+        published_at = self._published_at.pop(reel_id, None)
+        if published_at is None:
+            return False
+
+        position = bisect_left(self._keys, (published_at, reel_id))
+        if position < len(self._keys) and self._keys[position] == (published_at, reel_id):
+            del self._keys[position]
+
+        self._decrement(self.hourly_counts, hour_bucket(published_at))
+        self._decrement(self.daily_counts, published_at.date())
+        return True
+
+    def rebuild(self, items: List[Tuple[str, datetime]]):
+        """Tüm index'i (reel_id, published_at) listesinden kur - startup"""
+        self._keys = sorted((published_at, reel_id) for reel_id, published_at in items)
+        self._published_at = {reel_id: published_at for published_at, reel_id in self._keys}
+        self.hourly_counts = Counter(hour_bucket(published_at) for published_at, _ in self._keys)
+        self.daily_counts = Counter(published_at.date() for published_at, _ in self._keys)
+
+    # ============ QUERIES ============
+
+    def ids_between(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        include_start: bool = True,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        """
+        [start, end) aralığındaki reel ID'leri, yeniden eskiye
+
+        Args:
+            start: Alt sınır (None = en eski)
+            end: Üst sınır, hariç (None = en yeni)
+            include_start: False ise start anındaki reels hariç (published_at > start)
+            limit: En fazla kaç ID
+        """
+        lo = 0
+        if start is not None:
+            lo = bisect_left(self._keys, (start,)) if include_start else self._upper(start)
+        hi = len(self._keys) if end is None else bisect_left(self._keys, (end,))
+
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        return [reel_id for _, reel_id in reversed(self._keys[lo:hi])]
+
+    def ids_since(self, since: datetime, inclusive: bool = True, limit: Optional[int] = None) -> List[str]:
+        """since'ten sonra yayınlananlar, yeniden eskiye"""
+        return self.ids_between(start=since, include_start=inclusive, limit=limit)
+
+    def ids_last_hours(self, hours: int, limit: Optional[int] = None) -> List[str]:
+        """Son N saatte yayınlananlar, yeniden eskiye"""
+        return self.ids_since(datetime.now() - timedelta(hours=hours), limit=limit)
+
+    def ids_on_date(self, target_date: date) -> List[str]:
+        """Belirli günde yayınlananlar, yeniden eskiye"""
+        day_start = datetime.combine(target_date, time.min)
+        return self.ids_between(day_start, day_start + timedelta(days=1))
+
+    def latest_ids(self, limit: int) -> List[str]:
+        """En yeni N reel"""
+        return self.ids_between(limit=limit)
+
+    def count_on_date(self, target_date: date) -> int:
+        """Günlük bucket sayacı - O(1)"""
+        return self.daily_counts.get(target_date, 0)
+
+    def count_since(self, since: datetime) -> int:
+        return len(self._keys) - bisect_left(self._keys, (since,))
+
+    def hourly_histogram(self, hours: int = 24) -> Dict[str, int]:
+        """Son N saatin saatlik yayın sayıları (eskiden yeniye)"""
+        current = hour_bucket(datetime.now())
+        histogram = {}
+        for offset in range(hours - 1, -1, -1):
+            bucket = current - timedelta(hours=offset)
+            histogram[bucket.isoformat()] = self.hourly_counts.get(bucket, 0)
+        return histogram
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "published_reels": len(self._keys),
+            "oldest": self._keys[0][0].isoformat() if self._keys else None,
+            "newest": self._keys[-1][0].isoformat() if self._keys else None,
+            "hourly_buckets": len(self.hourly_counts),
+            "daily_buckets": len(self.daily_counts)
+        }
+
+    # ============ HELPERS ============
+
+    def _upper(self, moment: datetime) -> int:
+        """published_at > moment olan ilk pozisyon"""
+        position = bisect_right(self._keys, (moment,))
+        while position < len(self._keys) and self._keys[position][0] == moment:
+            position += 1
+        return position
+
+    @staticmethod
+    def _decrement(counter: Counter, bucket):
+        counter[bucket] -= 1
+        if counter[bucket] <= 0:
+            del counter[bucket]
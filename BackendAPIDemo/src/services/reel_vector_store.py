@@ -0,0 +1,394 @@
+# ================================
+# src/services/reel_vector_store.py - Persistent Sparse Reel Vector Store
+# ================================
+
+"""
+Reel TF-IDF vektörleri için disk tabanlı sparse store
+
+CSR matrix bileşenleri ayrı binary dosyalarda tutulur ve np.memmap ile açılır.
+Restart'ta korpusu yeniden vektörleştirmeye gerek kalmaz.
+
+Dosyalar (outputs/models/reel_vectors/):
+    ids.txt      - Satır sırasıyla reel_id'ler (satır başına bir tane)
+    indptr.bin   - int64 satır offset'leri (ilk değer 0)
+    indices.bin  - int32 kolon index'leri
+    data.bin     - float32 değerler
+    meta.json    - {"model_version", "n_features", "rows"}
+
+Lifecycle:
+1. Model fit/refit: rebuild() ile tüm korpus yazılır (meta en son).
+   Refit'te stage() yan dizine thread'de yazar, adopt() sadece rename yapar
+2. Yeni reel: append() ile dosyaların sonuna eklenir (O(nnz))
+3. Startup: open() meta'daki model_version vectorizer ile eşleşiyorsa memmap
+
+Bellekte: memmap base + append edilen satır blokları. rows() satırları
+bloklardan toplar; base hiçbir zaman yeniden kopyalanmaz. Küçük bloklar
+binary-counter gibi birleştirilir (blok sayısı O(log n), satır başına
+amortize O(log n) kopya).
+"""
+
+from typing import Dict, List, Optional, Any
+from pathlib import Path
+import json
+import os
+
+import numpy as np
+
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+class ReelVectorStore:
+    """
+    Row-indexed (reel_id → satır) sparse vektör store
+
+    Usage:
+        store = ReelVectorStore(Path("outputs/models/reel_vectors"))
+        if not store.open(model_version, n_features):
+            store.rebuild(model_version, n_features, ids, matrix)
+        store.append(["reel_x"], vectorizer.transform(["..."]))
+        rows = store.rows([store.row_index["reel_x"]])
+    """
+
+    DATA_DTYPE = np.float32
+    INDEX_DTYPE = np.int32
+    INDPTR_DTYPE = np.int64
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self.ids_file = self.directory / "ids.txt"
+        self.indptr_file = self.directory / "indptr.bin"
+        self.indices_file = self.directory / "indices.bin"
+        self.data_file = self.directory / "data.bin"
+        self.meta_file = self.directory / "meta.json"
+
+        self.model_version: Optional[str] = None
+        self.n_features = 0
+
+        self.ids: List[str] = []
+        self.row_index: Dict[str, int] = {}
+
+        self._base = None                # Diskten açılmış (memmap) / rebuild CSR
+        self._blocks: List[Any] = []     # Base'den sonra append edilen CSR bloklar
+        self._block_starts: List[int] = []  # Her bloğun ilk global satırı
+        self._nnz = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, reel_id: str) -> bool:
+        return reel_id in self.row_index
+
+    @property
+    def matrix(self):
+        """
+        Tüm satırlar tek CSR matrix olarak
+
+        Append edilmiş blok varsa O(toplam nnz) kopya üretir: sadece
+        startup / rebuild gibi request dışı yollar için. Request yolu rows().
+        """
+        if self._base is None and not self._blocks:
+            return sparse.csr_matrix((0, self.n_features), dtype=self.DATA_DTYPE)
+        if not self._blocks:
+            return self._base
+        blocks = ([self._base] if self._base is not None else []) + self._blocks
+        return sparse.vstack(blocks, format='csr')
+
+    def rows(self, rows) -> Any:
+        """
+        Verilen global satırlar (sırası korunur) - O(seçilen nnz)
+
+        Args:
+            rows: Satır index'leri (array-like)
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        base_rows = self._base.shape[0] if self._base is not None else 0
+
+        if len(rows) == 0:
+            return sparse.csr_matrix((0, self.n_features), dtype=self.DATA_DTYPE)
+
+        # Hızlı yol: hepsi base'de (çoğu istek)
+        if not self._blocks or rows.max() < base_rows:
+            return self._base[rows] if self._base is not None else self.matrix[rows]
+
+        starts = np.array([0] + self._block_starts, dtype=np.int64)
+        blocks = [self._base] + self._blocks
+        owner = np.searchsorted(starts, rows, side='right') - 1
+
+        pieces = []
+        positions = []
+        for block_id in np.unique(owner):
+            mask = owner == block_id
+            pieces.append(blocks[block_id][rows[mask] - starts[block_id]])
+            positions.append(np.flatnonzero(mask))
+
+        if len(pieces) == 1:
+            return pieces[0]
+        stacked = sparse.vstack(pieces, format='csr')
+        return stacked[np.argsort(np.concatenate(positions), kind='stable')]
+
+    # ============ LOAD ============
+
+    def open(self, model_version: str, n_features: int) -> bool:
+        """
+        Diskteki store'u aç
+
+        Returns:
+            True: Store model ile uyumlu ve yüklendi
+            False: Store yok / farklı model → boş store (rebuild gerekli)
+        """
+        meta = self._read_meta()
+        if (
+            meta is None
+            or meta.get("model_version") != model_version
+            or meta.get("n_features") != n_features
+        ):
+            self.reset(model_version, n_features)
+            return False
+
+        try:
+            ids = self._read_ids()
+            indptr = self._memmap(self.indptr_file, self.INDPTR_DTYPE)
+
+            # Crash sırasında yarım kalmış append'leri at (ids en son yazılır)
+            n_rows = min(len(ids), max(len(indptr) - 1, 0))
+            if n_rows == 0:
+                self.reset(model_version, n_features)
+                return True
+
+            nnz = int(indptr[n_rows])
+            self._truncate_files(ids[:n_rows], n_rows, nnz)
+
+            self.model_version = model_version
+            self.n_features = n_features
+            self.ids = ids[:n_rows]
+            self.row_index = {reel_id: i for i, reel_id in enumerate(self.ids)}
+            self._blocks = []
+            self._block_starts = []
+            self._nnz = nnz
+
+            data = self._memmap(self.data_file, self.DATA_DTYPE)[:nnz]
+            indices = self._memmap(self.indices_file, self.INDEX_DTYPE)[:nnz]
+            self._base = sparse.csr_matrix(
+                (data, indices, indptr[:n_rows + 1]),
+                shape=(n_rows, n_features),
+                copy=False
+            )
+
+            print(f"✅ Reel vector store loaded: {n_rows} vectors (nnz: {nnz})")
+            return True
+
+        except Exception as e:
+            print(f"❌ Reel vector store load error: {e}")
+            self.reset(model_version, n_features)
+            return False
+
+    # ============ WRITE ============
+
+    def reset(self, model_version: Optional[str] = None, n_features: int = 0):
+        """Store'u boşalt (dosyalar dahil)"""
+        self.model_version = model_version
+        self.n_features = n_features
+        self.ids = []
+        self.row_index = {}
+        self._base = None
+        self._blocks = []
+        self._block_starts = []
+        self._nnz = 0
+
+        for path in (self.meta_file, self.ids_file, self.indptr_file, self.indices_file, self.data_file):
+            if path.exists():
+                path.unlink()
+
+        if model_version is not None:
+            self._write_arrays([], np.zeros(1, dtype=self.INDPTR_DTYPE),
+                               np.zeros(0, dtype=self.INDEX_DTYPE),
+                               np.zeros(0, dtype=self.DATA_DTYPE))
+            self._write_meta()
+
+    def rebuild(self, model_version: str, n_features: int, ids: List[str], matrix):
+        """
+        Tüm korpusu yeni model ile yaz (fit/refit sonrası)
+
+        Args:
+            ids: Satır sırasıyla reel ID'leri
+            matrix: vectorizer.transform(corpus) çıktısı
+        """
+        matrix = sparse.csr_matrix(matrix, dtype=self.DATA_DTYPE)
+        matrix.sort_indices()
+
+        # Önce meta silinir: yarıda kesilirse store geçersiz sayılır
+        if self.meta_file.exists():
+            self.meta_file.unlink()
+
+        self._write_arrays(
+            ids,
+            matrix.indptr.astype(self.INDPTR_DTYPE),
+            matrix.indices.astype(self.INDEX_DTYPE),
+            matrix.data
+        )
+
+        self.model_version = model_version
+        self.n_features = n_features
+        self.ids = list(ids)
+        self.row_index = {reel_id: i for i, reel_id in enumerate(self.ids)}
+        self._base = matrix
+        self._blocks = []
+        self._block_starts = []
+        self._nnz = int(matrix.nnz)
+
+        self._write_meta()
+        print(f"💾 Reel vector store rebuilt: {len(self.ids)} vectors (nnz: {self._nnz})")
+
+    def stage(self, model_version: str, n_features: int, ids: List[str], matrix) -> "ReelVectorStore":
+        """
+        Yeni modelin store'unu yan dizinde hazırla (thread'de çalışabilir)
+
+        Bu store'a dokunmaz: hazırlık sürerken append() eski dosyalara
+        devam eder. Sonuç adopt() ile devralınır.
+        """
+        staged = ReelVectorStore(self.directory.with_name(f"{self.directory.name}.staged"))
+        staged.rebuild(model_version, n_features, ids, matrix)
+        return staged
+
+    def adopt(self, staged: "ReelVectorStore"):
+        """
+        stage() çıktısını devral: dosyalar rename edilir, state referansları
+        değiştirilir (event loop'ta, veri kopyası yok)
+        """
+        # Önce meta silinir: yarıda kesilirse store geçersiz sayılır
+        if self.meta_file.exists():
+            self.meta_file.unlink()
+        for name in ("ids_file", "indptr_file", "indices_file", "data_file", "meta_file"):
+            os.replace(getattr(staged, name), getattr(self, name))
+
+        self.model_version = staged.model_version
+        self.n_features = staged.n_features
+        self.ids = staged.ids
+        self.row_index = staged.row_index
+        self._base = staged._base
+        self._blocks = []
+        self._block_starts = []
+        self._nnz = staged._nnz
+
+    def append(self, ids: List[str], rows):
+        """
+        Yeni satırları dosyaların sonuna ekle
+
+        Args:
+            ids: Yeni reel ID'leri (store'da olmamalı)
+            rows: len(ids) satırlık sparse matrix
+        """
+        rows = sparse.csr_matrix(rows, dtype=self.DATA_DTYPE)
+        rows.sort_indices()
+
+        offsets = (rows.indptr[1:].astype(self.INDPTR_DTYPE) + self._nnz)
+
+        # Sıra önemli: data → indices → indptr → ids (open() ids'e göre kırpar)
+        with open(self.data_file, 'ab') as f:
+            f.write(rows.data.tobytes())
+        with open(self.indices_file, 'ab') as f:
+            f.write(rows.indices.astype(self.INDEX_DTYPE).tobytes())
+        with open(self.indptr_file, 'ab') as f:
+            f.write(offsets.tobytes())
+        with open(self.ids_file, 'a', encoding='utf-8') as f:
+            f.write("".join(f"{reel_id}\n" for reel_id in ids))
+
+        offset = len(self.ids)
+        for i, reel_id in enumerate(ids):
+            self.row_index[reel_id] = offset + i
+        self._blocks.append(rows)
+        self._block_starts.append(offset)
+        self.ids.extend(ids)
+        self._nnz += int(rows.nnz)
+        self._merge_blocks()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Store istatistikleri"""
+        return {
+            "vectors": len(self.ids),
+            "nnz": self._nnz,
+            "n_features": self.n_features,
+            "model_version": self.model_version,
+            "memory_blocks": len(self._blocks),
+            "disk_bytes": sum(
+                p.stat().st_size
+                for p in (self.ids_file, self.indptr_file, self.indices_file, self.data_file)
+                if p.exists()
+            )
+        }
+
+    # ============ HELPERS ============
+
+    def _merge_blocks(self):
+        """Son iki blok benzer boyuttaysa birleştir (base'e dokunulmaz)"""
+        while len(self._blocks) >= 2 and self._blocks[-2].shape[0] <= 2 * self._blocks[-1].shape[0]:
+            last = self._blocks.pop()
+            self._block_starts.pop()
+            self._blocks[-1] = sparse.vstack([self._blocks[-1], last], format='csr')
+
+    def _write_arrays(self, ids: List[str], indptr: np.ndarray, indices: np.ndarray, data: np.ndarray):
+        """Tüm dosyaları temp + os.replace ile yaz"""
+        for path, payload in (
+            (self.data_file, data.astype(self.DATA_DTYPE).tobytes()),
+            (self.indices_file, indices.tobytes()),
+            (self.indptr_file, indptr.tobytes()),
+            (self.ids_file, "".join(f"{reel_id}\n" for reel_id in ids).encode('utf-8')),
+        ):
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+
+    def _write_meta(self):
+        tmp_path = self.meta_file.with_name(f".{self.meta_file.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "model_version": self.model_version,
+                "n_features": self.n_features,
+                "rows": len(self.ids)
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.meta_file)
+
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        if not self.meta_file.exists():
+            return None
+        try:
+            with open(self.meta_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ Reel vector store meta unreadable: {e}")
+            return None
+
+    def _read_ids(self) -> List[str]:
+        if not self.ids_file.exists():
+            return []
+        with open(self.ids_file, 'r', encoding='utf-8') as f:
+            return [line.rstrip("\n") for line in f if line.strip()]
+
+    def _memmap(self, path: Path, dtype) -> np.ndarray:
+        """Boş dosyalar memmap edilemez → boş array"""
+        if not path.exists() or path.stat().st_size == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    def _truncate_files(self, ids: List[str], n_rows: int, nnz: int):
+        """Dosyaları tutarlı uzunluğa kırp"""
+        expected = {
+            self.indptr_file: (n_rows + 1) * np.dtype(self.INDPTR_DTYPE).itemsize,
+            self.indices_file: nnz * np.dtype(self.INDEX_DTYPE).itemsize,
+            self.data_file: nnz * np.dtype(self.DATA_DTYPE).itemsize,
+        }
+        for path, size in expected.items():
+            if path.exists() and path.stat().st_size > size:
+                print(f"⚠️ Truncating partial append in {path.name}")
+                os.truncate(path, size)
+
+        if len(self._read_ids()) != n_rows:
+            with open(self.ids_file, 'w', encoding='utf-8') as f:
+                f.write("".join(f"{reel_id}\n" for reel_id in ids))
@@ -6,6 +6,11 @@
 Reels Analytics Service - Tracking, Statistics ve Feed Management
 File-based persistence ile güncellenmiş (in-memory + JSON backup)
 
+Persistence: JSON snapshot + append-only write-ahead log (wal.jsonl)
+Her tracking isteği sadece log'a delta ekler, snapshot periyodik alınır
+
+Opsiyonel SQLite backend: settings.database_url = "sqlite:///outputs/reels.db"
+
 ADDED: Worker helper methods for RSS comparison and duplicate detection
 """
 
@@ -13,19 +18,26 @@ from typing import List, Optional, Dict, Any, Set
 from datetime import datetime, date, timedelta
 from collections import defaultdict, Counter
 import hashlib
-import uuid
 import json
 from pathlib import Path
 
 from ..models.reels_tracking import (
     ReelView, UserReelStats, UserDailyStats, DailyProgress,
-    ReelAnalytics, ReelFeedItem, TrendingReels, TrendPeriod,
+    ReelAnalytics, ReelFeedItem, TrendPeriod,
     TrackViewRequest, TrackViewResponse, ViewStatus, ReelStatus,
     NewsData, FeedResponse, FeedPagination, FeedMetadata, DetailViewEvent,
     TrackDetailViewRequest, EmojiType
 )
 from ..models.news import Article
 from ..config import settings
+from .event_log import AppendOnlyLog, read_snapshot_seq
+from .write_behind import write_behind
+from .reels_sqlite_store import SQLiteReelsStore, parse_sqlite_url
+from .reel_catalog_index import ReelCatalogIndex, category_key
+from .trending_engine import TrendingEngine
+from .user_preference import preference_engine
+from .incremental_nlp import incremental_nlp
+from .question_pool import question_pool
 
 class ReelsAnalyticsService:
     """Reels analytics ve tracking servisi - persistent storage ile"""
@@ -39,6 +51,24 @@ class ReelsAnalyticsService:
         self.analytics_file = self.storage_dir / "analytics.json"
         self.views_file = self.storage_dir / "views.json"
         self.stats_file = self.storage_dir / "user_stats.json"
+        self.wal_file = self.storage_dir / "wal.jsonl"
+        self.snapshot_meta_file = self.storage_dir / "snapshot_meta.json"
+        
+        # Write-ahead log (None ise her değişiklikte tam snapshot yazılır)
+        self.wal: Optional[AppendOnlyLog] = None
+        self._compaction_pending = False
+        self._snapshot_seq: Optional[int] = None
+        
+        # SQLite backend (database_url sqlite:/// ise JSON + WAL yerine kullanılır)
+        self.db: Optional[SQLiteReelsStore] = None
+        db_path = parse_sqlite_url(settings.database_url)
+        if db_path:
+            try:
+                self.db = SQLiteReelsStore(db_path)
+            except Exception as e:
+                print(f"⚠️ SQLite backend unavailable, using JSON files: {e}")
+        elif settings.database_url:
+            print(f"⚠️ Unsupported database_url for reels, using JSON files: {settings.database_url}")
         
         # In-memory storage (with file backup)
         self.view_storage: Dict[str, List[ReelView]] = defaultdict(list)
@@ -47,12 +77,29 @@ class ReelsAnalyticsService:
         self.reel_analytics: Dict[str, ReelAnalytics] = {}
         self.reel_storage: Dict[str, ReelFeedItem] = {}
         
+        # user_id → anlamlı izlenen reel ID'leri (track anında güncellenir)
+        self.user_seen_reels: Dict[str, Set[str]] = defaultdict(set)
+        
+        # Yayınlanmış reels'in published_at sıralı index'i (saatlik/günlük bucket'lar)
+        self.catalog = ReelCatalogIndex()
+        
+        # Kategori → aynı yapıda katalog (sıralı reel ID'leri + sayaçlar)
+        self.category_catalogs: Dict[str, ReelCatalogIndex] = defaultdict(ReelCatalogIndex)
+        
+        # Artımlı trending sayaçları (HOURLY/DAILY/WEEKLY heap'leri)
+        self.trending = TrendingEngine()
+        
         # Cache for performance
-        self._trending_cache: Optional[TrendingReels] = None
-        self._cache_expiry: Optional[datetime] = None
         self._url_cache: Optional[Set[str]] = None  # NEW: URL cache for worker
         self._url_cache_expiry: Optional[datetime] = None  # NEW: URL cache expiry
         
+        # Snapshot yazımı write-behind flusher üzerinden
+        write_behind.register(
+            "reels_analytics",
+            self._collect_snapshot,
+            after_flush=self._on_snapshot_flushed
+        )
+        
         # Load existing data
         self._load_persistent_data()
         
@@ -64,7 +111,109 @@ class ReelsAnalyticsService:
     
     def _load_persistent_data(self):
         """
-        Persistent data'yı dosyalardan yükle
+        Persistent data'yı yükle
+        
+        SQLite backend varsa oradan, yoksa JSON snapshot + WAL replay
+        """
+        if self.db is not None:
+            self._load_from_sqlite()
+        else:
+            self._load_json_snapshot()
+            
+            # Replay WAL (snapshot sonrası delta'lar)
+            if settings.reels_wal_enabled:
+                self._open_and_replay_wal()
+        
+        self._rebuild_seen_index()
+        self._rebuild_catalog_index()
+        self._rebuild_trending_index()
+    
+    def _rebuild_catalog_index(self):
+        """Katalog ve kategori index'lerini reel_storage'dan yeniden kur (sadece startup'ta)"""
+        published = [
+            reel for reel in self.reel_storage.values()
+            if reel.status == ReelStatus.PUBLISHED and reel.published_at
+        ]
+        self.catalog.rebuild([(reel.id, reel.published_at) for reel in published])
+        
+        by_category: Dict[str, List] = defaultdict(list)
+        for reel in published:
+            by_category[self._reel_category(reel)].append((reel.id, reel.published_at))
+        
+        self.category_catalogs = defaultdict(ReelCatalogIndex)
+        for category, items in by_category.items():
+            self.category_catalogs[category].rebuild(items)
+        
+        print(f"🗂️ Catalog index: {len(self.catalog)} published reels, {len(self.category_catalogs)} categories")
+    
+    def _index_reel(self, reel: ReelFeedItem):
+        """Reel'i status'üne göre katalog + kategori index'ine ekle / çıkar"""
+        category = self._reel_category(reel)
+        
+        # Index'ler sadece PUBLISHED reels'i tutar
+        if reel.status == ReelStatus.PUBLISHED and reel.published_at:
+            self.catalog.add(reel.id, reel.published_at)
+            self.category_catalogs[category].add(reel.id, reel.published_at)
+        else:
+            self.catalog.remove(reel.id)
+            if category in self.category_catalogs:
+                self.category_catalogs[category].remove(reel.id)
+                if not self.category_catalogs[category]:
+                    del self.category_catalogs[category]
+    
+    @staticmethod
+    def _reel_category(reel: ReelFeedItem) -> str:
+        return category_key(reel.news_data.category if reel.news_data else "")
+    
+    def _rebuild_seen_index(self):
+        """Seen-set index'ini view_storage'dan yeniden kur (sadece startup'ta)"""
+        self.user_seen_reels = defaultdict(set)
+        for user_id, views in self.view_storage.items():
+            for view in views:
+                self._index_view(user_id, view)
+        
+        total = sum(len(seen) for seen in self.user_seen_reels.values())
+        print(f"👁️ Seen index: {len(self.user_seen_reels)} users, {total} watched reels")
+    
+    def _rebuild_trending_index(self):
+        """Trending sayaçlarını izleme geçmişinden yeniden kur (sadece startup'ta)"""
+        self.trending.reset()
+        views = sorted(
+            (view for user_views in self.view_storage.values() for view in user_views),
+            key=lambda v: v.viewed_at
+        )
+        for view in views:
+            self.trending.record_view(
+                view.reel_id,
+                emoji=view.emoji_reaction is not None,
+                shared=view.shared,
+                detail_read=view.detail_viewed,
+                at=view.viewed_at
+            )
+        print(f"🔥 Trending index: {len(self.trending.periods[TrendPeriod.WEEKLY].counters)} reels (weekly window)")
+    
+    def _find_view(self, user_id: str, view_id: str) -> Optional[ReelView]:
+        """View'ı ID ile bul (yeniden eskiye; replay'de son view'lar aranır)"""
+        for view in reversed(self.view_storage.get(user_id, [])):
+            if view.id == view_id:
+                return view
+        return None
+    
+    def _latest_view_of(self, user_id: str, reel_id: str, max_scan: int = 50) -> Optional[ReelView]:
+        """Kullanıcının bu reel için en son view'ı (son max_scan kayıt taranır)"""
+        for view in reversed(self.view_storage.get(user_id, [])[-max_scan:]):
+            if view.reel_id == reel_id:
+                return view
+        return None
+    
+    def _index_view(self, user_id: str, view: ReelView):
+        """Anlamlı izlemeyi kullanıcının seen-set'ine ekle - O(1)"""
+        if view.is_meaningful_view():
+            self.user_seen_reels[user_id].add(view.reel_id)
+    
+    def _load_json_snapshot(self):
+        """
+        JSON snapshot dosyalarını yükle
         
         ✅ FIX: views, user_stats ve analytics dosyalarını da yüklüyor
         """
@@ -159,80 +308,263 @@ class ReelsAnalyticsService:
             import traceback
             traceback.print_exc()
             # Boş storage ile devam et
-        
-    def _save_persistent_data(self):
+    
+    def _load_from_sqlite(self):
         """
-        Persistent data'yı dosyalara kaydet
+        SQLite'tan memory'ye yükle
         
-        ✅ FIX: views, user_stats ve analytics dosyalarını da kaydediyor
+        DB boşsa mevcut JSON snapshot + WAL bir kereliğine DB'ye aktarılır
         """
         try:
-            # 1. Save reels
-            reels_data = {}
-            for reel_id, reel in self.reel_storage.items():
+            if self.db.is_empty():
+                self._migrate_json_to_sqlite()
+                return
+            
+            for reel_dict in self.db.load_reels():
                 try:
-                    reel_dict = reel.model_dump()
-                    # Convert datetime objects to strings
-                    if 'published_at' in reel_dict and reel_dict['published_at']:
-                        reel_dict['published_at'] = reel_dict['published_at'].isoformat() if isinstance(reel_dict['published_at'], datetime) else reel_dict['published_at']
-                    if 'created_at' in reel_dict and reel_dict['created_at']:
-                        reel_dict['created_at'] = reel_dict['created_at'].isoformat() if isinstance(reel_dict['created_at'], datetime) else reel_dict['created_at']
-                    
-                    reels_data[reel_id] = reel_dict
-                    
+                    reel = ReelFeedItem(**reel_dict)
+                    self.reel_storage[reel.id] = reel
                 except Exception as e:
-                    print(f"⚠️ Could not serialize reel {reel_id}: {e}")
-            
-            with open(self.reels_file, 'w', encoding='utf-8') as f:
-                json.dump(reels_data, f, ensure_ascii=False, indent=2, default=str)
-            
-            print(f"💾 Saved {len(reels_data)} reels to persistent storage")
+                    print(f"⚠️ Could not load reel {reel_dict.get('id')}: {e}")
             
-            # ============ 2. Save VIEWS ============
-            views_data = {}
-            for user_id, views_list in self.view_storage.items():
+            for user_id, view_dict in self.db.load_views():
                 try:
-                    views_data[user_id] = [
-                        view.model_dump() for view in views_list
-                    ]
+                    self.view_storage[user_id].append(ReelView(**view_dict))
                 except Exception as e:
-                    print(f"⚠️ Could not serialize views for {user_id}: {e}")
+                    print(f"⚠️ Could not load view for {user_id}: {e}")
             
-            with open(self.views_file, 'w', encoding='utf-8') as f:
-                json.dump(views_data, f, ensure_ascii=False, indent=2, default=str)
-            
-            print(f"💾 Saved views for {len(views_data)} users")
+            for user_id, stats_dict in self.db.load_user_stats():
+                try:
+                    self.user_stats[user_id] = UserReelStats(**stats_dict)
+                except Exception as e:
+                    print(f"⚠️ Could not load stats for {user_id}: {e}")
             
-            # ============ 3. Save USER STATS ============
-            stats_data = {}
-            for user_id, stats in self.user_stats.items():
+            for reel_id, analytics_dict in self.db.load_analytics():
                 try:
-                    stats_data[user_id] = stats.model_dump()
+                    self.reel_analytics[reel_id] = ReelAnalytics(**analytics_dict)
                 except Exception as e:
-                    print(f"⚠️ Could not serialize stats for {user_id}: {e}")
+                    print(f"⚠️ Could not load analytics for {reel_id}: {e}")
             
-            with open(self.stats_file, 'w', encoding='utf-8') as f:
-                json.dump(stats_data, f, ensure_ascii=False, indent=2, default=str)
+            print(f"🗄️ Loaded from SQLite: {len(self.reel_storage)} reels, "
+                  f"views for {len(self.view_storage)} users")
             
-            print(f"💾 Saved stats for {len(stats_data)} users")
+        except Exception as e:
+            print(f"⚠️ Error loading from SQLite: {e}")
+            import traceback
+            traceback.print_exc()
+    
+    def _migrate_json_to_sqlite(self):
+        """Mevcut JSON snapshot + WAL'ı SQLite'a tek transaction ile aktar"""
+        self._load_json_snapshot()
+        
+        if self.wal_file.exists():
+            self._open_and_replay_wal()
+            if self.wal is not None:
+                self.wal.close()
+                self.wal = None
+        
+        if not self.reel_storage and not self.view_storage:
+            return
+        
+        self.db.bulk_import(
+            reels={
+                reel_id: reel.model_dump(mode="json")
+                for reel_id, reel in self.reel_storage.items()
+            },
+            views=[
+                (user_id, view.model_dump(mode="json"), view.get_engagement_score())
+                for user_id, views in self.view_storage.items()
+                for view in views
+            ],
+            user_stats={
+                user_id: stats.model_dump(mode="json")
+                for user_id, stats in self.user_stats.items()
+            },
+            analytics={
+                reel_id: analytics.model_dump(mode="json")
+                for reel_id, analytics in self.reel_analytics.items()
+            }
+        )
+        print(f"🗄️ Migrated JSON storage to SQLite: {len(self.reel_storage)} reels")
+    
+    def _open_and_replay_wal(self):
+        """
+        WAL'ı aç ve snapshot'tan sonraki kayıtları memory'ye uygula
+        
+        Snapshot meta'daki seq'ten küçük/eşit kayıtlar zaten snapshot'ta
+        """
+        try:
+            snapshot_seq = read_snapshot_seq(self.snapshot_meta_file)
+            self.wal = AppendOnlyLog(self.wal_file, fsync=settings.reels_wal_fsync)
+            self.wal.ensure_seq_at_least(snapshot_seq)
             
-            # ============ 4. Save ANALYTICS ============
-            analytics_data = {}
-            for reel_id, analytics in self.reel_analytics.items():
+            replayed = 0
+            for record in self.wal.replay(after_seq=snapshot_seq):
                 try:
-                    analytics_data[reel_id] = analytics.model_dump()
+                    self._apply_log_record(record["op"], record["data"])
+                    replayed += 1
                 except Exception as e:
-                    print(f"⚠️ Could not serialize analytics for {reel_id}: {e}")
-            
-            with open(self.analytics_file, 'w', encoding='utf-8') as f:
-                json.dump(analytics_data, f, ensure_ascii=False, indent=2, default=str)
+                    print(f"⚠️ Could not replay log record {record.get('seq')}: {e}")
             
-            print(f"💾 Saved analytics for {len(analytics_data)} reels")
+            print(f"📜 Replayed {replayed} log records (snapshot seq: {snapshot_seq})")
             
+            # Büyük log kaldıysa hemen compact et
+            if self.wal.pending_records >= settings.reels_wal_compact_threshold:
+                self._compact_log()
+                
         except Exception as e:
-            print(f"❌ Error saving persistent data: {e}")
-            import traceback
-            traceback.print_exc()
+            print(f"⚠️ WAL unavailable, falling back to full snapshots: {e}")
+            self.wal = None
+    
+    def _apply_log_record(self, op: str, data: Dict[str, Any]):
+        """Tek bir log kaydını in-memory storage'a uygula"""
+        if op == "reel":
+            self.reel_storage[data["reel_id"]] = ReelFeedItem(**data["reel"])
+        elif op == "reel_status":
+            if data["reel_id"] in self.reel_storage:
+                self.reel_storage[data["reel_id"]].status = ReelStatus(data["status"])
+        elif op == "view":
+            self.view_storage[data["user_id"]].append(ReelView(**data["view"]))
+        elif op == "view_detail":
+            view = self._find_view(data["user_id"], data["view_id"])
+            if view is not None:
+                view.detail_viewed = True
+                view.detail_duration_ms = data["detail_duration_ms"]
+                view.detail_scroll_depth = data.get("detail_scroll_depth", 0.0)
+        elif op == "analytics":
+            self.reel_analytics[data["reel_id"]] = ReelAnalytics(**data["analytics"])
+        elif op == "user_stats":
+            self.user_stats[data["user_id"]] = UserReelStats(**data["stats"])
+        else:
+            print(f"⚠️ Unknown log op: {op}")
+    
+    def _persist(self, op: str, data: Dict[str, Any]):
+        """
+        Değişikliği kalıcı hale getir
+        
+        SQLite aktifse: İlgili tabloya tek satır upsert/insert
+        WAL aktifse: O(1) delta append + eşik aşılınca snapshot
+        Değilse: Eski davranış (tüm dosyaları yeniden yaz)
+        """
+        self._persist_many([(op, data)])
+    
+    def _persist_many(self, records: List[tuple]):
+        """
+        Bir çağrının tüm değişikliklerini birlikte kalıcı hale getir
+        
+        SQLite'ta tek transaction / tek commit (view + analytics ayrı
+        commit edilmez); WAL'da kayıtlar sırayla append edilir, compaction
+        eşiği bir kez kontrol edilir.
+        """
+        if self.db is not None:
+            try:
+                with self.db.batch():
+                    for op, data in records:
+                        self._persist_sqlite(op, data)
+            except Exception as e:
+                ops = ",".join(op for op, _ in records)
+                print(f"❌ SQLite write error ({ops}): {e}")
+            return
+        
+        if self.wal is None:
+            self._save_persistent_data()
+            return
+        
+        try:
+            for op, data in records:
+                self.wal.append(op, data)
+            if self.wal.pending_records >= settings.reels_wal_compact_threshold:
+                self._compact_log()
+        except Exception as e:
+            ops = ",".join(op for op, _ in records)
+            print(f"❌ WAL append error ({ops}): {e}")
+            self._save_persistent_data()
+    
+    def _persist_sqlite(self, op: str, data: Dict[str, Any]):
+        """Log op'unu SQLite tablosuna yaz"""
+        if op == "reel":
+            self.db.upsert_reel(data["reel_id"], data["reel"])
+        elif op == "reel_status":
+            self.db.update_reel_status(data["reel_id"], data["status"])
+        elif op == "view":
+            self.db.insert_view(data["user_id"], data["view"], data.get("engagement", 0.0))
+        elif op == "view_detail":
+            self.db.mark_view_detail(
+                data["user_id"], data["view_id"],
+                data["detail_duration_ms"], data.get("detail_scroll_depth", 0.0)
+            )
+        elif op == "analytics":
+            self.db.upsert_analytics(data["reel_id"], data["analytics"])
+        elif op == "user_stats":
+            self.db.upsert_user_stats(data["user_id"], data["stats"])
+        else:
+            print(f"⚠️ Unknown persist op: {op}")
+    
+    def _compact_log(self):
+        """
+        Snapshot compaction: Tam state'i yaz, meta'ya seq kaydet, log'u kısalt
+        
+        Snapshot write-behind flusher ile yazılır; log sadece yazma bittikten
+        sonra (_on_snapshot_flushed) snapshot seq'ine kadar kırpılır.
+        Meta yazılmadan crash olursa log baştan replay edilir.
+        """
+        if self._compaction_pending:
+            return
+        self._compaction_pending = True
+        self._save_persistent_data()
+    
+    def _save_persistent_data(self):
+        """
+        Persistent data'yı dosyalara kaydet
+        
+        Write-behind: Sadece kirli işaretler, flusher _collect_snapshot ile
+        tüm dosyaları toplu ve atomik (temp + rename) yazar
+        """
+        write_behind.mark_dirty("reels_analytics")
+    
+    def _collect_snapshot(self):
+        """
+        Write-behind için snapshot dosyaları
+        
+        ✅ FIX: views, user_stats ve analytics dosyalarını da kaydediyor
+        
+        Loop'ta sadece container'lar kopyalanır (view listeleri dahil);
+        model_dump + JSON flusher thread'inde yapılır. Modeller o arada
+        güncellenirse snapshot seq'ten yeni olabilir - seq sonrası log
+        kayıtları tam kayıtları üzerine yazdığı için replay yine tutarlı.
+        """
+        reels_data = dict(self.reel_storage)
+        views_data = {user_id: list(views) for user_id, views in self.view_storage.items()}
+        stats_data = dict(self.user_stats)
+        analytics_data = dict(self.reel_analytics)
+        
+        print(f"💾 Saving {len(reels_data)} reels, views for {len(views_data)} users, "
+              f"stats for {len(stats_data)} users, analytics for {len(analytics_data)} reels")
+        
+        files = [
+            (self.reels_file, reels_data),
+            (self.views_file, views_data),
+            (self.stats_file, stats_data),
+            (self.analytics_file, analytics_data)
+        ]
+        
+        # ============ 5. SNAPSHOT META (en son yazılır) ============
+        if self.wal is not None:
+            self._snapshot_seq = self.wal.last_seq
+            files.append((self.snapshot_meta_file, {
+                "wal_seq": self._snapshot_seq,
+                "saved_at": datetime.now().isoformat()
+            }))
+        
+        return files
+    
+    def _on_snapshot_flushed(self):
+        """Snapshot diske yazıldı: log'u snapshot seq'ine kadar kırp"""
+        if self.wal is not None and self._snapshot_seq is not None:
+            self.wal.truncate(keep_after_seq=self._snapshot_seq)
+            print(f"🗜️ Compacted reels WAL at seq {self._snapshot_seq}")
+        self._snapshot_seq = None
+        self._compaction_pending = False
     
     # ============ WORKER HELPER METHODS (NEW) ============
     
@@ -272,40 +604,65 @@ class ReelsAnalyticsService:
         🔥 NEW: Worker için - Belirli tarihten sonra oluşturulan reels
         """
         try:
-            published_reels = await self.get_all_published_reels()
-            
-            recent_reels = [
-                reel for reel in published_reels
-                if reel.published_at and reel.published_at > since_date
-            ]
-            
-            # Sort by publish date
-            recent_reels.sort(key=lambda r: r.published_at, reverse=True)
-            
-            return recent_reels
+            # Katalog index: published_at > since_date, yeniden eskiye
+            return self._reels_from_ids(self.catalog.ids_since(since_date, inclusive=False))
             
         except Exception as e:
             print(f"❌ Error getting articles since date: {e}")
             return []
     
-    async def get_reels_by_category(self, category: str) -> List[ReelFeedItem]:
+    async def get_trending_reels(
+        self,
+        limit: int = 10,
+        period: TrendPeriod = TrendPeriod.DAILY
+    ) -> List[ReelFeedItem]:
         """
-        🔥 NEW: Worker için - Kategoriye göre reels
+        Periyodun en trend reels'i - trending heap'inden top-k
+        
+        Sadece yayında olan reels döner; trend_score / trend_rank doldurulmuş kopyalar
+        """
+        top = self.trending.top_k(period, limit, eligible=self.catalog.__contains__)
+        return [
+            self.reel_storage[reel_id].model_copy(update={
+                "trend_score": round(score, 3),
+                "trend_rank": rank,
+                "is_trending": True
+            })
+            for rank, (reel_id, score) in enumerate(top, start=1)
+        ]
+    
+    async def get_reels_by_category(
+        self,
+        category: str,
+        since: Optional[datetime] = None
+    ) -> List[ReelFeedItem]:
+        """
+        🔥 NEW: Worker için - Kategoriye göre reels (yeniden eskiye)
+        
+        Args:
+            category: Kategori slug (büyük/küçük harf duyarsız)
+            since: Verilirse sadece bu tarihten sonra yayınlananlar
         """
         try:
-            published_reels = await self.get_all_published_reels()
-            
-            category_reels = [
-                reel for reel in published_reels
-                if reel.news_data and reel.news_data.category == category
-            ]
-            
-            return category_reels
+            catalog = self.category_catalogs.get(category_key(category))
+            if catalog is None:
+                return []
+            reel_ids = catalog.ids_since(since, inclusive=False) if since else catalog.ids_between()
+            return self._reels_from_ids(reel_ids)
             
         except Exception as e:
             print(f"❌ Error getting reels by category: {e}")
             return []
     
+    def get_category_counts(self) -> Dict[str, int]:
+        """Kategori → yayınlanmış reel sayısı - O(kategori)"""
+        return {category: len(catalog) for category, catalog in self.category_catalogs.items()}
+    
+    def get_category_count_since(self, category: str, since: datetime) -> int:
+        """Kategoride since'ten sonra yayınlanan reel sayısı - bisect"""
+        catalog = self.category_catalogs.get(category_key(category))
+        return catalog.count_since(since) if catalog is not None else 0
+    
     async def is_article_already_processed(self, article_url: str) -> bool:
         """
         🔥 NEW: Worker için - Article'ın daha önce işlenip işlenmediğini kontrol et
@@ -335,12 +692,8 @@ class ReelsAnalyticsService:
                     cat = reel.news_data.category
                     categories[cat] = categories.get(cat, 0) + 1
             
-            # Recent activity (last 24 hours)
-            yesterday = datetime.now() - timedelta(days=1)
-            recent_reels = [
-                reel for reel in published_reels
-                if reel.published_at and reel.published_at > yesterday
-            ]
+            # Recent activity (last 24 hours) - katalog index
+            recent_reels_24h = self.catalog.count_since(datetime.now() - timedelta(days=1))
             
             # Total duration
             total_duration = sum(reel.duration_seconds for reel in published_reels)
@@ -354,13 +707,16 @@ class ReelsAnalyticsService:
             return {
                 "total_reels": total_reels,
                 "categories": categories,
-                "recent_reels_24h": len(recent_reels),
+                "recent_reels_24h": recent_reels_24h,
+                "hourly_published_24h": self.catalog.hourly_histogram(24),
                 "total_duration_seconds": total_duration,
                 "total_duration_minutes": round(total_duration / 60, 1),
                 "average_duration_seconds": round(avg_duration, 1),
                 "estimated_total_cost": round(total_cost, 6),
                 "average_cost_per_reel": round(total_cost / max(total_reels, 1), 6),
                 "storage_location": str(self.storage_dir),
+                "catalog_index": self.catalog.get_stats(),
+                "trending": self.trending.get_stats(),
                 "cache_status": {
                     "url_cache_size": len(self._url_cache) if self._url_cache else 0,
                     "url_cache_expires": self._url_cache_expiry.isoformat() if self._url_cache_expiry else None
@@ -441,16 +797,38 @@ class ReelsAnalyticsService:
             
             # Storage'a kaydet
             self.reel_storage[reel_id] = reel
+            self._index_reel(reel)
+            
+            # Oyun soruları background'da önceden üretilsin
+            question_pool.enqueue(reel)
             
             # Analytics kaydı oluştur
             await self._initialize_reel_analytics(reel_id, reel)
             
             # Cache'leri invalidate et
             self.invalidate_url_cache()
-            self._invalidate_trending_cache()
             
-            # Persist to file
-            self._save_persistent_data()
+            # Persist (reel + ilk analytics kaydı, tek transaction)
+            self._persist_many([
+                ("reel", {
+                    "reel_id": reel_id,
+                    "reel": reel.model_dump(mode="json")
+                }),
+                ("analytics", {
+                    "reel_id": reel_id,
+                    "analytics": self.reel_analytics[reel_id].model_dump(mode="json")
+                })
+            ])
+            
+            # NLP korpusuna ekle (reel vektörü store'a yazılır)
+            try:
+                await incremental_nlp.add_news_to_corpus(
+                    reel_id,
+                    f"{news_data.title} {news_data.summary}",
+                    {"category": news_data.category, "keywords": news_data.keywords}
+                )
+            except Exception as e:
+                print(f"⚠️ NLP corpus update failed for {reel_id}: {e}")
             
             print(f"✅ Reel created: {reel_id} - {news_data.title[:50]}...")
             return reel
@@ -464,24 +842,44 @@ class ReelsAnalyticsService:
         return self.reel_storage.get(reel_id)
     
     async def get_all_published_reels(self) -> List[ReelFeedItem]:
-        """Tüm yayınlanmış reels'i al"""
-        published_reels = [
-            reel for reel in self.reel_storage.values() 
-            if reel.status == ReelStatus.PUBLISHED
-        ]
+        """Tüm yayınlanmış reels'i al (yeniden eskiye)"""
+        published_reels = self._reels_from_ids(self.catalog.ids_between())
         print(f"📊 Found {len(published_reels)} published reels")
         return published_reels
     
+    async def get_published_reels_since(self, cutoff: datetime) -> List[ReelFeedItem]:
+        """cutoff'tan sonra yayınlanmış reels (yeniden eskiye) - bisect"""
+        return self._reels_from_ids(self.catalog.ids_since(cutoff))
+    
+    async def get_recent_published_reels(self, hours: int, limit: Optional[int] = None) -> List[ReelFeedItem]:
+        """Son N saatte yayınlanmış reels (yeniden eskiye)"""
+        return self._reels_from_ids(self.catalog.ids_last_hours(hours, limit=limit))
+    
+    async def get_latest_published_reels(self, limit: int) -> List[ReelFeedItem]:
+        """En yeni N yayınlanmış reel"""
+        return self._reels_from_ids(self.catalog.latest_ids(limit))
+    
+    async def get_latest_published_reel(self) -> Optional[ReelFeedItem]:
+        """En son yayınlanan reel"""
+        latest = await self.get_latest_published_reels(1)
+        return latest[0] if latest else None
+    
+    def _reels_from_ids(self, reel_ids: List[str]) -> List[ReelFeedItem]:
+        return [self.reel_storage[rid] for rid in reel_ids if rid in self.reel_storage]
+    
     async def update_reel_status(self, reel_id: str, status: ReelStatus) -> bool:
         """Reel durumunu güncelle"""
         if reel_id in self.reel_storage:
-            self.reel_storage[reel_id].status = status
+            reel = self.reel_storage[reel_id]
+            reel.status = status
+            self._index_reel(reel)
             
             # Cache invalidation if unpublishing
             if status != ReelStatus.PUBLISHED:
                 self.invalidate_url_cache()
+                self.trending.remove(reel_id)
             
-            self._save_persistent_data()
+            self._persist("reel_status", {"reel_id": reel_id, "status": status.value})
             return True
         return False
     
@@ -499,9 +897,8 @@ class ReelsAnalyticsService:
                     message=f"Reel not found: {request.reel_id}"
                 )
             
-            # View kaydı oluştur (UPDATED)
+            # View kaydı oluştur (UPDATED) - id model'de üretilir, WAL kaydıyla saklanır
             view = ReelView(
-                id=str(uuid.uuid4()),
                 user_id=user_id,
                 reel_id=request.reel_id,
                 duration_ms=request.duration_ms,
@@ -522,6 +919,20 @@ class ReelsAnalyticsService:
             
             # Storage'a kaydet
             self.view_storage[user_id].append(view)
+            self._index_view(user_id, view)
+            records = [("view", {
+                "user_id": user_id,
+                "view": view.model_dump(mode="json"),
+                "engagement": view.get_engagement_score()
+            })]
+            
+            # Trending sayaçları (views / emoji / share)
+            self.trending.record_view(
+                request.reel_id,
+                emoji=request.emoji_reaction is not None,
+                shared=bool(request.shared),
+                at=view.viewed_at
+            )
             
             # 🆕 Reel analytics güncelle (emoji count)
             if request.reel_id in self.reel_analytics:
@@ -540,6 +951,25 @@ class ReelsAnalyticsService:
                     
                     # Emoji rate
                     analytics.emoji_rate = analytics.total_emoji_reactions / analytics.total_views
+                
+                records.append(("analytics", {
+                    "reel_id": request.reel_id,
+                    "analytics": analytics.model_dump(mode="json")
+                }))
+            
+            # View + analytics tek seferde (SQLite'ta tek commit)
+            self._persist_many(records)
+            
+            # Kategori/keyword/yazar tercihlerini güncelle (warm feed + personalization seviyesi)
+            await preference_engine.update_from_view(user_id, reel, view)
+            
+            # NLP profil cache'ini güncelle (hot feed geçmişi yeniden taramaz)
+            incremental_nlp.update_user_profile(
+                user_id,
+                request.reel_id,
+                f"{reel.news_data.title} {reel.news_data.summary}",
+                view.get_engagement_score()
+            )
             
             # Response
             response = TrackViewResponse(
@@ -549,9 +979,6 @@ class ReelsAnalyticsService:
                 meaningful_view=view.is_meaningful_view()
             )
             
-            # Persist
-            self._save_persistent_data()
-            
             return response
             
         except Exception as e:
@@ -585,7 +1012,6 @@ class ReelsAnalyticsService:
                     date=target_date,
                     total_published_today=total_published
                 )
-                self._save_persistent_data()
             
             progress = self.daily_progress[user_id][date_str]
             
@@ -614,7 +1040,10 @@ class ReelsAnalyticsService:
                 # 🆕 Yeni kullanıcı için boş stats oluştur
                 print(f"📊 Creating new stats for user: {user_id}")
                 self.user_stats[user_id] = UserReelStats(user_id=user_id)
-                self._save_persistent_data()
+                self._persist("user_stats", {
+                    "user_id": user_id,
+                    "stats": self.user_stats[user_id].model_dump(mode="json")
+                })
             
             return self.user_stats[user_id]
             
@@ -724,23 +1153,30 @@ class ReelsAnalyticsService:
             }, ...]
         """
         try:
-            if user_id not in self.view_storage:
-                return []
-            
-            # Kullanıcının tüm view'ları
-            all_views = self.view_storage[user_id]
-            
-            # Filtrele: min_engagement'tan yüksek olanlar
-            filtered_views = [
-                v for v in all_views
-                if v.get_engagement_score() >= min_engagement
-            ]
-            
-            # Tarihe göre sırala (yeniden eskiye)
-            filtered_views.sort(key=lambda v: v.viewed_at, reverse=True)
-            
-            # Limit uygula
-            filtered_views = filtered_views[:limit]
+            if self.db is not None:
+                # SQLite: (user_id, viewed_at) index + engagement filtresi
+                filtered_views = [
+                    ReelView(**v)
+                    for v in self.db.query_user_views(user_id, limit, min_engagement)
+                ]
+            else:
+                if user_id not in self.view_storage:
+                    return []
+                
+                # Kullanıcının tüm view'ları
+                all_views = self.view_storage[user_id]
+                
+                # Filtrele: min_engagement'tan yüksek olanlar
+                filtered_views = [
+                    v for v in all_views
+                    if v.get_engagement_score() >= min_engagement
+                ]
+                
+                # Tarihe göre sırala (yeniden eskiye)
+                filtered_views.sort(key=lambda v: v.viewed_at, reverse=True)
+                
+                # Limit uygula
+                filtered_views = filtered_views[:limit]
             
             # Reel bilgilerini ekle
             history = []
@@ -784,6 +1220,20 @@ class ReelsAnalyticsService:
         try:
             # Reel analytics'ini güncelle
             reel_id = detail_event.reel_id
+            self.trending.record_detail_read(reel_id)
+            
+            # Detay okumasını view kaydına işle (engagement + startup'ta trending rebuild)
+            view = self._latest_view_of(user_id, reel_id)
+            if view is not None:
+                view.detail_viewed = True
+                view.detail_duration_ms = max(view.detail_duration_ms, detail_event.read_duration_ms)
+                view.detail_scroll_depth = max(view.detail_scroll_depth, detail_event.scroll_depth)
+                self._persist("view_detail", {
+                    "user_id": user_id,
+                    "view_id": view.id,
+                    "detail_duration_ms": view.detail_duration_ms,
+                    "detail_scroll_depth": view.detail_scroll_depth
+                })
             
             if reel_id in self.reel_analytics:
                 analytics = self.reel_analytics[reel_id]
@@ -802,8 +1252,15 @@ class ReelsAnalyticsService:
                     analytics.avg_detail_duration_ms = total_duration / analytics.detail_view_count
                 
                 # Detail view rate hesapla
+                # (view'sız detay okuması oranı 1'i geçirebilir; ReelAnalytics le=1.0
+                # olduğundan clamp'lenmezse WAL replay'inde kayıt reddedilir)
                 if analytics.total_views > 0:
-                    analytics.detail_view_rate = analytics.detail_view_count / analytics.total_views
+                    analytics.detail_view_rate = min(analytics.detail_view_count / analytics.total_views, 1.0)
+                
+                self._persist("analytics", {
+                    "reel_id": reel_id,
+                    "analytics": analytics.model_dump(mode="json")
+                })
             
             # User daily stats güncelle
             today = date.today()
@@ -821,9 +1278,6 @@ class ReelsAnalyticsService:
             # UserDailyStats içinde detail_views field'i var
             # Bu kısmı implement etmek için UserDailyStats tracking'e entegre etmen gerekir
             
-            # Persist
-            self._save_persistent_data()
-            
             return {
                 "success": True,
                 "detail_view_recorded": True,
@@ -859,8 +1313,6 @@ class ReelsAnalyticsService:
         """
         Personalized feed generation with preference engine
         """
-        from .preference_engine import preference_engine
-        
         # Tüm published reels
         all_reels = await self.get_all_published_reels()
         
@@ -872,14 +1324,11 @@ class ReelsAnalyticsService:
         three_days_ago = datetime.now() - timedelta(days=3)
         fresh_reels = [r for r in unseen_reels if r.published_at >= three_days_ago]
         
-        # Preference engine ile skorla
-        scored_reels = []
-        for reel in fresh_reels:
-            score = await preference_engine.predict_reel_score(user_id, reel)
-            scored_reels.append((reel, score))
+        # Preference engine ile skorla (tek batch)
+        scores = await preference_engine.score_batch(user_id, fresh_reels)
         
         # Sırala
-        scored_reels.sort(key=lambda x: x[1], reverse=True)
+        scored_reels = sorted(zip(fresh_reels, scores.tolist()), key=lambda x: x[1], reverse=True)
         
         # %80 personalized + %20 exploration (random injection)
         personalized_count = int(limit * 0.8)
@@ -900,9 +1349,12 @@ class ReelsAnalyticsService:
         return final_feed[:limit]
     
     async def _get_user_watched_reel_ids(self, user_id: str) -> Set[str]:
-        """Kullanıcının izlediği reel ID'lerini al"""
-        user_views = self.view_storage.get(user_id, [])
-        return {view.reel_id for view in user_views if view.is_meaningful_view()}
+        """
+        Kullanıcının izlediği reel ID'lerini al - O(1)
+        
+        ⚠️ Canlı index set'i döner, çağıran taraf değiştirmemeli
+        """
+        return self.user_seen_reels.get(user_id, set())
     
     async def _get_published_count_for_date(self, target_date: date) -> int:
         """
@@ -911,12 +1363,8 @@ class ReelsAnalyticsService:
         🆕 Hata durumunda 0 döndürür
         """
         try:
-            count = 0
-            for reel in self.reel_storage.values():
-                if (reel.status == ReelStatus.PUBLISHED and 
-                    reel.published_at.date() == target_date):
-                    count += 1
-            return count
+            # Günlük bucket sayacı - O(1)
+            return self.catalog.count_on_date(target_date)
             
         except Exception as e:
             print(f"❌ Error counting published reels for {target_date}: {e}")
@@ -936,10 +1384,6 @@ class ReelsAnalyticsService:
                 tags=reel.news_data.tags if reel else []
             )
     
-    def _invalidate_trending_cache(self):
-        """Trending cache'i temizle"""
-        self._trending_cache = None
-        self._cache_expiry = None
 
 
     async def get_user_watched_reels(self, user_id: str, limit: int = 50) -> List[Dict]:
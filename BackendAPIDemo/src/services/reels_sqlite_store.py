@@ -0,0 +1,290 @@
+# ================================
+# src/services/reels_sqlite_store.py - SQLite Storage Backend
+# ================================
+
+"""
+SQLite storage backend for ReelsAnalyticsService
+
+settings.database_url ile seçilir:
+    DATABASE_URL=sqlite:///outputs/reels.db
+
+Features:
+- WAL journal mode (okuyucular yazıcıyı bloklamaz)
+- Index'ler: views(user_id, viewed_at), views(reel_id), views(viewed_at)
+  (reel tarih / kategori sorguları bellekteki ReelCatalogIndex'ten)
+- Tam model JSON olarak 'data' kolonunda, sorgu kolonları ayrıca tutulur
+"""
+
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
+from pathlib import Path
+from contextlib import contextmanager
+import sqlite3
+import json
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reels (
+    reel_id      TEXT PRIMARY KEY,
+    status       TEXT NOT NULL,
+    category     TEXT,
+    published_at TEXT NOT NULL,
+    data         TEXT NOT NULL
+);
+-- Tarih / kategori sorguları bellekteki katalog index'lerinden
+-- (reels_analytics.catalog, category_catalogs)
+DROP INDEX IF EXISTS idx_reels_category;
+DROP INDEX IF EXISTS idx_reels_published_at;
+
+CREATE TABLE IF NOT EXISTS views (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id     TEXT NOT NULL,
+    reel_id     TEXT NOT NULL,
+    viewed_at   TEXT NOT NULL,
+    engagement  REAL NOT NULL DEFAULT 0,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_views_user ON views(user_id, viewed_at);
+CREATE INDEX IF NOT EXISTS idx_views_reel ON views(reel_id);
+CREATE INDEX IF NOT EXISTS idx_views_viewed_at ON views(viewed_at);
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT PRIMARY KEY,
+    data    TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS analytics (
+    reel_id TEXT PRIMARY KEY,
+    data    TEXT NOT NULL
+);
+"""
+
+
+def parse_sqlite_url(database_url: Optional[str]) -> Optional[str]:
+    """
+    'sqlite:///path/to.db' → 'path/to.db'
+
+    SQLite dışındaki URL'ler için None döner (JSON backend kullanılır)
+    """
+    if not database_url:
+        return None
+    for prefix in ("sqlite:///", "sqlite://"):
+        if database_url.startswith(prefix):
+            return database_url[len(prefix):] or ":memory:"
+    return None
+
+
+def _to_iso(value: Any) -> str:
+    """datetime/str → ISO string (sıralanabilir format)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).replace(" ", "T", 1)
+
+
+class SQLiteReelsStore:
+    """
+    Reels, views, user stats ve analytics için SQLite store
+
+    Yazma metodları upsert/insert yapar, okuma metodları dict döndürür.
+    Model dönüşümü ReelsAnalyticsService tarafında yapılır.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._batch_depth = 0
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+        print(f"🗄️ SQLite reels store: {db_path}")
+
+    # ============ WRITE ============
+
+    @contextmanager
+    def batch(self):
+        """
+        Birden fazla yazmayı tek transaction'da topla (tek commit)
+
+        track_reel_view gibi bir çağrının view + analytics yazmaları
+        ayrı ayrı commit edilmez; blok sonunda bir kez commit edilir,
+        hata olursa hepsi geri alınır.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.conn.rollback()
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.conn.commit()
+
+    def _commit(self):
+        """Batch dışındaysa hemen commit et"""
+        if self._batch_depth == 0:
+            self.conn.commit()
+
+    def upsert_reel(self, reel_id: str, reel_dict: Dict[str, Any]):
+        """Reel ekle veya güncelle"""
+        news_data = reel_dict.get("news_data") or {}
+        self.conn.execute(
+            "INSERT OR REPLACE INTO reels (reel_id, status, category, published_at, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                reel_id,
+                reel_dict.get("status", "published"),
+                news_data.get("category"),
+                _to_iso(reel_dict.get("published_at")),
+                json.dumps(reel_dict, ensure_ascii=False, default=str)
+            )
+        )
+        self._commit()
+
+    def update_reel_status(self, reel_id: str, status: str):
+        """Reel durumunu güncelle (data içindeki status da güncellenir)"""
+        self.conn.execute(
+            "UPDATE reels SET status = ?, data = json_set(data, '$.status', ?) WHERE reel_id = ?",
+            (status, status, reel_id)
+        )
+        self._commit()
+
+    def insert_view(self, user_id: str, view_dict: Dict[str, Any], engagement: float):
+        """Yeni view kaydı ekle"""
+        self.conn.execute(
+            "INSERT INTO views (user_id, reel_id, viewed_at, engagement, data) VALUES (?, ?, ?, ?, ?)",
+            (
+                user_id,
+                view_dict["reel_id"],
+                _to_iso(view_dict["viewed_at"]),
+                engagement,
+                json.dumps(view_dict, ensure_ascii=False, default=str)
+            )
+        )
+        self._commit()
+
+    def mark_view_detail(
+        self,
+        user_id: str,
+        view_id: str,
+        detail_duration_ms: int,
+        detail_scroll_depth: float
+    ):
+        """View kaydına detay okumasını işle (idx_views_user ile daraltılır)"""
+        self.conn.execute(
+            "UPDATE views SET data = json_set(data, '$.detail_viewed', json('true'), "
+            "'$.detail_duration_ms', ?, '$.detail_scroll_depth', ?) "
+            "WHERE user_id = ? AND json_extract(data, '$.id') = ?",
+            (detail_duration_ms, detail_scroll_depth, user_id, view_id)
+        )
+        self._commit()
+
+    def upsert_user_stats(self, user_id: str, stats_dict: Dict[str, Any]):
+        """User stats ekle veya güncelle"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO user_stats (user_id, data) VALUES (?, ?)",
+            (user_id, json.dumps(stats_dict, ensure_ascii=False, default=str))
+        )
+        self._commit()
+
+    def upsert_analytics(self, reel_id: str, analytics_dict: Dict[str, Any]):
+        """Reel analytics ekle veya güncelle"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO analytics (reel_id, data) VALUES (?, ?)",
+            (reel_id, json.dumps(analytics_dict, ensure_ascii=False, default=str))
+        )
+        self._commit()
+
+    def bulk_import(
+        self,
+        reels: Dict[str, Dict[str, Any]],
+        views: List[Tuple[str, Dict[str, Any], float]],
+        user_stats: Dict[str, Dict[str, Any]],
+        analytics: Dict[str, Dict[str, Any]]
+    ):
+        """JSON snapshot'tan tek transaction içinde toplu aktarım"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO reels (reel_id, status, category, published_at, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        reel_id,
+                        d.get("status", "published"),
+                        (d.get("news_data") or {}).get("category"),
+                        _to_iso(d.get("published_at")),
+                        json.dumps(d, ensure_ascii=False, default=str)
+                    )
+                    for reel_id, d in reels.items()
+                ]
+            )
+            self.conn.executemany(
+                "INSERT INTO views (user_id, reel_id, viewed_at, engagement, data) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        user_id,
+                        d["reel_id"],
+                        _to_iso(d["viewed_at"]),
+                        engagement,
+                        json.dumps(d, ensure_ascii=False, default=str)
+                    )
+                    for user_id, d, engagement in views
+                ]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO user_stats (user_id, data) VALUES (?, ?)",
+                [(k, json.dumps(d, ensure_ascii=False, default=str)) for k, d in user_stats.items()]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO analytics (reel_id, data) VALUES (?, ?)",
+                [(k, json.dumps(d, ensure_ascii=False, default=str)) for k, d in analytics.items()]
+            )
+
+    # ============ READ (bulk load) ============
+
+    def is_empty(self) -> bool:
+        """Hiç reel ve view yoksa True (ilk çalıştırma / migration)"""
+        row = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM reels) + (SELECT COUNT(*) FROM views)"
+        ).fetchone()
+        return row[0] == 0
+
+    def load_reels(self) -> List[Dict[str, Any]]:
+        return [json.loads(r[0]) for r in self.conn.execute("SELECT data FROM reels")]
+
+    def load_views(self) -> List[Tuple[str, Dict[str, Any]]]:
+        return [
+            (r[0], json.loads(r[1]))
+            for r in self.conn.execute("SELECT user_id, data FROM views ORDER BY id")
+        ]
+
+    def load_user_stats(self) -> List[Tuple[str, Dict[str, Any]]]:
+        return [(r[0], json.loads(r[1])) for r in self.conn.execute("SELECT user_id, data FROM user_stats")]
+
+    def load_analytics(self) -> List[Tuple[str, Dict[str, Any]]]:
+        return [(r[0], json.loads(r[1])) for r in self.conn.execute("SELECT reel_id, data FROM analytics")]
+
+    # ============ READ (indexed queries) ============
+
+    def query_user_views(
+        self,
+        user_id: str,
+        limit: int,
+        min_engagement: float = 0.0
+    ) -> List[Dict[str, Any]]:
+        """Kullanıcının view'ları (yeniden eskiye) - idx_views_user"""
+        rows = self.conn.execute(
+            "SELECT data FROM views WHERE user_id = ? AND engagement >= ? "
+            "ORDER BY viewed_at DESC LIMIT ?",
+            (user_id, min_engagement, limit)
+        )
+        return [json.loads(r[0]) for r in rows]
+
+    def close(self):
+        self.conn.close()
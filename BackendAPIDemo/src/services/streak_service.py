@@ -4,11 +4,12 @@
 from typing import Dict, Optional
 from datetime import date, datetime, timedelta
 from pathlib import Path
-import json
 
 from ..models.streak_data import (
     StreakInfo, StreakCalendar, DayActivity, WeekStats, StreakResponse
 )
+from ..config import settings
+from .profile_kv_store import CachedProfileStore
 
 
 class StreakService:
@@ -17,18 +18,36 @@ class StreakService:
     def __init__(self):
         self.data_dir = Path("data/streaks")
         self.data_dir.mkdir(parents=True, exist_ok=True)
-        print(f"✅ StreakService initialized: {self.data_dir}")
-    
-    def _get_file_path(self, user_id: str) -> Path:
-        """Kullanıcı streak dosya yolu"""
-        return self.data_dir / f"{user_id}_streak.json"
+        
+        # Sharded KV + LRU cache (değişiklikler write-behind ile batch yazılır)
+        self.store: CachedProfileStore[StreakInfo] = CachedProfileStore(
+            "streaks",
+            self.data_dir,
+            load=lambda data: StreakInfo(**data),
+            dump=lambda streak_info: streak_info.dict(),
+            capacity=settings.profile_cache_size,
+            shards=settings.profile_store_shards
+        )
+        
+        # Eski {user_id}_streak.json dosyaları (bir kez)
+        if self.store.kv.is_empty():
+            suffix = "_streak.json"
+            imported = self.store.kv.import_json_files(
+                f"*{suffix}", lambda path: path.name[:-len(suffix)]
+            )
+            if imported:
+                print(f"📦 Imported {imported} legacy streak files into KV store")
+        
+        warmed = self.store.warm_up(settings.profile_warmup_users)
+        
+        print(f"✅ StreakService initialized: {self.data_dir} (warm-up: {warmed} users)")
     
     async def get_streak_info(self, user_id: str) -> StreakResponse:
         """Kullanıcı streak bilgisini getir"""
         print(f"📊 Getting streak for user: {user_id}")
         
         # Dosyadan oku veya yeni oluştur
-        streak_info = self._load_or_create(user_id)
+        streak_info = await self._load_or_create(user_id)
         
         # Calendar data oluştur (son 12 hafta)
         calendar = self._build_calendar(user_id, weeks=12)
@@ -47,17 +66,17 @@ class StreakService:
             this_week_stats=this_week
         )
     
-    def _load_or_create(self, user_id: str) -> StreakInfo:
+    async def _load_or_create(self, user_id: str) -> StreakInfo:
         """Streak bilgisini yükle veya oluştur"""
-        file_path = self._get_file_path(user_id)
-        
-        if file_path.exists():
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return StreakInfo(**data)
+        # Cache → KV store (miss'te disk okuması thread'de)
+        streak_info = await self.store.aget(user_id)
+        if streak_info is not None:
+            return streak_info
         
-        # Yeni kullanıcı
-        return StreakInfo(user_id=user_id)
+        # Yeni kullanıcı (değişene kadar yazılmaz)
+        streak_info = StreakInfo(user_id=user_id)
+        self.store.put(user_id, streak_info, dirty=False)
+        return streak_info
     
     def _build_calendar(self, user_id: str, weeks: int = 12) -> StreakCalendar:
         """GitHub tarzı calendar oluştur"""
@@ -104,7 +123,7 @@ class StreakService:
         """XP kazanıldığında streak güncelle"""
         print(f"🔄 Updating streak for {user_id}: +{xp_earned} XP")
         
-        streak_info = self._load_or_create(user_id)
+        streak_info = await self._load_or_create(user_id)
         today_str = date.today().isoformat()
         
         # Bugün minimum karşılandı mı?
@@ -143,13 +162,8 @@ class StreakService:
         return streak_info
     
     def _save(self, streak_info: StreakInfo):
-        """Streak bilgisini kaydet"""
-        file_path = self._get_file_path(streak_info.user_id)
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(streak_info.dict(), f, indent=2, ensure_ascii=False)
-        
-        print(f"💾 Streak saved: {file_path}")
+        """Streak bilgisini kaydet (write-behind: flusher KV store'a batch yazar)"""
+        self.store.put(streak_info.user_id, streak_info)
 
 
 # Global instance
@@ -0,0 +1,256 @@
+# ================================
+# src/services/trending_engine.py - Incremental Trending Engine
+# ================================
+
+"""
+Artımlı trending skorları (HOURLY / DAILY / WEEKLY)
+
+Her reel için her periyotta üstel azalan (exponentially decayed) sayaçlar
+tutulur: views, emojis, detail reads, shares. Trend skoru bunların ağırlıklı
+toplamıdır.
+
+Forward decay: değerler sabit bir landmark zamanına göre saklanır
+
+    stored += weight · exp(λ · (t - landmark))
+    gerçek  = stored · exp(-λ · (now - landmark))
+
+Böylece zaman geçtikçe hiçbir reel'i güncellemek gerekmez ve sıralama
+(stored değerlerin sırası) değişmez → periyot başına bir max-heap yeterli.
+Event başına O(log n), top-k sorgusu ~O(k log n) (lazy silinen eski heap
+girdileri atlanır). Üs büyüyünce tüm değerler aynı katsayıyla yeniden
+ölçeklenir (heap sırası bozulmaz).
+
+Skoru ihmal edilebilir seviyeye düşen reels (rescale sırasında ve her
+PRUNE_EVERY_EVENTS event'te bir) sayaçlardan atılır; yayından kalkan
+reels remove() ile hemen çıkarılır.
+"""
+
+import heapq
+import math
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..models.reels_tracking import TrendPeriod
+
+
+# Sinyal index'leri (sayaç listesindeki sıra)
+VIEWS, EMOJIS, DETAIL_READS, SHARES = range(4)
+SIGNAL_NAMES = ("views", "emojis", "detail_reads", "shares")
+
+# Trend skoru ağırlıkları (sinyal sırasıyla)
+SIGNAL_WEIGHTS = (1.0, 2.0, 1.5, 3.0)
+
+# Periyot başına yarılanma süresi (saat)
+HALF_LIFE_HOURS = {
+    TrendPeriod.HOURLY: 1.0,
+    TrendPeriod.DAILY: 8.0,
+    TrendPeriod.WEEKLY: 48.0,
+}
+
+# exp(λ·Δt) bu değeri aşınca landmark ileri alınır (float taşmasını önler)
+MAX_EXPONENT = 60.0
+
+# Bu kadar yarılanmadan eski event'ler etkisizdir (startup rebuild'de atlanır)
+IGNORE_AFTER_HALF_LIVES = 12
+
+# Decay uygulanmış skoru bunun altına düşen reels atılır
+# (horizon'dan eski tek bir view'ın skoru)
+PRUNE_BELOW_SCORE = 2.0 ** -IGNORE_AFTER_HALF_LIVES
+
+# Periyodik prune sıklığı (event sayısı)
+PRUNE_EVERY_EVENTS = 10_000
+
+
+class _DecayedCounters:
+    """Tek periyot için forward-decay sayaçları + trend heap'i"""
+
+    def __init__(self, half_life_hours: float, landmark: float):
+        self.rate = math.log(2) / (half_life_hours * 3600.0)
+        self.horizon_seconds = half_life_hours * 3600.0 * IGNORE_AFTER_HALF_LIVES
+        self.landmark = landmark
+
+        # reel_id → [views, emojis, detail_reads, shares, score] (landmark biriminde)
+        self.counters: Dict[str, List[float]] = {}
+        # (-score, reel_id) max-heap; eski girdiler lazy atlanır
+        self.heap: List[Tuple[float, str]] = []
+
+    def add(self, reel_id: str, signal: int, amount: float, timestamp: float):
+        if timestamp - self.landmark > MAX_EXPONENT / self.rate:
+            self._rescale(timestamp)
+
+        boost = amount * math.exp(self.rate * (timestamp - self.landmark))
+        counters = self.counters.get(reel_id)
+        if counters is None:
+            counters = self.counters[reel_id] = [0.0] * (len(SIGNAL_NAMES) + 1)
+
+        counters[signal] += boost
+        counters[-1] += boost * SIGNAL_WEIGHTS[signal]
+        heapq.heappush(self.heap, (-counters[-1], reel_id))
+
+        # Lazy girdiler birikirse heap'i yeniden kur
+        if len(self.heap) > 2 * len(self.counters) + 64:
+            self.heap = [(-values[-1], rid) for rid, values in self.counters.items()]
+            heapq.heapify(self.heap)
+
+    def decay_factor(self, now: float) -> float:
+        return math.exp(-self.rate * (now - self.landmark))
+
+    def top(
+        self,
+        k: int,
+        now: float,
+        eligible: Optional[Callable[[str], bool]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        En yüksek skorlu k reel (decay uygulanmış skorlarla)
+
+        eligible False dönen reels atlanır ama heap'te kalır.
+        """
+        factor = self.decay_factor(now)
+        result: List[Tuple[str, float]] = []
+        popped: List[Tuple[float, str]] = []
+
+        while self.heap and len(result) < k:
+            entry = heapq.heappop(self.heap)
+            neg_score, reel_id = entry
+            counters = self.counters.get(reel_id)
+            if counters is None or -neg_score != counters[-1]:
+                continue  # Eski girdi (skor sonradan arttı) → kalıcı olarak at
+            popped.append(entry)
+            if eligible is None or eligible(reel_id):
+                result.append((reel_id, counters[-1] * factor))
+
+        for entry in popped:
+            heapq.heappush(self.heap, entry)
+        return result
+
+    def remove(self, reel_id: str):
+        """Reel'i sayaçlardan çıkar (heap girdisi lazy atlanır)"""
+        self.counters.pop(reel_id, None)
+
+    def prune(self, now: float) -> int:
+        """Decay'li skoru PRUNE_BELOW_SCORE altına düşen reels'i at, heap'i yeniden kur"""
+        threshold = PRUNE_BELOW_SCORE / self.decay_factor(now)
+        stale = [rid for rid, values in self.counters.items() if values[-1] < threshold]
+        for reel_id in stale:
+            del self.counters[reel_id]
+        if stale:
+            self.heap = [(-values[-1], rid) for rid, values in self.counters.items()]
+            heapq.heapify(self.heap)
+        return len(stale)
+
+    def _rescale(self, timestamp: float):
+        """Landmark'ı ileri al - tüm değerler aynı katsayıyla küçülür, sıra korunur"""
+        factor = math.exp(-self.rate * (timestamp - self.landmark))
+        for values in self.counters.values():
+            for i in range(len(values)):
+                values[i] *= factor
+        self.heap = [(neg_score * factor, reel_id) for neg_score, reel_id in self.heap]
+        self.landmark = timestamp
+        self.prune(timestamp)
+
+
+class TrendingEngine:
+    """
+    Periyot bazlı artımlı trending
+
+    Usage:
+        trending.record_view(reel_id, emoji=True, shared=False, at=view.viewed_at)
+        trending.record_detail_read(reel_id)
+        trending.top_k(TrendPeriod.DAILY, 10, eligible=lambda rid: rid in catalog)
+    """
+
+    def __init__(self):
+        self.periods: Dict[TrendPeriod, _DecayedCounters] = {}
+        self.events_recorded = 0
+        self.reset()
+
+    # ============ UPDATE ============
+
+    def record(self, reel_id: str, signal: int, amount: float = 1.0, at: Optional[datetime] = None):
+        """Tek sinyali tüm periyotlara işle"""
+        timestamp = (at or datetime.now()).timestamp()
+        now = datetime.now().timestamp()
+        for counters in self.periods.values():
+            if now - timestamp > counters.horizon_seconds:
+                continue
+            counters.add(reel_id, signal, amount, timestamp)
+        self.events_recorded += 1
+
+        if self.events_recorded % PRUNE_EVERY_EVENTS == 0:
+            self.prune()
+
+    def record_view(
+        self,
+        reel_id: str,
+        emoji: bool = False,
+        shared: bool = False,
+        detail_read: bool = False,
+        at: Optional[datetime] = None
+    ):
+        """Bir izleme kaydının tüm sinyallerini işle"""
+        self.record(reel_id, VIEWS, at=at)
+        if emoji:
+            self.record(reel_id, EMOJIS, at=at)
+        if shared:
+            self.record(reel_id, SHARES, at=at)
+        if detail_read:
+            self.record(reel_id, DETAIL_READS, at=at)
+
+    def record_detail_read(self, reel_id: str, at: Optional[datetime] = None):
+        self.record(reel_id, DETAIL_READS, at=at)
+
+    def remove(self, reel_id: str):
+        """Reel'i tüm periyotlardan çıkar (yayından kaldırılınca)"""
+        for counters in self.periods.values():
+            counters.remove(reel_id)
+
+    def prune(self) -> int:
+        """Tüm periyotlarda sönmüş sayaçları at"""
+        now = datetime.now().timestamp()
+        return sum(counters.prune(now) for counters in self.periods.values())
+
+    def reset(self):
+        """Tüm sayaçları sıfırla (startup rebuild öncesi)"""
+        now = datetime.now().timestamp()
+        self.periods = {
+            period: _DecayedCounters(half_life, now)
+            for period, half_life in HALF_LIFE_HOURS.items()
+        }
+        self.events_recorded = 0
+
+    # ============ QUERIES ============
+
+    def top_k(
+        self,
+        period: TrendPeriod,
+        k: int,
+        eligible: Optional[Callable[[str], bool]] = None
+    ) -> List[Tuple[str, float]]:
+        """Periyodun en trend k reel'i: [(reel_id, score), ...] yüksekten düşüğe"""
+        return self.periods[period].top(k, datetime.now().timestamp(), eligible)
+
+    def get_signals(self, reel_id: str, period: TrendPeriod) -> Dict[str, float]:
+        """Reel'in decay uygulanmış sinyal sayaçları"""
+        counters = self.periods[period]
+        values = counters.counters.get(reel_id)
+        if values is None:
+            return {name: 0.0 for name in SIGNAL_NAMES + ("score",)}
+        factor = counters.decay_factor(datetime.now().timestamp())
+        return {
+            name: round(value * factor, 3)
+            for name, value in zip(SIGNAL_NAMES + ("score",), values)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "events_recorded": self.events_recorded,
+            "periods": {
+                period.value: {
+                    "half_life_hours": HALF_LIFE_HOURS[period],
+                    "tracked_reels": len(counters.counters),
+                    "heap_entries": len(counters.heap)
+                }
+                for period, counters in self.periods.items()
+            }
+        }
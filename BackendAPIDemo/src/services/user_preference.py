@@ -16,17 +16,30 @@ Features:
 - Real-time updates
 - Persistent storage
 - Cold start handling
+- Kompakt store: interned ID'ler + float32 array'ler, kullanıcı başı sınırlı
+  keyword vocabulary (top-N + LRU decay), tek JSON formatı
+- Batch scoring (score_batch): reel özellikleri bir kez çıkarılır, tüm adaylar
+  NumPy gather'ları ile tek seferde skorlanır
 """
 
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-from collections import defaultdict
 from pathlib import Path
-import json
 import math
 
+import numpy as np
+
 from ..models.reels_tracking import ReelView, ReelFeedItem
 from ..config import settings
+from .compact_score_map import CompactScoreMap, Vocabulary
+from .profile_kv_store import CachedProfileStore
+
+
+# Process genelinde ortak vocabulary'ler (kullanıcılar ve reel özellikleri sadece ID tutar)
+# Tavanı (settings.preference_vocab_max_terms) aşınca engine tarafından küçültülür
+category_vocab = Vocabulary()
+keyword_vocab = Vocabulary()
+author_vocab = Vocabulary()
 
 
 class UserPreference:
@@ -35,22 +48,38 @@ class UserPreference:
     
     Stores:
     - Category scores (ekonomi: 0.85)
-    - Keyword scores (dolar: 0.9)
-    - Total interactions
+    - Keyword scores (dolar: 0.9) - en fazla preference_max_keywords adet
+    - Author scores
+    - Total interactions (aynı zamanda LRU saati)
     - Last updated timestamp
+    
+    Skorlar string yerine interned ID'lerle CompactScoreMap'te tutulur;
+    kullanıcı başı bellek kapasiteyle sınırlıdır ve obje pickle edilebilir.
     """
     
+    CATEGORY_DEFAULT = 0.5
+    KEYWORD_DEFAULT = 0.3
+    AUTHOR_DEFAULT = 0.3
+    
     def __init__(self, user_id: str):
         self.user_id = user_id
         
+        decay = settings.preference_lru_decay
+        
         # Kategori skorları (exponential moving average)
-        self.category_scores: Dict[str, float] = defaultdict(lambda: 0.5)
+        self.category_scores = CompactScoreMap(
+            self.CATEGORY_DEFAULT, settings.preference_max_categories, decay
+        )
         
         # Keyword skorları
-        self.keyword_scores: Dict[str, float] = defaultdict(lambda: 0.3)
+        self.keyword_scores = CompactScoreMap(
+            self.KEYWORD_DEFAULT, settings.preference_max_keywords, decay
+        )
         
         # Yazar skorları (optional)
-        self.author_scores: Dict[str, float] = defaultdict(lambda: 0.3)
+        self.author_scores = CompactScoreMap(
+            self.AUTHOR_DEFAULT, settings.preference_max_authors, decay
+        )
         
         # Metadata
         self.total_interactions = 0
@@ -68,14 +97,14 @@ class UserPreference:
         Formula: new_score = alpha * weight + (1-alpha) * old_score
         Alpha: Yeni verinin ağırlığı (0.3 = %30 yeni, %70 eski)
         """
-        current = self.category_scores[category]
+        self.total_interactions += 1
+        self.last_updated = datetime.now()
         
         # Exponential moving average
         alpha = 0.3  # Son etkileşim %30 ağırlık
-        self.category_scores[category] = alpha * weight + (1 - alpha) * current
-        
-        self.total_interactions += 1
-        self.last_updated = datetime.now()
+        self.category_scores.update_ema(
+            category_vocab.intern(category), weight, alpha, self.total_interactions
+        )
     
     def update_keyword_score(self, keyword: str, weight: float):
         """
@@ -85,9 +114,10 @@ class UserPreference:
             keyword: Anahtar kelime
             weight: Engagement weight
         """
-        current = self.keyword_scores[keyword]
         alpha = 0.3
-        self.keyword_scores[keyword] = alpha * weight + (1 - alpha) * current
+        self.keyword_scores.update_ema(
+            keyword_vocab.intern(keyword), weight, alpha, self.total_interactions
+        )
     
     def update_author_score(self, author: str, weight: float):
         """
@@ -100,23 +130,30 @@ class UserPreference:
         if not author:
             return
         
-        current = self.author_scores[author]
         alpha = 0.25  # Yazar biraz daha yavaş öğrenilsin
-        self.author_scores[author] = alpha * weight + (1 - alpha) * current
+        self.author_scores.update_ema(
+            author_vocab.intern(author), weight, alpha, self.total_interactions
+        )
     
     def get_category_score(self, category: str) -> float:
         """Kategori skorunu al (0-1 arası)"""
-        return self.category_scores.get(category, 0.5)
+        return self.category_scores.get(category_vocab.get(category))
     
     def get_keyword_score(self, keyword: str) -> float:
         """Keyword skorunu al (0-1 arası)"""
-        return self.keyword_scores.get(keyword, 0.3)
+        return self.keyword_scores.get(keyword_vocab.get(keyword))
     
     def get_author_score(self, author: Optional[str]) -> float:
         """Yazar skorunu al (0-1 arası)"""
         if not author:
-            return 0.3
-        return self.author_scores.get(author, 0.3)
+            return self.AUTHOR_DEFAULT
+        return self.author_scores.get(author_vocab.get(author))
+    
+    def top_categories(self, n: int) -> List[Tuple[str, float]]:
+        return [(category_vocab.term(i), score) for i, score in self.category_scores.top(n)]
+    
+    def top_keywords(self, n: int) -> List[Tuple[str, float]]:
+        return [(keyword_vocab.term(i), score) for i, score in self.keyword_scores.top(n)]
     
     def has_enough_data(self) -> bool:
         """Yeterli veri var mı personalization için"""
@@ -138,13 +175,30 @@ class UserPreference:
         else:
             return "hot"
     
+    @property
+    def nbytes(self) -> int:
+        """Skor array'lerinin toplam boyutu"""
+        return self.category_scores.nbytes + self.keyword_scores.nbytes + self.author_scores.nbytes
+    
     def to_dict(self) -> Dict:
-        """Dict'e çevir (storage için)"""
+        """
+        Dict'e çevir (storage için)
+        
+        Skorlar: {terim: [skor, son_kullanım]} (ID'ler process'e özel, string yazılır)
+        """
+        def dump(scores: CompactScoreMap, vocab: Vocabulary) -> Dict[str, list]:
+            return {
+                vocab.term(term_id): [round(float(score), 4), int(last_used)]
+                for term_id, score, last_used in zip(
+                    scores.ids.tolist(), scores.scores.tolist(), scores.last_used.tolist()
+                )
+            }
+        
         return {
             "user_id": self.user_id,
-            "category_scores": dict(self.category_scores),
-            "keyword_scores": dict(self.keyword_scores),
-            "author_scores": dict(self.author_scores),
+            "category_scores": dump(self.category_scores, category_vocab),
+            "keyword_scores": dump(self.keyword_scores, keyword_vocab),
+            "author_scores": dump(self.author_scores, author_vocab),
             "total_interactions": self.total_interactions,
             "last_updated": self.last_updated.isoformat(),
             "created_at": self.created_at.isoformat()
@@ -152,15 +206,99 @@ class UserPreference:
     
     @classmethod
     def from_dict(cls, data: Dict) -> 'UserPreference':
-        """Dict'ten oluştur (load için)"""
+        """Dict'ten oluştur (load için) - eski {terim: skor} formatını da okur"""
         pref = cls(data["user_id"])
-        pref.category_scores = defaultdict(lambda: 0.5, data.get("category_scores", {}))
-        pref.keyword_scores = defaultdict(lambda: 0.3, data.get("keyword_scores", {}))
-        pref.author_scores = defaultdict(lambda: 0.3, data.get("author_scores", {}))
+        
+        for field, scores, vocab in (
+            ("category_scores", pref.category_scores, category_vocab),
+            ("keyword_scores", pref.keyword_scores, keyword_vocab),
+            ("author_scores", pref.author_scores, author_vocab),
+        ):
+            entries = data.get(field, {})
+            # Kapasiteden fazlaysa en yüksek skorlular kalır
+            if len(entries) > scores.capacity:
+                entries = dict(sorted(
+                    entries.items(),
+                    key=lambda item: item[1][0] if isinstance(item[1], list) else item[1],
+                    reverse=True
+                )[:scores.capacity])
+            for term, value in entries.items():
+                score, last_used = value if isinstance(value, list) else (value, 0)
+                scores.set(vocab.intern(term), score, last_used)
+        
         pref.total_interactions = data.get("total_interactions", 0)
         pref.last_updated = datetime.fromisoformat(data["last_updated"])
         pref.created_at = datetime.fromisoformat(data.get("created_at", data["last_updated"]))
         return pref
+    
+    def __getstate__(self) -> Dict:
+        # Pickle: ID'ler yerine terimler (başka process'in vocabulary'si farklı)
+        return self.to_dict()
+    
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(UserPreference.from_dict(state).__dict__)
+
+
+class ReelFeatureTable:
+    """
+    Reel başına önceden çıkarılmış skorlama özellikleri (satır = reel)
+    
+    - category_ids: int32 (kategori ordinal'i)
+    - keyword_ids: int32 (n x MAX_KEYWORDS, -1 = boş)
+    - author_ids: int32 (-1 = yazar yok)
+    - published_ts: float64 (yaş bucket'ı skorlama anında searchsorted ile)
+    
+    Reel içeriği değişmediği için tablo append-only: katalogda yeni reel
+    görüldüğünde bir kez satır eklenir. Tavanı aşınca (veya vocabulary
+    compaction'ında) engine tabloyu boşaltır; adaylar yeniden eklenir.
+    """
+    
+    MAX_KEYWORDS = 10
+    
+    def __init__(self):
+        self.row_index: Dict[str, int] = {}
+        
+        self.category_ids = np.zeros(0, dtype=np.int32)
+        self.keyword_ids = np.zeros((0, self.MAX_KEYWORDS), dtype=np.int32)
+        self.author_ids = np.zeros(0, dtype=np.int32)
+        self.published_ts = np.zeros(0, dtype=np.float64)
+    
+    def __len__(self) -> int:
+        return len(self.row_index)
+    
+    def rows_for(self, reels: List[ReelFeedItem], extract_keywords) -> np.ndarray:
+        """Reels'in satır index'leri (eksik olanlar tek batch'te eklenir)"""
+        missing = [r for r in reels if r.id not in self.row_index]
+        if missing:
+            self._append(missing, extract_keywords)
+        return np.fromiter((self.row_index[r.id] for r in reels), dtype=np.int64, count=len(reels))
+    
+    def _append(self, reels: List[ReelFeedItem], extract_keywords):
+        n = len(reels)
+        category_ids = np.empty(n, dtype=np.int32)
+        keyword_ids = np.full((n, self.MAX_KEYWORDS), -1, dtype=np.int32)
+        author_ids = np.full(n, -1, dtype=np.int32)
+        published_ts = np.empty(n, dtype=np.float64)
+        
+        offset = len(self.row_index)
+        for i, reel in enumerate(reels):
+            news = reel.news_data
+            category_ids[i] = category_vocab.intern(news.category)
+            
+            keywords = news.keywords or extract_keywords(news.title)
+            for j, keyword in enumerate(keywords[:self.MAX_KEYWORDS]):
+                keyword_ids[i, j] = keyword_vocab.intern(keyword.lower())
+            
+            if news.author:
+                author_ids[i] = author_vocab.intern(news.author)
+            
+            published_ts[i] = reel.published_at.timestamp()
+            self.row_index[reel.id] = offset + i
+        
+        self.category_ids = np.concatenate([self.category_ids, category_ids])
+        self.keyword_ids = np.concatenate([self.keyword_ids, keyword_ids])
+        self.author_ids = np.concatenate([self.author_ids, author_ids])
+        self.published_ts = np.concatenate([self.published_ts, published_ts])
 
 
 class UserPreferenceEngine:
@@ -173,16 +311,38 @@ class UserPreferenceEngine:
     3. Detail view'da boost: boost_from_detail_view()
     """
     
+    # Recency bucket sınırları (saat) ve skorları - _calculate_recency_score ile aynı
+    RECENCY_EDGES_HOURS = np.array([3.0, 24.0, 72.0])
+    RECENCY_SCORES = np.array([1.0, 0.7, 0.4, 0.2], dtype=np.float32)
+    
     def __init__(self):
-        # In-memory cache
-        self.user_preferences: Dict[str, UserPreference] = {}
+        # Batch scoring için reel özellikleri
+        self.reel_features = ReelFeatureTable()
         
-        # Storage
+        # Vocabulary compaction eşiği (canlı terimler çoksa ileri alınır)
+        self._vocab_limit = settings.preference_vocab_max_terms
+        
+        # Storage: sharded KV + LRU cache (değişiklikler write-behind ile batch yazılır)
         self.storage_dir = Path(settings.storage_base_path) / "user_profiles"
-        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.user_preferences: CachedProfileStore[UserPreference] = CachedProfileStore(
+            "user_preferences",
+            self.storage_dir,
+            load=UserPreference.from_dict,
+            dump=UserPreference.to_dict,
+            capacity=settings.profile_cache_size,
+            shards=settings.profile_store_shards
+        )
+        
+        # Eski dosya başına JSON formatı (bir kez)
+        if self.user_preferences.kv.is_empty():
+            imported = self.user_preferences.kv.import_json_files("*.json", lambda path: path.stem)
+            if imported:
+                print(f"📦 Imported {imported} legacy preference files into KV store")
+        
+        warmed = self.user_preferences.warm_up(settings.profile_warmup_users)
         
         print("✅ User Preference Engine initialized")
-        print(f"   Storage: {self.storage_dir}")
+        print(f"   Storage: {self.storage_dir} (warm-up: {warmed} users)")
     
     def get_or_create_preference(self, user_id: str) -> UserPreference:
         """
@@ -194,25 +354,24 @@ class UserPreferenceEngine:
         Returns:
             UserPreference instance
         """
-        # Cache'de var mı?
-        if user_id in self.user_preferences:
-            return self.user_preferences[user_id]
-        
-        # Disk'ten yükle
-        user_file = self.storage_dir / f"{user_id}.json"
-        if user_file.exists():
-            try:
-                with open(user_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                pref = UserPreference.from_dict(data)
-                self.user_preferences[user_id] = pref
-                return pref
-            except Exception as e:
-                print(f"❌ Load preference error for {user_id}: {e}")
-        
-        # Yeni oluştur
+        # Cache → KV store
+        pref = self.user_preferences.get(user_id)
+        if pref is not None:
+            return pref
+        
+        # Yeni oluştur (değişene kadar yazılmaz)
+        pref = UserPreference(user_id)
+        self.user_preferences.put(user_id, pref, dirty=False)
+        return pref
+    
+    async def aget_or_create_preference(self, user_id: str) -> UserPreference:
+        """get_or_create_preference'ın request path'i versiyonu (cache miss'te KV okuması thread'de)"""
+        pref = await self.user_preferences.aget(user_id)
+        if pref is not None:
+            return pref
+        
         pref = UserPreference(user_id)
-        self.user_preferences[user_id] = pref
+        self.user_preferences.put(user_id, pref, dirty=False)
         return pref
     
     async def update_from_view(
@@ -231,7 +390,8 @@ class UserPreferenceEngine:
         
         Engagement skoruna göre kategori/keyword skorlarını günceller
         """
-        pref = self.get_or_create_preference(user_id)
+        self._maybe_compact_vocabularies()
+        pref = await self.aget_or_create_preference(user_id)
         
         # Engagement score hesapla (0-1 normalleştirilmiş)
         engagement = view.get_preference_weight()
@@ -268,7 +428,8 @@ class UserPreferenceEngine:
             reel: İzlenen reel
             engagement_score: Detail engagement skoru (0-1)
         """
-        pref = self.get_or_create_preference(user_id)
+        self._maybe_compact_vocabularies()
+        pref = await self.aget_or_create_preference(user_id)
         
         # Kategori'ye EKSTRA boost (1.5x)
         boosted_engagement = min(engagement_score * 1.5, 1.0)
@@ -307,7 +468,7 @@ class UserPreferenceEngine:
         - Author preference: 15%
         - Recency bonus: 10%
         """
-        pref = self.get_or_create_preference(user_id)
+        pref = await self.aget_or_create_preference(user_id)
         
         # Cold start: yeterli veri yok
         if not pref.has_enough_data():
@@ -338,6 +499,57 @@ class UserPreferenceEngine:
         
         return min(score, 1.0)
     
+    async def score_batch(
+        self,
+        user_id: str,
+        reels: List[ReelFeedItem]
+    ) -> np.ndarray:
+        """
+        Tüm adayları tek seferde skorla (predict_reel_score ile aynı formül)
+        
+        Args:
+            user_id: Kullanıcı ID
+            reels: Aday reels
+        
+        Returns:
+            float32 skor array'i (reels ile aynı sıra, 0-1)
+        """
+        if not reels:
+            return np.zeros(0, dtype=np.float32)
+        
+        self._maybe_compact_vocabularies()
+        pref = await self.aget_or_create_preference(user_id)
+        if not pref.has_enough_data():
+            return np.full(len(reels), 0.5, dtype=np.float32)
+        
+        table = self.reel_features
+        rows = table.rows_for(reels, self._extract_keywords)
+        
+        # Aday ID'leri kullanıcının sıralı score map'lerinde aranır (searchsorted)
+        # 1. Kategori (40%)
+        category_score = pref.category_scores.get_many(table.category_ids[rows])
+        
+        # 2. Keyword (35%) - en yüksek keyword skoru, keyword yoksa 0.3
+        keyword_ids = table.keyword_ids[rows]
+        keyword_scores = np.where(keyword_ids >= 0, pref.keyword_scores.get_many(keyword_ids), -np.inf)
+        keyword_score = keyword_scores.max(axis=1)
+        keyword_score = np.where(np.isfinite(keyword_score), keyword_score, 0.3)
+        
+        # 3. Yazar (15%) - -1 (yazar yok) → default
+        author_score = pref.author_scores.get_many(table.author_ids[rows])
+        
+        # 4. Recency (10%)
+        age_hours = (datetime.now().timestamp() - table.published_ts[rows]) / 3600
+        recency_score = self.RECENCY_SCORES[np.searchsorted(self.RECENCY_EDGES_HOURS, age_hours, side='right')]
+        
+        score = (
+            category_score * 0.4
+            + keyword_score * 0.35
+            + author_score * 0.15
+            + recency_score * 0.1
+        )
+        return np.minimum(score, 1.0).astype(np.float32)
+    
     def _extract_keywords(self, text: str) -> List[str]:
         """
         Basit keyword extraction (fallback)
@@ -378,32 +590,61 @@ class UserPreferenceEngine:
         else:
             return 0.2  # Eski haber
     
+    def _maybe_compact_vocabularies(self):
+        """
+        Ortak vocabulary'ler veya reel özellik tablosu tavanı aştıysa küçült
+        
+        Vocabulary'ler her görülen keyword / yazarla büyür. Tavan aşılınca
+        sadece cache'teki profillerin kullandığı ID'ler tutulur ve bu profiller
+        yeni ID'lere taşınır; cache dışındaki profiller terim olarak saklandığı
+        için etkilenmez. Reel özellik tablosu eski ID'leri tuttuğu için boşaltılır.
+        
+        Senkron çalışır ve profil alınmadan önce çağrılır (eski ID tutan
+        profil referansı kalmaz).
+        """
+        vocabularies = (
+            ("category_scores", category_vocab),
+            ("keyword_scores", keyword_vocab),
+            ("author_scores", author_vocab),
+        )
+        
+        if any(len(vocab) > self._vocab_limit for _, vocab in vocabularies):
+            cached = list(self.user_preferences.cache.values())
+            before = sum(len(vocab) for _, vocab in vocabularies)
+            live = 0
+            for field, vocab in vocabularies:
+                maps = [getattr(pref, field) for pref in cached]
+                keep = np.concatenate([m.ids for m in maps]) if maps else np.zeros(0, dtype=np.int32)
+                mapping = vocab.compact(keep)
+                for scores in maps:
+                    scores.remap(mapping)
+                live = max(live, len(vocab))
+            
+            # Canlı terimler tavana yakınsa her çağrıda compaction olmasın
+            self._vocab_limit = max(settings.preference_vocab_max_terms, 2 * live)
+            self.reel_features = ReelFeatureTable()
+            
+            after = sum(len(vocab) for _, vocab in vocabularies)
+            print(f"🗜️ Preference vocabularies compacted: {before} → {after} terms ({len(cached)} cached users)")
+        
+        elif len(self.reel_features) > settings.preference_feature_table_max_rows:
+            self.reel_features = ReelFeatureTable()
+    
     async def _save_preference(self, pref: UserPreference):
-        """Preference'ı disk'e kaydet"""
-        try:
-            user_file = self.storage_dir / f"{pref.user_id}.json"
-            with open(user_file, 'w', encoding='utf-8') as f:
-                json.dump(pref.to_dict(), f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"❌ Save preference error for {pref.user_id}: {e}")
+        """Preference'ı kirli işaretle (write-behind flusher KV store'a batch yazar)"""
+        self.user_preferences.put(pref.user_id, pref)
+    
+    def get_store_stats(self) -> Dict:
+        """Profil store / cache istatistikleri"""
+        return self.user_preferences.get_stats()
     
     def get_user_stats(self, user_id: str) -> Dict:
         """Kullanıcı istatistikleri"""
         pref = self.get_or_create_preference(user_id)
         
-        # Top categories
-        top_categories = sorted(
-            pref.category_scores.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )[:5]
-        
-        # Top keywords
-        top_keywords = sorted(
-            pref.keyword_scores.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )[:10]
+        # Top categories / keywords
+        top_categories = pref.top_categories(5)
+        top_keywords = pref.top_keywords(10)
         
         return {
             "user_id": user_id,
@@ -411,6 +652,8 @@ class UserPreferenceEngine:
             "total_interactions": pref.total_interactions,
             "top_categories": [{"name": k, "score": round(v, 3)} for k, v in top_categories],
             "top_keywords": [{"keyword": k, "score": round(v, 3)} for k, v in top_keywords],
+            "tracked_keywords": len(pref.keyword_scores),
+            "memory_bytes": pref.nbytes,
             "last_updated": pref.last_updated.isoformat(),
             "created_at": pref.created_at.isoformat()
         }
@@ -0,0 +1,224 @@
+# ================================
+# src/services/write_behind.py - Debounced Write-Behind Flusher
+# ================================
+
+"""
+Write-behind flusher - JSON-persisted servisler için ortak yazma katmanı
+
+Request handler'lar dosyaya yazmak yerine sadece mark_dirty() çağırır.
+Arka plandaki asyncio task belirli aralıklarla kirli servisleri toplu yazar:
+
+1. collect(): Event loop üzerinde state'in ucuz, sığ bir kopyası alınır
+   (dict/list kopyaları; model objeleri paylaşılır)
+2. JSON serileştirme ve dosya I/O thread'de yapılır
+   (temp dosya + os.replace = atomik)
+3. after_flush(): Yazma bittikten sonra event loop üzerinde çağrılır (opsiyonel)
+
+Aynı aralıkta gelen 100 değişiklik → 1 yazma.
+Flusher çalışmıyorsa (script, startup öncesi) mark_dirty() anında yazar.
+
+Dosya yerine başka bir hedefe (örn. KV store) yazan servisler register()'a
+write callable'ı verir: collect() anahtarları dosya yolu yerine kendi
+anahtarlarıdır, write() serileştirilmiş batch'i thread'de yazar.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+import asyncio
+import json
+import os
+
+from ..config import settings
+
+
+# collect() dönüş tipi: [(dosya_yolu, JSON serileştirilebilir obje), ...]
+# Obje pydantic model / to_dict() sahibi objeler içerebilir (_encode_default)
+SnapshotFiles = List[Tuple[Path, Any]]
+
+# Özel writer: [(anahtar, JSON string), ...] alır (thread'de çalışır)
+BatchWriter = Callable[[List[Tuple[Any, str]]], None]
+
+
+def atomic_write_text(path: Path, text: str):
+    """Temp dosyaya yaz ve rename et (yarım yazılmış dosya kalmaz)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _encode_default(obj: Any) -> Any:
+    """collect() snapshot'larındaki model objelerini thread'de JSON'a çevir"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def dump_json(data: Any) -> str:
+    """Makine tarafından yazılan state için kompakt JSON (indent yok)"""
+    return json.dumps(data, ensure_ascii=False, default=_encode_default)
+
+
+@dataclass
+class _Target:
+    collect: Callable[[], SnapshotFiles]
+    after_flush: Optional[Callable[[], None]] = None
+    write: Optional[BatchWriter] = None
+
+
+class WriteBehindFlusher:
+    """
+    Debounced background flusher
+
+    Usage:
+        write_behind.register("gamification", self._collect_snapshot)
+        write_behind.mark_dirty("gamification")
+    """
+
+    def __init__(self, interval_seconds: float = 2.0, enabled: bool = True):
+        self.interval_seconds = interval_seconds
+        self.enabled = enabled
+
+        self._targets: Dict[str, _Target] = {}
+        self._dirty: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+        # Metrics
+        self.flush_count = 0
+        self.files_written = 0
+        self.coalesced_marks = 0
+
+    def register(
+        self,
+        key: str,
+        collect: Callable[[], SnapshotFiles],
+        after_flush: Optional[Callable[[], None]] = None,
+        write: Optional[BatchWriter] = None
+    ):
+        """Servisi flusher'a kaydet (write verilmezse JSON dosyalarına yazılır)"""
+        self._targets[key] = _Target(collect=collect, after_flush=after_flush, write=write)
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def mark_dirty(self, key: str):
+        """
+        Servisi kirli olarak işaretle
+
+        Flusher çalışmıyorsa hemen senkron yazar (eski davranış)
+        """
+        if key not in self._targets:
+            print(f"⚠️ Write-behind: unknown key '{key}'")
+            return
+
+        if not self.enabled or not self.is_running:
+            self._flush_sync(key)
+            return
+
+        if key in self._dirty:
+            self.coalesced_marks += 1
+        self._dirty.add(key)
+
+    def start(self):
+        """Background flush task'ını başlat (event loop içinde çağrılmalı)"""
+        if not self.enabled or self.is_running:
+            return
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        print(f"✅ Write-behind flusher started (interval: {self.interval_seconds}s)")
+
+    async def stop(self):
+        """Task'ı durdur ve bekleyen her şeyi yaz (shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+        print("💾 Write-behind flusher stopped (final flush done)")
+
+    async def flush(self):
+        """Kirli tüm servisleri yaz"""
+        if not self._dirty:
+            return
+
+        lock = self._lock or asyncio.Lock()
+        async with lock:
+            keys = list(self._dirty)
+            self._dirty.clear()
+
+            for key in keys:
+                target = self._targets[key]
+                try:
+                    # Loop'ta sadece sığ kopya; serileştirme + I/O thread'de
+                    snapshot = target.collect()
+                    await asyncio.to_thread(self._serialize_and_write, target, snapshot)
+                    if target.after_flush:
+                        target.after_flush()
+                except Exception as e:
+                    print(f"❌ Write-behind flush error ({key}): {e}")
+                    self._dirty.add(key)  # Bir sonraki turda tekrar dene
+
+            self.flush_count += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Flusher metrikleri"""
+        return {
+            "enabled": self.enabled,
+            "running": self.is_running,
+            "interval_seconds": self.interval_seconds,
+            "registered": sorted(self._targets.keys()),
+            "dirty": sorted(self._dirty),
+            "flush_count": self.flush_count,
+            "files_written": self.files_written,
+            "coalesced_marks": self.coalesced_marks
+        }
+
+    async def _run(self):
+        """Periyodik flush döngüsü"""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.flush()
+
+    def _flush_sync(self, key: str):
+        """Senkron yazma (flusher çalışmıyorken)"""
+        target = self._targets[key]
+        try:
+            self._serialize_and_write(target, target.collect())
+            if target.after_flush:
+                target.after_flush()
+        except Exception as e:
+            print(f"❌ Write-behind sync write error ({key}): {e}")
+
+    def _serialize_and_write(self, target: _Target, snapshot: SnapshotFiles):
+        """JSON'a çevir ve yaz (flush'ta thread'de çalışır)"""
+        payload = [(path, dump_json(data)) for path, data in snapshot]
+        (target.write or self._write_files)(payload)
+
+    def _write_files(self, payload: List[Tuple[Path, str]]):
+        """Dosyaları sırayla atomik yaz (sıra önemli: meta dosyası en son)"""
+        for path, text in payload:
+            atomic_write_text(path, text)
+            self.files_written += 1
+
+
+# Global instance
+write_behind = WriteBehindFlusher(
+    interval_seconds=settings.write_behind_interval_seconds,
+    enabled=settings.write_behind_enabled
+)
@@ -0,0 +1,75 @@
+# ================================
+# tests/conftest.py - Test ortamı
+# ================================
+
+"""
+Servisler import anında global singleton'larını oluşturur ve cwd'ye göre
+dosya yazar (data/streaks, outputs ...). Bu yüzden env ve cwd, `src`
+import edilmeden önce geçici bir dizine alınır; repodaki data/ ve
+storage/ dosyalarına dokunulmaz.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TEST_ROOT = Path(tempfile.mkdtemp(prefix="aa_next_tests_"))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ["STORAGE_BASE_PATH"] = str(TEST_ROOT / "outputs")
+os.environ["NLP_ENGINE_MODE"] = "hashing"      # Ağsız, fit gerektirmez
+os.environ["GAME_QUESTION_LLM"] = "stub"       # OpenAI çağrısı yok
+os.environ.pop("DATABASE_URL", None)           # JSON + WAL backend
+
+sys.path.insert(0, str(BACKEND_DIR))
+os.chdir(TEST_ROOT)
+
+import pytest  # noqa: E402
+
+from src.services.write_behind import write_behind  # noqa: E402
+
+
+@pytest.fixture
+def isolated_write_behind():
+    """Test içinde kaydedilen write-behind hedeflerini test sonunda geri al"""
+    targets = dict(write_behind._targets)
+    yield write_behind
+    write_behind._targets.clear()
+    write_behind._targets.update(targets)
+    write_behind._dirty.clear()
+
+
+def make_reel(index: int, category: str = "spor", hours_ago: float = 0.0):
+    """Yayınlanmış test reel'i (TTS/NLP pipeline'ı olmadan)"""
+    from datetime import datetime, timedelta
+    from src.models.reels_tracking import NewsData, ReelFeedItem, ReelStatus
+
+    news = NewsData(
+        title=f"Haber {index}",
+        summary=f"{category} haberi özet {index}",
+        url=f"https://example.com/haber/{index}",
+        category=category,
+        published_date=datetime.now().isoformat()
+    )
+    return ReelFeedItem(
+        id=f"reel_{index:04d}",
+        news_data=news,
+        tts_content=news.summary,
+        voice_used="alloy",
+        model_used="tts-1",
+        audio_url=f"/audio/{index}.mp3",
+        duration_seconds=30,
+        file_size_mb=1.0,
+        status=ReelStatus.PUBLISHED,
+        published_at=datetime.now() - timedelta(hours=hours_ago),
+        character_count=len(news.summary),
+        estimated_cost=0.0,
+        processing_time_seconds=1.0
+    )
+
+
+@pytest.fixture
+def reel_factory():
+    return make_reel
@@ -0,0 +1,100 @@
+# ================================
+# tests/test_event_log.py - AppendOnlyLog + write-behind atomik yazma
+# ================================
+
+import json
+import os
+
+import pytest
+
+from src.services.event_log import AppendOnlyLog, read_snapshot_seq
+from src.services.write_behind import atomic_write_text
+
+
+def test_append_assigns_increasing_seq_and_replays_in_order(tmp_path):
+    log = AppendOnlyLog(tmp_path / "wal.jsonl")
+    seqs = [log.append("view", {"i": i}) for i in range(5)]
+
+    assert seqs == [1, 2, 3, 4, 5]
+    assert log.pending_records == 5
+    assert [r["data"]["i"] for r in log.replay()] == [0, 1, 2, 3, 4]
+    assert [r["seq"] for r in log.replay(after_seq=3)] == [4, 5]
+    log.close()
+
+
+def test_truncate_keeps_records_after_snapshot_seq(tmp_path):
+    log = AppendOnlyLog(tmp_path / "wal.jsonl")
+    for i in range(6):
+        log.append("view", {"i": i})
+
+    log.truncate(keep_after_seq=4)
+
+    assert [r["seq"] for r in log.replay()] == [5, 6]
+    assert log.pending_records == 2
+    # seq sayacı geri gitmez, truncate sonrası append devam eder
+    assert log.append("view", {"i": 6}) == 7
+    assert not (tmp_path / ".wal.jsonl.tmp").exists()
+    log.close()
+
+
+def test_truncate_without_seq_empties_log(tmp_path):
+    log = AppendOnlyLog(tmp_path / "wal.jsonl")
+    log.append("view", {})
+    log.truncate()
+
+    assert list(log.replay()) == []
+    assert log.pending_records == 0
+    assert log.append("view", {}) == 2
+    log.close()
+
+
+def test_reopen_continues_seq_and_skips_torn_last_line(tmp_path):
+    path = tmp_path / "wal.jsonl"
+    log = AppendOnlyLog(path)
+    log.append("view", {"i": 0})
+    log.append("view", {"i": 1})
+    log.close()
+
+    # Crash: son satır yarım yazılmış
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"seq": 3, "op": "view", "da')
+
+    reopened = AppendOnlyLog(path)
+    assert [r["data"]["i"] for r in reopened.replay()] == [0, 1]
+    assert reopened.last_seq == 2
+
+    reopened.ensure_seq_at_least(10)
+    assert reopened.append("view", {"i": 2}) == 11
+    reopened.close()
+
+
+def test_read_snapshot_seq(tmp_path):
+    meta = tmp_path / "snapshot_meta.json"
+    assert read_snapshot_seq(meta) == 0
+
+    meta.write_text(json.dumps({"wal_seq": 42}), encoding="utf-8")
+    assert read_snapshot_seq(meta) == 42
+
+
+def test_atomic_write_replaces_file_and_leaves_no_temp(tmp_path):
+    target = tmp_path / "nested" / "reels.json"
+    atomic_write_text(target, '{"v": 1}')
+    atomic_write_text(target, '{"v": 2}')
+
+    assert json.loads(target.read_text(encoding="utf-8")) == {"v": 2}
+    assert os.listdir(target.parent) == ["reels.json"]
+
+
+def test_atomic_write_keeps_old_file_when_rename_fails(tmp_path, monkeypatch):
+    target = tmp_path / "reels.json"
+    atomic_write_text(target, '{"v": 1}')
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("src.services.write_behind.os.replace", failing_replace)
+    with pytest.raises(OSError):
+        atomic_write_text(target, '{"v": 2}')
+
+    # Eski snapshot bozulmadan yerinde
+    assert json.loads(target.read_text(encoding="utf-8")) == {"v": 1}
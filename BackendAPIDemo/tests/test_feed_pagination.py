@@ -0,0 +1,94 @@
+# ================================
+# tests/test_feed_pagination.py - Snapshot tabanlı cursor pagination
+# ================================
+
+import asyncio
+
+import pytest
+
+from src.services.feed_generator import decode_feed_cursor, encode_feed_cursor, feed_generator
+from src.services.reels_analytics import reels_analytics
+
+REEL_COUNT = 45
+FIRST_INDEX = 1000  # Diğer testlerin reel ID'leriyle çakışmasın
+
+
+@pytest.fixture(scope="module")
+def published_reels():
+    from conftest import make_reel
+
+    reels = [
+        make_reel(FIRST_INDEX + i, category="spor" if i % 2 else "ekonomi", hours_ago=i % 48)
+        for i in range(REEL_COUNT)
+    ]
+    for reel in reels:
+        reels_analytics.reel_storage[reel.id] = reel
+        reels_analytics._index_reel(reel)
+    return reels
+
+
+def _walk(user_id, limit):
+    async def scenario():
+        pages = [await feed_generator.generate_feed(user_id, limit=limit)]
+        while pages[-1].pagination.next_cursor:
+            pages.append(await feed_generator.generate_feed(
+                user_id, limit=limit, cursor=pages[-1].pagination.next_cursor
+            ))
+        return pages
+
+    return asyncio.run(scenario())
+
+
+def test_cursor_round_trip():
+    assert decode_feed_cursor(encode_feed_cursor("abc123", 40)) == ("abc123", 40)
+    assert decode_feed_cursor("reel_0001") is None
+    assert decode_feed_cursor("!!!") is None
+
+
+def test_pages_cover_snapshot_without_duplicates(published_reels):
+    pages = _walk("pager_user", limit=20)
+
+    seen = [reel.id for page in pages for reel in page.reels]
+    total = pages[0].pagination.total_available
+    assert len(seen) == len(set(seen)) == total
+    assert 0 < total <= REEL_COUNT
+    assert [page.pagination.current_page for page in pages] == list(range(1, len(pages) + 1))
+    assert not pages[-1].pagination.has_next
+    assert pages[1].pagination.has_previous
+
+
+def test_feed_flags_do_not_leak_into_shared_reels(published_reels):
+    page = _walk("flag_user", limit=20)[0]
+
+    shared = reels_analytics.reel_storage[page.reels[0].id]
+    assert page.reels[0] is not shared
+    assert {(r.is_trending, r.is_recommended, r.feed_reason) for r in published_reels} == {
+        (False, False, "algorithmic")
+    }
+
+
+def test_cursor_of_other_user_starts_fresh(published_reels):
+    async def scenario():
+        first = await feed_generator.generate_feed("owner_user", limit=20)
+        stolen = await feed_generator.generate_feed(
+            "other_user", limit=20, cursor=first.pagination.next_cursor
+        )
+        return stolen
+
+    stolen = asyncio.run(scenario())
+    assert stolen.pagination.current_page == 1
+    assert not stolen.pagination.has_previous
+
+
+def test_legacy_reel_id_cursor_continues_after_that_reel(published_reels):
+    async def scenario():
+        first = await feed_generator.generate_feed("legacy_user", limit=20)
+        legacy = await feed_generator.generate_feed(
+            "legacy_user", limit=20, cursor=first.reels[-1].id
+        )
+        return first, legacy
+
+    first, legacy = asyncio.run(scenario())
+    # Yeni snapshot'ta o reel'den sonraki sayfa (reel'in kendisi tekrar gelmez)
+    assert legacy.pagination.has_previous
+    assert first.reels[-1].id not in {r.id for r in legacy.reels}
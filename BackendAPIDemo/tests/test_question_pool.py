@@ -0,0 +1,226 @@
+# ================================
+# tests/test_question_pool.py - Soru havuzu + oyun senaryosu fallback
+# ================================
+
+import asyncio
+import itertools
+
+import pytest
+
+from src.config import settings
+from src.models.user_viewed_news import user_viewed_news_storage
+from src.services.game_service import game_service
+from src.services.question_pool import (
+    QUESTION_FIELDS, QuestionPool, StubQuestionLLM, content_hash, create_question_llm,
+    question_pool, reel_item
+)
+from src.services.reels_analytics import reels_analytics
+
+
+class ScriptedLLM:
+    """generate() çıktısı testte belirlenir (model cevabını taklit eder)"""
+
+    name = "scripted"
+
+    def __init__(self, outputs=None, delay=0.0, error=None):
+        self.outputs = outputs
+        self.delay = delay
+        self.error = error
+        self.calls = []
+
+    async def generate(self, items):
+        self.calls.append([item["reel_id"] for item in items])
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        if self.outputs is not None:
+            return self.outputs(items)
+        return [_question(i, item) for i, item in enumerate(items)]
+
+
+def _question(index, item):
+    return {
+        "index": index,
+        "question": f"POOL {item['title']}",
+        "correct_option": f"Evet evet, {item['summary']}",
+        "wrong_option": "Hayır hayır",
+        "correct_response": "Doğru!",
+        "wrong_response": "Yanlış!",
+        "pass_response": f"Haber: {item['summary']}"
+    }
+
+
+def test_stub_llm_answers_every_item_with_its_index(reel_factory):
+    items = [reel_item(reel_factory(i)) for i in range(3)]
+    outputs = asyncio.run(StubQuestionLLM().generate(items))
+
+    assert [o["index"] for o in outputs] == [0, 1, 2]
+    for output, item in zip(outputs, items):
+        assert all(output[f] for f in QUESTION_FIELDS)
+        assert item["title"] in output["question"]
+
+
+def test_stub_llm_selected_by_settings(monkeypatch):
+    monkeypatch.setattr(settings, "game_question_llm", "stub")
+    assert isinstance(create_question_llm(), StubQuestionLLM)
+
+
+def test_generate_maps_outputs_by_index_not_position(tmp_path, reel_factory):
+    items = [reel_item(reel_factory(i)) for i in range(4)]
+
+    def reordered_with_junk(items):
+        return [
+            _question(2, items[2]),
+            _question(0, items[0]),
+            _question(1, items[1]) | {"index": 9},      # Aralık dışı
+            _question(1, items[1]) | {"index": -1},     # Negatif
+            _question(1, items[1]) | {"index": True},   # bool int sayılmaz
+            _question(1, items[1]) | {"index": "1"},    # string
+            "not a dict",
+        ]
+
+    pool = QuestionPool(tmp_path / "questions", llm=ScriptedLLM(reordered_with_junk))
+    generated = asyncio.run(pool._generate(items))
+
+    assert set(generated) == {items[0]["reel_id"], items[2]["reel_id"]}
+    assert generated[items[0]["reel_id"]]["question"] == f"POOL {items[0]['title']}"
+    assert generated[items[2]["reel_id"]]["question"] == f"POOL {items[2]['title']}"
+    assert pool.generated == 2
+
+
+def test_generate_drops_duplicated_and_incomplete_indexes(tmp_path, reel_factory):
+    items = [reel_item(reel_factory(i)) for i in range(3)]
+
+    def duplicated(items):
+        return [
+            _question(0, items[0]),
+            _question(0, items[1]),                      # Aynı index iki kez: ikisi de atılır
+            _question(1, items[1]) | {"wrong_option": ""},  # Eksik alan
+            _question(2, items[2]),
+        ]
+
+    pool = QuestionPool(tmp_path / "questions", llm=ScriptedLLM(duplicated))
+    generated = asyncio.run(pool._generate(items))
+
+    assert set(generated) == {items[2]["reel_id"]}
+    # Atılanlar diske de yazılmaz
+    found = asyncio.run(pool.get_many([reel_factory(i) for i in range(3)]))
+    assert set(found) == {items[2]["reel_id"]}
+
+
+def test_content_hash_change_triggers_regeneration(tmp_path, reel_factory):
+    llm = ScriptedLLM()
+    pool = QuestionPool(tmp_path / "questions", llm=llm)
+    reel = reel_factory(0)
+
+    first = asyncio.run(pool.get_or_generate([reel]))
+    again = asyncio.run(pool.get_or_generate([reel]))
+    assert again == first
+    assert len(llm.calls) == 1
+    assert pool.hits == 1
+
+    edited = reel.model_copy(deep=True)
+    edited.news_data.summary = "Düzeltilmiş özet"
+    assert content_hash(edited.news_data.title, edited.news_data.summary) != \
+        content_hash(reel.news_data.title, reel.news_data.summary)
+
+    regenerated = asyncio.run(pool.get_or_generate([edited]))
+    assert len(llm.calls) == 2
+    assert "Düzeltilmiş özet" in regenerated[reel.id]["pass_response"]
+
+
+def test_generator_change_triggers_regeneration(tmp_path, reel_factory):
+    reel = reel_factory(0)
+    stub_pool = QuestionPool(tmp_path / "questions", llm=StubQuestionLLM())
+    asyncio.run(stub_pool.get_or_generate([reel]))
+
+    llm = ScriptedLLM()
+    pool = QuestionPool(tmp_path / "questions", llm=llm)
+    found = asyncio.run(pool.get_or_generate([reel]))
+    assert llm.calls == [[reel.id]]
+    assert found[reel.id]["question"].startswith("POOL")
+
+
+@pytest.mark.parametrize("llm,timeout", [
+    (ScriptedLLM(error=RuntimeError("model down")), 1.0),
+    (ScriptedLLM(delay=5.0), 0.05),
+])
+def test_get_or_generate_returns_pooled_only_on_failure(tmp_path, reel_factory, llm, timeout):
+    reels = [reel_factory(i) for i in range(3)]
+    warm = QuestionPool(tmp_path / "questions", llm=ScriptedLLM())
+    asyncio.run(warm._generate([reel_item(reels[0])]))
+
+    pool = QuestionPool(tmp_path / "questions", llm=llm)
+    found = asyncio.run(pool.get_or_generate(reels, timeout=timeout))
+
+    assert set(found) == {reels[0].id}
+    assert pool.llm_failures == 1
+    assert llm.calls == [[reels[1].id, reels[2].id]]
+
+
+# ============ create_game_session ============
+
+QUESTION_COUNT = 4
+# Her test kendi reel'leri (global havuzda önceki testin soruları hit olmasın)
+_reel_indexes = itertools.count(2000)
+
+
+@pytest.fixture
+def game_reels(reel_factory, monkeypatch):
+    """Ortak izlenmiş reels (user_viewed_news dosyalarına yazmadan)"""
+    reels = [reel_factory(next(_reel_indexes)) for _ in range(QUESTION_COUNT)]
+    for reel in reels:
+        reels_analytics.reel_storage[reel.id] = reel
+
+    monkeypatch.setattr(
+        user_viewed_news_storage, "find_common_reels",
+        lambda **kwargs: [reel.id for reel in reels]
+    )
+    monkeypatch.setattr(
+        user_viewed_news_storage, "get_user_emojis_for_reels",
+        lambda user_id, reel_ids: {}
+    )
+    yield reels
+    for reel in reels:
+        reels_analytics.reel_storage.pop(reel.id, None)
+
+
+def _create_game(player1, player2):
+    session = asyncio.run(game_service.create_game_session(
+        player1, player2, question_count=QUESTION_COUNT
+    ))
+    game_service.active_games.pop(session.game_id, None)
+    game_service.user_games.pop(player1, None)
+    game_service.user_games.pop(player2, None)
+    return session
+
+
+def _pooled_ids(session):
+    return {q.reel_id for q in session.questions if q.question_text.startswith("POOL")}
+
+
+def test_create_game_session_uses_pool_and_templates_for_failed_misses(game_reels, monkeypatch):
+    llm = ScriptedLLM()
+    monkeypatch.setattr(question_pool, "llm", llm)
+    asyncio.run(question_pool._generate([reel_item(reel) for reel in game_reels[:2]]))
+
+    llm.error = RuntimeError("model down")
+    session = _create_game("player_one", "player_two")
+
+    assert len(session.questions) == QUESTION_COUNT
+    assert _pooled_ids(session) == {reel.id for reel in game_reels[:2]}
+    for question in session.questions:
+        assert question.question_text
+        assert question.correct_option and question.wrong_option
+
+
+def test_create_game_session_falls_back_to_templates_on_timeout(game_reels, monkeypatch):
+    monkeypatch.setattr(question_pool, "llm", ScriptedLLM(delay=5.0))
+    monkeypatch.setattr(settings, "game_question_llm_timeout", 0.05)
+
+    session = _create_game("player_three", "player_four")
+
+    assert len(session.questions) == QUESTION_COUNT
+    assert _pooled_ids(session) == set()
+    assert {q.reel_id for q in session.questions} == {reel.id for reel in game_reels}
@@ -0,0 +1,163 @@
+# ================================
+# tests/test_reel_vectors.py - Reel vector store + IVF index
+# ================================
+
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from src.services.ann_index import IVFIndex, assign_labels, choose_nlist, train_centroids
+from src.services.reel_vector_store import ReelVectorStore
+
+N_FEATURES = 64
+
+
+def _random_rows(n, seed, density=0.2):
+    matrix = sparse.random(n, N_FEATURES, density=density, format="csr",
+                           dtype=np.float32, random_state=seed)
+    return normalize(matrix, norm="l2")
+
+
+def _ids(start, n):
+    return [f"reel_{i:04d}" for i in range(start, start + n)]
+
+
+def test_append_merges_blocks_and_rows_match_full_matrix(tmp_path):
+    store = ReelVectorStore(tmp_path / "vectors")
+    assert not store.open("v1", N_FEATURES)
+    store.rebuild("v1", N_FEATURES, _ids(0, 50), _random_rows(50, seed=0))
+
+    expected = [_random_rows(50, seed=0)]
+    start = 50
+    for step in range(40):
+        rows = _random_rows(1 + step % 3, seed=step + 1)
+        store.append(_ids(start, rows.shape[0]), rows)
+        expected.append(rows)
+        start += rows.shape[0]
+
+        # Geometrik birleştirme: blok sayısı log(append sayısı) ile sınırlı
+        assert store.get_stats()["memory_blocks"] <= 2 * int(np.log2(step + 2)) + 1
+
+    full = sparse.vstack(expected, format="csr")
+    assert len(store) == full.shape[0]
+    assert (store.matrix != full).nnz == 0
+
+    picked = np.array([start - 1, 3, 60, 0, 75, start - 1])
+    assert (store.rows(picked) != full[picked]).nnz == 0
+    assert store.row_index["reel_0060"] == 60
+
+    # Restart: diskten aynı satırlar (tek base, blok yok)
+    reopened = ReelVectorStore(tmp_path / "vectors")
+    assert reopened.open("v1", N_FEATURES)
+    assert reopened.ids == store.ids
+    assert reopened.get_stats()["memory_blocks"] == 0
+    assert (reopened.matrix != full).nnz == 0
+
+
+def test_open_drops_half_written_append(tmp_path):
+    store = ReelVectorStore(tmp_path / "vectors")
+    store.rebuild("v1", N_FEATURES, _ids(0, 5), _random_rows(5, seed=0))
+    store.append(_ids(5, 2), _random_rows(2, seed=1))
+
+    # Crash: ids yazılmadan kesilen append (data/indices/indptr yazılmış)
+    extra = _random_rows(1, seed=2)
+    with open(store.data_file, "ab") as f:
+        f.write(extra.data.astype(np.float32).tobytes())
+    with open(store.indptr_file, "ab") as f:
+        f.write(np.array([store._nnz + extra.nnz], dtype=np.int64).tobytes())
+
+    reopened = ReelVectorStore(tmp_path / "vectors")
+    assert reopened.open("v1", N_FEATURES)
+    assert len(reopened) == 7
+    assert (reopened.matrix != store.matrix).nnz == 0
+
+
+def test_stage_then_adopt_swaps_model_without_touching_live_store(tmp_path):
+    store = ReelVectorStore(tmp_path / "vectors")
+    store.rebuild("v1", N_FEATURES, _ids(0, 10), _random_rows(10, seed=0))
+
+    new_matrix = _random_rows(12, seed=7)
+    staged = store.stage("v2", N_FEATURES, _ids(0, 12), new_matrix)
+
+    # Hazırlık sürerken canlı store eski modelde append etmeye devam eder
+    store.append(_ids(10, 1), _random_rows(1, seed=3))
+    assert store.model_version == "v1"
+    assert len(store) == 11
+    reopened_old = ReelVectorStore(tmp_path / "vectors")
+    assert reopened_old.open("v1", N_FEATURES)
+    assert len(reopened_old) == 11
+
+    store.adopt(staged)
+    assert store.model_version == "v2"
+    assert store.ids == _ids(0, 12)
+    assert store.get_stats()["memory_blocks"] == 0
+    assert (store.matrix != new_matrix).nnz == 0
+    assert not staged.meta_file.exists()
+
+
+def test_adopted_store_survives_restart(tmp_path):
+    store = ReelVectorStore(tmp_path / "vectors")
+    store.rebuild("v1", N_FEATURES, _ids(0, 4), _random_rows(4, seed=0))
+    new_matrix = _random_rows(6, seed=9)
+    store.adopt(store.stage("v2", N_FEATURES, _ids(0, 6), new_matrix))
+    store.append(_ids(6, 1), _random_rows(1, seed=10))
+
+    reopened = ReelVectorStore(tmp_path / "vectors")
+    assert reopened.open("v2", N_FEATURES)
+    assert reopened.ids == _ids(0, 7)
+    assert (reopened.matrix != store.matrix).nnz == 0
+
+
+def _clustered_rows(n_clusters, per_cluster, dim, seed):
+    """Her küme kendi feature bloğunda yoğun → belirgin kümeler"""
+    rng = np.random.default_rng(seed)
+    block = dim // n_clusters
+    rows = []
+    for cluster in range(n_clusters):
+        dense = rng.random((per_cluster, dim)) * 0.05
+        dense[:, cluster * block:(cluster + 1) * block] += rng.random((per_cluster, block))
+        dense[dense < 0.03] = 0.0
+        rows.append(dense)
+    return normalize(sparse.csr_matrix(np.vstack(rows), dtype=np.float32), norm="l2")
+
+
+def test_ivf_select_recall_against_exact_top_k():
+    dim, top_k, min_candidates = 256, 10, 150
+    matrix = _clustered_rows(n_clusters=16, per_cluster=120, dim=dim, seed=1)
+    n_rows = matrix.shape[0]
+
+    nlist = choose_nlist(n_rows)
+    centroids = train_centroids(matrix, nlist)
+    index = IVFIndex()
+    index.install(centroids, assign_labels(matrix, centroids))
+
+    rows = np.arange(n_rows)
+    assert index.covers(rows)
+
+    rng = np.random.default_rng(5)
+    hits = 0
+    for query_row in rng.choice(n_rows, 40, replace=False):
+        user_vector = matrix[query_row].toarray().ravel()
+        scores = matrix @ user_vector
+        exact = set(np.argsort(-scores, kind="stable")[:top_k])
+
+        mask, nprobe = index.select(rows, user_vector, min_candidates=min_candidates)
+        assert mask.sum() >= min(min_candidates, n_rows)
+        assert 1 <= nprobe < index.nlist  # Tüm kümeler açılmadı
+        hits += len(exact & set(rows[mask]))
+
+    recall = hits / (40 * top_k)
+    assert recall >= 0.9, recall
+
+
+def test_ivf_append_assigns_new_rows():
+    matrix = _clustered_rows(n_clusters=8, per_cluster=40, dim=64, seed=2)
+    centroids = train_centroids(matrix[:200], 8)
+    index = IVFIndex()
+    index.install(centroids, assign_labels(matrix[:200], centroids))
+
+    rows = np.arange(matrix.shape[0])
+    assert not index.covers(rows)
+    index.append(matrix[200:])
+    assert index.covers(rows)
+    assert np.array_equal(index.assignments, assign_labels(matrix, centroids))
@@ -0,0 +1,191 @@
+# ================================
+# tests/test_reels_wal.py - Reels WAL compaction + crash replay
+# ================================
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from src.config import settings
+from src.models.reels_tracking import TrackViewRequest
+from src.services.reels_analytics import ReelsAnalyticsService
+from src.services.write_behind import write_behind
+
+
+@pytest.fixture
+def open_service(tmp_path, monkeypatch, isolated_write_behind):
+    """Aynı storage dizininde servis aç (yeniden açmak = restart)"""
+    monkeypatch.setattr(settings, "storage_base_path", str(tmp_path))
+    monkeypatch.setattr(settings, "database_url", None)
+    monkeypatch.setattr(settings, "reels_wal_enabled", True)
+    monkeypatch.setattr(settings, "reels_wal_compact_threshold", 10_000)
+
+    services = []
+
+    def _open() -> ReelsAnalyticsService:
+        service = ReelsAnalyticsService()
+        services.append(service)
+        return service
+
+    yield _open
+
+    for service in services:
+        if service.wal is not None:
+            service.wal.close()
+
+
+async def _publish(service, reel):
+    """create_reel_from_article'ın kalıcılık adımları (TTS olmadan)"""
+    service.reel_storage[reel.id] = reel
+    service._index_reel(reel)
+    await service._initialize_reel_analytics(reel.id, reel)
+    service._persist_many([
+        ("reel", {"reel_id": reel.id, "reel": reel.model_dump(mode="json")}),
+        ("analytics", {
+            "reel_id": reel.id,
+            "analytics": service.reel_analytics[reel.id].model_dump(mode="json")
+        })
+    ])
+
+
+async def _view(service, user_id, reel_id, duration_ms=12_000):
+    response = await service.track_reel_view(
+        user_id,
+        TrackViewRequest(reel_id=reel_id, duration_ms=duration_ms, completed=True)
+    )
+    assert response.success, response.message
+    return response
+
+
+def _state(service):
+    """Karşılaştırılabilir in-memory state"""
+    return (
+        {k: r.model_dump(mode="json") for k, r in service.reel_storage.items()},
+        {u: [v.model_dump(mode="json") for v in views]
+         for u, views in service.view_storage.items() if views},
+        {k: a.model_dump(mode="json") for k, a in service.reel_analytics.items()}
+    )
+
+
+def test_replay_after_compaction_and_crash_restores_identical_state(open_service, reel_factory):
+    async def scenario():
+        service = open_service()
+        for i in range(3):
+            await _publish(service, reel_factory(i))
+        await _view(service, "user_a", "reel_0000")
+        await _view(service, "user_b", "reel_0001")
+
+        # Compaction: flusher çalışmıyor → snapshot senkron yazılır, log kırpılır
+        service._compact_log()
+        snapshot_seq = json.loads(service.snapshot_meta_file.read_text())["wal_seq"]
+        assert snapshot_seq == service.wal.last_seq
+        assert service.wal.pending_records == 0
+        assert not service._compaction_pending
+
+        # Snapshot'tan sonraki değişiklikler sadece log'da
+        await _publish(service, reel_factory(3))
+        await _view(service, "user_a", "reel_0003")
+        await _view(service, "user_c", "reel_0000")
+        assert service.wal.pending_records > 0
+        return _state(service), service
+
+    expected, crashed = asyncio.run(scenario())
+
+    # Crash: snapshot yazılmadan kapanır, son satır yarım kalmış
+    crashed.wal.close()
+    with open(crashed.wal_file, "a", encoding="utf-8") as f:
+        f.write('{"seq": 999, "op": "view", "data": {"user_')
+
+    restored = open_service()
+    assert _state(restored) == expected
+    assert restored.wal.last_seq >= crashed.wal.last_seq
+    assert "reel_0003" in restored.user_seen_reels["user_a"]
+
+
+def test_log_truncated_only_after_snapshot_flush_completes(open_service, reel_factory, monkeypatch):
+    writing = threading.Event()
+    release = threading.Event()
+
+    async def scenario():
+        service = open_service()
+        flusher = write_behind
+        monkeypatch.setattr(flusher, "interval_seconds", 3600)
+        original_write = flusher._write_files
+
+        def slow_write(payload):
+            writing.set()
+            assert release.wait(timeout=10)
+            original_write(payload)
+
+        monkeypatch.setattr(flusher, "_write_files", slow_write)
+        flusher.start()
+        try:
+            for i in range(2):
+                await _publish(service, reel_factory(i))
+            await _view(service, "user_a", "reel_0000")
+            records_before = service.wal.pending_records
+
+            service._compact_log()
+            assert service._compaction_pending
+            flush = asyncio.create_task(flusher.flush())
+            await asyncio.to_thread(writing.wait, 10)
+
+            # Snapshot thread'de yazılırken: log henüz kırpılmamış ...
+            assert service.wal.pending_records == records_before
+            snapshot_seq = service._snapshot_seq
+            assert snapshot_seq == service.wal.last_seq
+
+            # ... ve bu arada gelen kayıtlar snapshot'ta değil
+            await _view(service, "user_b", "reel_0001")
+            mid_flush_records = service.wal.last_seq - snapshot_seq
+
+            release.set()
+            await flush
+
+            meta = json.loads(service.snapshot_meta_file.read_text())
+            assert meta["wal_seq"] == snapshot_seq
+            kept = list(service.wal.replay())
+            assert [r["seq"] for r in kept] == list(
+                range(snapshot_seq + 1, snapshot_seq + 1 + mid_flush_records)
+            )
+            assert service.wal.pending_records == mid_flush_records
+            assert not service._compaction_pending
+            return _state(service), service
+        finally:
+            release.set()
+            await flusher.stop()
+
+    expected, service = asyncio.run(scenario())
+    service.wal.close()
+
+    restored = open_service()
+    assert _state(restored) == expected
+    assert [v.reel_id for v in restored.view_storage["user_b"]] == ["reel_0001"]
+
+
+def test_failed_snapshot_write_keeps_log(open_service, reel_factory, monkeypatch):
+    async def scenario():
+        service = open_service()
+        await _publish(service, reel_factory(0))
+        await _view(service, "user_a", "reel_0000")
+        return service
+
+    service = asyncio.run(scenario())
+    records_before = service.wal.pending_records
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr("src.services.write_behind.os.replace", failing_replace)
+        service._compact_log()
+
+    # Snapshot yazılamadı: log kırpılmaz, meta yok → restart tüm log'u replay eder
+    assert service.wal.pending_records == records_before
+    assert not service.snapshot_meta_file.exists()
+
+    expected = _state(service)
+    service.wal.close()
+    assert _state(open_service()) == expected